@@ -0,0 +1,329 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import gc
+import sys
+import json
+import random
+import timeit
+import argparse
+import tracemalloc
+from unittest import mock
+from typing import List, Dict, Any, Callable, Tuple, Optional
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.entities.message.MediaMessage import MediaMessage
+from bokkichat.entities.message.MediaType import MediaType
+
+try:
+    # noinspection PyPackageRequirements
+    import telegram
+    from bokkichat.settings.impl.TelegramBotSettings import \
+        TelegramBotSettings
+    from bokkichat.connection.impl.TelegramBotConnection import \
+        TelegramBotConnection
+except ImportError:
+    telegram = None
+
+
+def short_lines(count: int = 1000) -> List[str]:
+    """
+    Generates short chat lines
+    :param count: The amount of lines
+    :return: The lines
+    """
+    rng = random.Random(1)
+    words = ["hi", "ok", "/status", "thanks", "what", "is", "the", "price",
+             "of", "btc", "today", "lol", "see", "you", "later", "help"]
+    return [
+        " ".join([rng.choice(words) for _ in range(rng.randint(1, 8))])
+        for _ in range(count)
+    ]
+
+
+def log_dump(size: int = 1024 * 1024) -> str:
+    """
+    Generates a log dump, as sent by bots reporting build results
+    :param size: The approximate size of the log in characters
+    :return: The log
+    """
+    rng = random.Random(2)
+    lines = []
+    length = 0
+    while length < size:
+        line = "2019-01-01 12:{:02}:{:02} [{}] some_module.do_work: " \
+               "processed item_{} in {} ms".format(
+                   rng.randint(0, 59), rng.randint(0, 59),
+                   rng.choice(["INFO", "DEBUG", "WARNING"]),
+                   rng.randint(0, 100000), rng.randint(1, 999)
+               )
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def emoji_markdown(count: int = 200) -> str:
+    """
+    Generates text with many emoji and Markdown control characters
+    :param count: The amount of lines
+    :return: The text
+    """
+    rng = random.Random(3)
+    parts = ["\U0001F600", "\U0001F680", "❤️", "*bold*",
+             "_italic_", "snake_case_name", "\\_escaped", "2*3*4",
+             "`code`", "[link](http://example.com)", "plain"]
+    return "\n".join([
+        " ".join([rng.choice(parts) for _ in range(12)])
+        for _ in range(count)
+    ])
+
+
+def media_updates(count: int = 1000) -> List[Dict[str, Any]]:
+    """
+    Generates the message data of Telegram photo and audio updates
+    :param count: The amount of updates
+    :return: The message data of the updates
+    """
+    updates = []
+    for i in range(count):
+        message = {
+            "message_id": i,
+            "date": 1546300800 + i,
+            "chat": {"id": 1000 + i % 50, "type": "private"},
+            "caption": "caption *{}*".format(i)
+        }
+        if i % 2 == 0:
+            message["photo"] = [
+                {"file_id": "photo{}_{}".format(i, size),
+                 "file_size": 1000 * size, "width": 90 * size,
+                 "height": 90 * size}
+                for size in range(1, 4)
+            ]
+        else:
+            message["audio"] = {
+                "file_id": "audio{}".format(i), "file_size": 50000,
+                "duration": 3
+            }
+        updates.append(message)
+    return updates
+
+
+def text_updates(lines: List[str]) -> List[Dict[str, Any]]:
+    """
+    Generates the message data of Telegram text updates
+    :param lines: The texts of the updates
+    :return: The message data of the updates
+    """
+    return [
+        {
+            "message_id": i,
+            "date": 1546300800 + i,
+            "chat": {"id": 1000 + i % 50, "type": "private"},
+            "text": line
+        }
+        for i, line in enumerate(lines)
+    ]
+
+
+def mock_connection() -> "TelegramBotConnection":
+    """
+    Generates a TelegramBotConnection that does not access the network.
+    Media downloads return a fixed payload.
+    :return: The connection
+    """
+    with mock.patch("telegram.Bot") as bot_cls:
+        bot = bot_cls.return_value
+        bot.name = "@benchmark_bot"
+        connection = TelegramBotConnection(TelegramBotSettings("0:benchmark"))
+    payload = b"\0" * 1024
+    connection._download_media = lambda media_info: payload
+    return connection
+
+
+def cases() -> List[Tuple[str, Callable[[], Any]]]:
+    """
+    Generates the benchmark cases.
+    Cases that need python-telegram-bot are left out if it is not
+    installed.
+    :return: The names and functions of the benchmark cases
+    """
+    lines = short_lines()
+    log = log_dump()
+    emoji = emoji_markdown()
+    sender = Address("1000")
+    receiver = Address("@benchmark_bot")
+    texts = [TextMessage(sender, receiver, line) for line in lines]
+    log_message = TextMessage(sender, receiver, log)
+    emoji_message = TextMessage(sender, receiver, emoji)
+    media = MediaMessage(sender, receiver, MediaType.IMAGE, b"\0" * 1024)
+
+    benchmarks = [
+        ("entity.address", lambda: [Address(line) for line in lines]),
+        ("entity.text_message", lambda: [
+            TextMessage(sender, receiver, line) for line in lines
+        ]),
+        ("entity.media_message", lambda: [
+            MediaMessage(sender, receiver, MediaType.IMAGE, b"", line)
+            for line in lines
+        ]),
+        ("make_reply.text", lambda: [text.make_reply() for text in texts]),
+        ("make_reply.media", lambda: [media.make_reply() for _ in lines]),
+        ("split.short_lines", lambda: [text.split(4096) for text in texts]),
+        ("split.log_1mb", lambda: log_message.split(4096)),
+        ("split.emoji_markdown", lambda: emoji_message.split(4096)),
+    ]
+
+    if telegram is not None:
+        escape = TelegramBotConnection._escape_invalid_characters
+        connection = mock_connection()
+        parse = connection._parse_message
+        text_data = text_updates(lines)
+        media_data = media_updates()
+        benchmarks += [
+            ("escape.short_lines", lambda: [escape(x) for x in lines]),
+            ("escape.log_1mb", lambda: escape(log)),
+            ("escape.emoji_markdown", lambda: escape(emoji)),
+            ("parse.text_updates", lambda: [parse(x) for x in text_data]),
+            ("parse.media_updates", lambda: [parse(x) for x in media_data]),
+        ]
+    return benchmarks
+
+
+def measure(
+        func: Callable[[], Any],
+        repeat: int,
+        min_time: float
+) -> Dict[str, float]:
+    """
+    Measures a benchmark case.
+    The case is run often enough to take at least min_time seconds per
+    repetition, the fastest repetition is used. Garbage collection is
+    disabled while timing.
+    Allocations are measured in a separate run using tracemalloc.
+    :param func: The benchmark case
+    :param repeat: The amount of timed repetitions
+    :param min_time: The minimum time in seconds of a repetition
+    :return: The time per run in microseconds, the peak of allocated memory
+             in KiB and the amount of memory blocks allocated by the result
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum([stat.count_diff for stat in after.compare_to(
+        before, "filename"
+    )])
+    del result
+
+    return {"us": best * 1000000, "peak_kib": peak / 1024, "blocks": blocks}
+
+
+def compare(
+        results: Dict[str, Dict[str, float]],
+        baseline: Dict[str, Dict[str, float]],
+        threshold: float
+) -> List[str]:
+    """
+    Compares results with a baseline and prints the differences
+    :param results: The measured results
+    :param baseline: The baseline results
+    :param threshold: The relative slowdown considered a regression
+    :return: The names of the regressed benchmark cases
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]["us"]
+        change = (result["us"] - base) / base
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print("{:<24}{:>12.2f}{:>12.2f}{:>+9.1f}%{}".format(
+            name, base, result["us"], change * 100,
+            "  REGRESSION" if regressed else ""
+        ))
+    return regressions
+
+
+def main(args: List[str]) -> Dict[str, Dict[str, float]]:
+    """
+    Runs the benchmarks
+    :param args: The command line arguments
+    :return: The results of the benchmark cases
+    """
+    parser = argparse.ArgumentParser(
+        description="Measures the hot paths every message passes through"
+    )
+    parser.add_argument("--filter", default="",
+                        help="Only runs cases containing this string")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="Minimum time per repetition in seconds")
+    parser.add_argument("--save", help="Saves the results as a baseline")
+    parser.add_argument("--compare", help="Compares with a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative slowdown considered a regression")
+    parsed = parser.parse_args(args)
+
+    if telegram is None:
+        print("python-telegram-bot not available, "
+              "skipping escape and parse cases")
+
+    results = {}  # type: Dict[str, Dict[str, float]]
+    print("{:<24}{:>12}{:>12}{:>10}".format(
+        "case", "us/run", "peak KiB", "blocks"
+    ))
+    for name, func in cases():
+        if parsed.filter not in name:
+            continue
+        results[name] = measure(func, parsed.repeat, parsed.min_time)
+        print("{:<24}{:>12.2f}{:>12.1f}{:>10}".format(
+            name, results[name]["us"], results[name]["peak_kib"],
+            results[name]["blocks"]
+        ))
+
+    if parsed.save is not None:
+        with open(parsed.save, "w") as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+
+    if parsed.compare is not None:
+        with open(parsed.compare, "r") as f:
+            baseline = json.load(f)
+        print()
+        print("{:<24}{:>12}{:>12}{:>10}".format(
+            "case", "baseline", "us/run", "change"
+        ))
+        if len(compare(results, baseline, parsed.threshold)) > 0:
+            sys.exit(1)
+
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
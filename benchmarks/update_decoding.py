@@ -0,0 +1,156 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import sys
+import json
+import time
+import argparse
+from unittest import mock
+# noinspection PyPackageRequirements
+import telegram
+from typing import List, Dict, Any, Callable
+from bokkichat.settings.impl.TelegramBotSettings import TelegramBotSettings
+from bokkichat.connection.impl.TelegramBotConnection import \
+    TelegramBotConnection, json_loads
+
+
+def generate_updates(count: int) -> bytes:
+    """
+    Generates a getUpdates API response containing text updates
+    :param count: The amount of updates
+    :return: The encoded response
+    """
+    updates = []
+    for i in range(count):
+        updates.append({
+            "update_id": 100000 + i,
+            "message": {
+                "message_id": i,
+                "date": 1546300800 + i,
+                "from": {
+                    "id": 1000 + i % 50,
+                    "is_bot": False,
+                    "first_name": "User",
+                    "username": "user{}".format(i % 50)
+                },
+                "chat": {
+                    "id": 1000 + i % 50,
+                    "type": "private",
+                    "first_name": "User",
+                    "username": "user{}".format(i % 50)
+                },
+                "text": "/command argument {} with some more text".format(i)
+            }
+        })
+    return json.dumps({"ok": True, "result": updates}).encode("utf-8")
+
+
+def object_path(
+        connection: TelegramBotConnection,
+        body: bytes
+) -> List[Any]:
+    """
+    Decodes the updates like telegram.Bot.get_updates and
+    TelegramBotConnection.receive do without raw updates
+    :param connection: The connection to use
+    :param body: The encoded getUpdates response
+    :return: The parsed messages
+    """
+    result = json.loads(body.decode("utf-8"))["result"]
+    updates = [telegram.Update.de_json(x, connection.bot) for x in result]
+    return [
+        connection._parse_message(update.message.to_dict())
+        for update in updates
+    ]
+
+
+def raw_path(connection: TelegramBotConnection, body: bytes) -> List[Any]:
+    """
+    Decodes the updates like TelegramBotConnection.receive does with
+    raw updates
+    :param connection: The connection to use
+    :param body: The encoded getUpdates response
+    :return: The parsed messages
+    """
+    result = json_loads(body)["result"]
+    return [connection._parse_message(update["message"]) for update in result]
+
+
+def measure(
+        func: Callable,
+        connection: TelegramBotConnection,
+        body: bytes,
+        repeat: int
+) -> float:
+    """
+    Measures the best time of multiple runs of a decoding function
+    :param func: The decoding function
+    :param connection: The connection to use
+    :param body: The encoded getUpdates response
+    :param repeat: The amount of runs
+    :return: The best time in seconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(connection, body)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def mock_connection() -> TelegramBotConnection:
+    """
+    Generates a TelegramBotConnection whose bot does not access the network
+    :return: The connection
+    """
+    with mock.patch("telegram.Bot") as bot_cls:
+        bot = bot_cls.return_value
+        bot.get_updates.return_value = []
+        bot.name = "@benchmark_bot"
+        return TelegramBotConnection(TelegramBotSettings("0:benchmark"))
+
+
+def main(args: List[str]) -> Dict[str, float]:
+    """
+    Runs the benchmark
+    :param args: The command line arguments
+    :return: The measured per-update costs in microseconds
+    """
+    parser = argparse.ArgumentParser(
+        description="Measures the per-update cost of decoding getUpdates "
+                    "responses with and without raw updates"
+    )
+    parser.add_argument("--updates", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parsed = parser.parse_args(args)
+
+    connection = mock_connection()
+    body = generate_updates(parsed.updates)
+
+    results = {}
+    for name, func in [("object", object_path), ("raw", raw_path)]:
+        best = measure(func, connection, body, parsed.repeat)
+        results[name] = best / parsed.updates * 1000000
+        print("{:<8}{:>10.2f} us/update".format(name, results[name]))
+    print("speedup {:>10.2f}x".format(results["object"] / results["raw"]))
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,320 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from typing import Iterable, Iterator, Optional, Dict, Any, Set, List
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.Message import Message
+from bokkichat.connection.Connection import Connection
+from bokkichat.utils.TokenBucket import TokenBucket
+
+
+class BroadcastCampaign:
+    """
+    Class that sends a single message to a large amount of receivers.
+    The message is prepared only once by the connection, which for example
+    allows media to be uploaded only once.
+    Sends are spread over multiple worker threads, limited to the maximum
+    send rate of the connection.
+    The progress is recorded in a checkpoint file, so that an interrupted
+    campaign can be resumed without messaging any receiver twice.
+    Resuming requires the receivers to be provided in the same order.
+    Sends failing with one of the connection's transient errors are
+    retried after a backoff.
+    """
+
+    progress_log_interval = 100
+    """
+    The amount of sends after which the progress is logged
+    """
+
+    def __init__(
+            self,
+            connection: Connection,
+            message: Message,
+            receivers: Iterable[Address],
+            checkpoint_path: Optional[str] = None,
+            total: Optional[int] = None,
+            rate: Optional[float] = None,
+            workers: int = 4,
+            checkpoint_interval: int = 1,
+            max_retries: int = 5,
+            retry_delay: float = 1.0
+    ):
+        """
+        Initializes the campaign. If the checkpoint file exists, the
+        progress stored in it is loaded.
+        :param connection: The connection used to send the message
+        :param message: The message to send
+        :param receivers: The receivers of the message
+        :param checkpoint_path: The path to the checkpoint file
+        :param total: The total amount of receivers, used for the progress
+                      display. Determined automatically if the receivers
+                      support len()
+        :param rate: The maximum amount of messages sent per second.
+                     Defaults to the connection's maximum send rate
+        :param workers: The amount of threads sending messages
+        :param checkpoint_interval: The amount of sends after which the
+                                    checkpoint file is updated. Receivers
+                                    sent to since the last update are
+                                    messaged again when resuming after a
+                                    crash
+        :param max_retries: The maximum amount of retries of a send that
+                            failed with a transient error
+        :param retry_delay: The delay in seconds before the first retry.
+                            Doubles with every retry, unless the error
+                            specifies a retry_after delay
+        """
+        self.connection = connection
+        self.message = message
+        self.receivers = receivers
+        self.checkpoint_path = checkpoint_path
+        self.total = total
+        if total is None and hasattr(receivers, "__len__"):
+            self.total = len(receivers)  # type: ignore
+        self.rate = connection.max_send_rate if rate is None else rate
+        self.workers = workers
+        self.checkpoint_interval = checkpoint_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.position = 0
+        self.sent = 0
+        self.failed = 0
+        self._done = set()  # type: Set[int]
+        self._run_start = None  # type: Optional[float]
+        self._run_offset = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+        if checkpoint_path is not None and os.path.isfile(checkpoint_path):
+            with open(checkpoint_path, "r") as f:
+                checkpoint = json.load(f)
+            self.position = checkpoint["position"]
+            self.sent = checkpoint["sent"]
+            self.failed = checkpoint["failed"]
+            self._done = set(checkpoint["done"])
+
+    @property
+    def completed(self) -> int:
+        """
+        :return: The amount of receivers that were handled
+        """
+        return self.position + len(self._done)
+
+    def progress(self) -> Dict[str, Any]:
+        """
+        Calculates the progress of the campaign
+        :return: A dictionary containing the amount of completed, sent and
+                 failed messages, the total amount of receivers, the
+                 current send rate and the estimated remaining time
+                 in seconds. Values that can't be determined are None.
+        """
+        completed = self.completed
+        rate = None  # type: Optional[float]
+        eta = None  # type: Optional[float]
+
+        if self._run_start is not None:
+            elapsed = time.monotonic() - self._run_start
+            if elapsed > 0:
+                rate = (completed - self._run_offset) / elapsed
+            if rate and self.total is not None:
+                eta = max(self.total - completed, 0) / rate
+
+        return {
+            "completed": completed,
+            "sent": self.sent,
+            "failed": self.failed,
+            "total": self.total,
+            "rate": rate,
+            "eta": eta
+        }
+
+    def run(self):
+        """
+        Sends the message to all receivers that were not handled yet.
+        Blocks until all receivers were handled or the campaign is stopped.
+        :return: None
+        """
+        self._stop_event.clear()
+        self._run_start = time.monotonic()
+        self._run_offset = self.completed
+
+        prepared = self.connection.prepare(self.message)
+        bucket = None if self.rate is None else TokenBucket(self.rate)
+        receivers = iter(enumerate(self.receivers))
+
+        threads = []  # type: List[threading.Thread]
+        for _ in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, args=(prepared, receivers, bucket)
+            )
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+
+        try:
+            for thread in threads:
+                thread.join()
+        finally:
+            self._stop_event.set()
+            # Sends in progress must be recorded in the final checkpoint
+            for thread in threads:
+                thread.join()
+            with self._lock:
+                self.save()
+
+        self.logger.info(self._describe_progress())
+
+    def stop(self):
+        """
+        Stops the campaign after the messages currently being sent
+        :return: None
+        """
+        self._stop_event.set()
+
+    def save(self):
+        """
+        Atomically writes the progress to the checkpoint file
+        :return: None
+        """
+        if self.checkpoint_path is None:
+            return
+
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "w") as f:
+            json.dump({
+                "position": self.position,
+                "done": sorted(self._done),
+                "sent": self.sent,
+                "failed": self.failed
+            }, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _work(
+            self,
+            prepared: Any,
+            receivers: Iterator,
+            bucket: Optional[TokenBucket]
+    ):
+        """
+        Sends the message to receivers until all were handled
+        :param prepared: The prepared message
+        :param receivers: The shared iterator of indexed receivers
+        :param bucket: The rate limiter
+        :return: None
+        """
+        while not self._stop_event.is_set():
+            with self._lock:
+                index, receiver = next(receivers, (None, None))
+                while index is not None \
+                        and (index < self.position or index in self._done):
+                    index, receiver = next(receivers, (None, None))
+            if index is None or receiver is None:
+                return
+
+            success = self._send(prepared, receiver, bucket)
+            if success is None:
+                return
+
+            with self._lock:
+                self._complete(index, success)
+
+    def _send(
+            self,
+            prepared: Any,
+            receiver: Address,
+            bucket: Optional[TokenBucket]
+    ) -> Optional[bool]:
+        """
+        Sends the message to a receiver, retrying transient errors
+        :param prepared: The prepared message
+        :param receiver: The receiver
+        :param bucket: The rate limiter
+        :return: Whether or not the message was sent successfully,
+                 None if the campaign was stopped while waiting for a retry
+        """
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            if bucket is not None:
+                bucket.acquire()
+            try:
+                return self.connection.send_prepared(prepared, receiver)
+            except self.connection.transient_errors as e:
+                if attempt == self.max_retries:
+                    error = e  # type: Exception
+                    break
+                wait = getattr(e, "retry_after", None)
+                wait = delay if wait is None else float(wait)
+                self.logger.warning("Retrying send to {} in {}s: {}".format(
+                    receiver, wait, e
+                ))
+                if self._stop_event.wait(wait):
+                    return None
+                delay *= 2
+            except Exception as e:
+                error = e
+                break
+
+        self.logger.error("Failed to send to {}: {}".format(receiver, error))
+        return False
+
+    def _complete(self, index: int, success: bool):
+        """
+        Records a handled receiver and periodically updates the checkpoint.
+        Must be called while holding the lock.
+        :param index: The index of the receiver
+        :param success: Whether or not the message was sent successfully
+        :return: None
+        """
+        if success:
+            self.sent += 1
+        else:
+            self.failed += 1
+
+        self._done.add(index)
+        while self.position in self._done:
+            self._done.remove(self.position)
+            self.position += 1
+
+        handled = self.sent + self.failed
+        if handled % self.checkpoint_interval == 0:
+            self.save()
+        if handled % self.progress_log_interval == 0:
+            self.logger.info(self._describe_progress())
+
+    def _describe_progress(self) -> str:
+        """
+        :return: A human-readable description of the progress
+        """
+        progress = self.progress()
+        total = "?" if progress["total"] is None else progress["total"]
+        eta = "?" if progress["eta"] is None \
+            else "{:.0f}s".format(progress["eta"])
+        return "Broadcast: {}/{} ({} sent, {} failed), ETA {}".format(
+            progress["completed"], total, progress["sent"],
+            progress["failed"], eta
+        )
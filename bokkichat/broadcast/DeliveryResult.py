@@ -0,0 +1,67 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from typing import List, Tuple, Optional, Any
+from bokkichat.entities.Address import Address
+from bokkichat.connection.Connection import Connection
+from bokkichat.broadcast.DeliveryStatus import DeliveryStatus
+
+
+class DeliveryResult:
+    """
+    Class that models the aggregate outcome of sending a message through
+    multiple connections
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty delivery result.
+        statuses contains the connection, receiver and DeliveryStatus of
+        every target, latencies the time every connection took to send,
+        None if it timed out.
+        """
+        self.statuses = []  # type: List[Tuple[Connection, Address, Any]]
+        self.errors = []  # type: List[Tuple[Connection, BaseException]]
+        self.latencies = []  # type: List[Tuple[Connection, Optional[float]]]
+        self.duration = 0.0
+
+    def __str__(self) -> str:
+        """
+        :return: A string representation of the delivery result
+        """
+        return "{} sent, {} failed, {} timed out in {:.3f}s".format(
+            self.count(DeliveryStatus.SENT),
+            self.count(DeliveryStatus.FAILED),
+            self.count(DeliveryStatus.TIMED_OUT),
+            self.duration
+        )
+
+    @property
+    def succeeded(self) -> bool:
+        """
+        :return: Whether or not the message was sent to every target
+        """
+        return self.count(DeliveryStatus.SENT) == len(self.statuses)
+
+    def count(self, status: DeliveryStatus) -> int:
+        """
+        :param status: The status to count
+        :return: The amount of targets with the status
+        """
+        return len([x for x in self.statuses if x[2] == status])
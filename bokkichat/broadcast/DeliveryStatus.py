@@ -0,0 +1,32 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from enum import Enum
+
+
+class DeliveryStatus(Enum):
+    """
+    Enum that specifies the outcome of sending a message to a receiver
+    SENT: The message was sent successfully
+    FAILED: The connection could not send the message
+    TIMED_OUT: The connection did not finish sending in time
+    """
+    SENT = 1
+    FAILED = 2
+    TIMED_OUT = 3
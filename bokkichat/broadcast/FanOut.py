@@ -0,0 +1,153 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, Future
+from typing import Iterable, Tuple, Dict, Optional, List
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.Message import Message
+from bokkichat.connection.Connection import Connection
+from bokkichat.broadcast.DeliveryResult import DeliveryResult
+from bokkichat.broadcast.DeliveryStatus import DeliveryStatus
+
+
+class FanOut:
+    """
+    Class that sends a message through multiple connections in parallel,
+    for example to deliver an alert via every available chat service.
+    Every connection prepares the message only once and sends it to its
+    receivers in a separate thread, so that the total latency is the one
+    of the slowest connection.
+    Connections that exceed their timeout are reported as timed out. Their
+    sends can't be interrupted and finish in the background. Every call of
+    send uses its own threads, so that these sends don't delay later ones.
+    """
+
+    def __init__(self, timeout: float = 10.0):
+        """
+        Initializes the fan-out sender
+        :param timeout: The default time in seconds a connection may take
+                        to send the message to all of its receivers,
+                        starting once it started sending
+        """
+        self.timeout = timeout
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def send(
+            self,
+            message: Message,
+            targets: Iterable[Tuple[Connection, Address]],
+            timeouts: Optional[Dict[Connection, float]] = None
+    ) -> DeliveryResult:
+        """
+        Sends a message to multiple receivers of multiple connections
+        :param message: The message to send
+        :param targets: The connections and receivers to send to
+        :param timeouts: Timeouts in seconds for individual connections,
+                         overriding the default timeout
+        :return: The outcome of the deliveries
+        """
+        start = time.monotonic()
+        timeouts = {} if timeouts is None else timeouts
+
+        groups = []  # type: List[Tuple[Connection, List[Address]]]
+        for connection, address in targets:
+            for grouped, addresses in groups:
+                if grouped is connection:
+                    addresses.append(address)
+                    break
+            else:
+                groups.append((connection, [address]))
+
+        executor = ThreadPoolExecutor(max_workers=max(len(groups), 1))
+        futures = []
+        for connection, addresses in groups:
+            started = Future()  # type: Future
+            future = executor.submit(
+                self._deliver, connection, message, addresses, started
+            )
+            futures.append((connection, addresses, started, future))
+        executor.shutdown(wait=False)
+
+        result = DeliveryResult()
+        for connection, addresses, started, future in futures:
+            # Every connection has its own thread, so it starts right away
+            deadline = started.result() + \
+                timeouts.get(connection, self.timeout)
+            try:
+                statuses, errors, latency = future.result(
+                    timeout=max(deadline - time.monotonic(), 0)
+                )
+            except TimeoutError:
+                self.logger.warning(
+                    "Sending via {} timed out".format(connection.name())
+                )
+                statuses = [DeliveryStatus.TIMED_OUT] * len(addresses)
+                errors, latency = [], None
+
+            for address, status in zip(addresses, statuses):
+                result.statuses.append((connection, address, status))
+            for error in errors:
+                result.errors.append((connection, error))
+            result.latencies.append((connection, latency))
+
+        result.duration = time.monotonic() - start
+        return result
+
+    def _deliver(
+            self,
+            connection: Connection,
+            message: Message,
+            addresses: List[Address],
+            started: Future
+    ) -> Tuple[List[DeliveryStatus], List[Exception], float]:
+        """
+        Prepares a message and sends it to the receivers of a connection
+        :param connection: The connection
+        :param message: The message
+        :param addresses: The receivers
+        :param started: Future that is set to the time.monotonic() value
+                        at which sending started
+        :return: The statuses of the receivers, the errors that occurred
+                 and the time it took to send the message to all receivers
+        """
+        start = time.monotonic()
+        started.set_result(start)
+        statuses = []  # type: List[DeliveryStatus]
+        errors = []  # type: List[Exception]
+
+        try:
+            prepared = connection.prepare(message)
+        except Exception as e:
+            self.logger.error("Failed to prepare message: {}".format(e))
+            return [DeliveryStatus.FAILED] * len(addresses), [e], \
+                time.monotonic() - start
+
+        for address in addresses:
+            try:
+                sent = connection.send_prepared(prepared, address)
+            except Exception as e:
+                self.logger.error("Failed to send message: {}".format(e))
+                errors.append(e)
+                sent = False
+            statuses.append(
+                DeliveryStatus.SENT if sent else DeliveryStatus.FAILED
+            )
+        return statuses, errors, time.monotonic() - start
@@ -0,0 +1,33 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from enum import Enum
+
+
+class CircuitState(Enum):
+    """
+    Enum that specifies the state of a Supervisor's circuit breaker.
+    CLOSED: The connection works normally
+    OPEN: Too many consecutive failures, the connection is considered down
+    HALF_OPEN: The supervisor is probing whether the connection is back,
+               or restarted it and waits for it to work again
+    """
+    CLOSED = 1
+    OPEN = 2
+    HALF_OPEN = 3
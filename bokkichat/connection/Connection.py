@@ -17,12 +17,24 @@ You should have received a copy of the GNU General Public License
 along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-import time
+import copy
 import logging
-from typing import Callable, List, Type
+import threading
+from collections import deque
+from typing import Callable, List, Type, Optional, Any, Tuple
 from bokkichat.entities.Address import Address
 from bokkichat.entities.message.Message import Message
+from bokkichat.entities.message.TextMessage import TextMessage
 from bokkichat.settings.Settings import Settings
+from bokkichat.connection.Inbox import Inbox
+from bokkichat.connection.MessageFilter import MessageFilter
+from bokkichat.connection.StreamingMessage import StreamingMessage
+from bokkichat.connection.FloodProtection import FloodProtection
+from bokkichat.connection.Supervisor import Supervisor
+from bokkichat.tracing.Tracer import Tracer
+from bokkichat.sessions.SessionStore import SessionStore
+from bokkichat.scheduling.Scheduler import Scheduler
+from bokkichat.utils.MemoryBudget import MemoryBudget
 
 
 class Connection:
@@ -32,6 +44,37 @@ class Connection:
     communications with the chat services.
     """
 
+    max_send_rate = None  # type: Optional[float]
+    """
+    The maximum amount of messages per second the chat service allows,
+    None if there is no known limit
+    """
+
+    supports_editing = False
+    """
+    Whether or not the connection can edit sent text messages using
+    send_editable, edit and delete
+    """
+
+    applies_flood_protection = False
+    """
+    Whether or not receive applies the connection's flood protection
+    itself. Otherwise the connection loop applies it to received messages
+    """
+
+    transient_errors = ()  # type: Tuple[Type[Exception], ...]
+    """
+    Exceptions raised by send_prepared that indicate a temporary problem,
+    for example rate limits or network errors, so that sending again later
+    may succeed
+    """
+
+    stop_timeout = 0.5
+    """
+    The time in seconds a stopping connection loop waits for a pending
+    receive call to finish
+    """
+
     def __init__(self, settings: Settings):
         """
         Initializes the connection, with credentials provided by a
@@ -40,8 +83,20 @@ class Connection:
         """
         self.settings = settings
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.tracer = Tracer()
+        self.message_filter = MessageFilter()
+        self.flood_protection = FloodProtection()
+        self.sessions = SessionStore()
+        self.scheduler = Scheduler(self.send)
+        self.media_budget = MemoryBudget()
+        self.supervisor = None  # type: Optional[Supervisor]
         self.looping = False
-        self.loop_break = False
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._drain = False
+        self._inbox = None  # type: Optional[Inbox]
+        self._producer = None  # type: Optional[threading.Thread]
+        self._unhandled = deque()  # type: deque
 
     @classmethod
     def name(cls) -> str:
@@ -59,6 +114,15 @@ class Connection:
         """
         raise NotImplementedError()
 
+    @property
+    def exhausted(self) -> bool:
+        """
+        :return: Whether or not receive won't return any more messages,
+                 for example because the input ended. The connection loop
+                 stops after handling the received messages in that case
+        """
+        return False
+
     @classmethod
     def settings_cls(cls) -> Type[Settings]:
         """
@@ -76,6 +140,77 @@ class Connection:
         """
         raise NotImplementedError()
 
+    def prepare(self, message: Message) -> Any:
+        """
+        Renders a message for sending it to multiple receivers.
+        Connections that need to convert messages before sending them
+        can override this together with send_prepared to do the
+        conversion only once.
+        :param message: The message to prepare
+        :return: The prepared message
+        """
+        return message
+
+    def send_prepared(self, prepared: Any, receiver: Address) -> bool:
+        """
+        Sends a message generated by prepare to a receiver
+        :param prepared: The prepared message
+        :param receiver: The receiver of the message
+        :return: True if the message was sent successfully, False otherwise
+        """
+        message = copy.copy(prepared)
+        message.receiver = receiver
+        self.send(message)
+        return True
+
+    def send_editable(self, message: TextMessage) -> Any:
+        """
+        Sends a text message that can be edited later on.
+        Only available if the connection supports editing.
+        :param message: The message to send. Its body must fit into
+                        a single message
+        :return: A reference to the sent message that is passed to edit,
+                 None if the message could not be sent
+        """
+        raise NotImplementedError()
+
+    def edit(self, reference: Any, message: TextMessage) -> bool:
+        """
+        Replaces the body of a message sent using send_editable.
+        Only available if the connection supports editing.
+        :param reference: The reference returned by send_editable
+        :param message: The message containing the new body
+        :return: True if the message was edited successfully,
+                 False otherwise
+        """
+        raise NotImplementedError()
+
+    def delete(self, reference: Any, receiver: Address) -> bool:
+        """
+        Deletes a message sent using send_editable.
+        Only available if the connection supports editing.
+        :param reference: The reference returned by send_editable
+        :param receiver: The receiver of the message
+        :return: True if the message was deleted successfully,
+                 False otherwise
+        """
+        raise NotImplementedError()
+
+    def stream(
+            self,
+            receiver: Address,
+            interval: float = 1.0
+    ) -> StreamingMessage:
+        """
+        Starts a text message that is updated over time.
+        If the connection supports editing, the sent message is edited in
+        place, otherwise the text is sent once the message is finished.
+        :param receiver: The receiver of the message
+        :param interval: The minimum time in seconds between edits
+        :return: The streaming message
+        """
+        return StreamingMessage(self, receiver, interval)
+
     def receive(self) -> List[Message]:
         """
         Receives all pending messages.
@@ -83,28 +218,258 @@ class Connection:
         """
         raise NotImplementedError()
 
-    def loop(self, callback: Callable, sleep_time: int = 1):
+    def loop(
+            self,
+            callback: Callable,
+            sleep_time: int = 1,
+            inbox: Optional[Inbox] = None,
+            consumers: int = 1
+    ):
         """
         Starts a loop that periodically checks for new messages, calling
         a provided callback function in the process.
+        Polling happens in a separate producer thread which fills a bounded
+        inbox. Polling pauses while the inbox is full.
+        The callback is called by the consumers, the first of which runs in
+        the calling thread.
+        Messages that were received but not handled when the loop stopped
+        are handled by the next loop. A stopping loop waits at most
+        stop_timeout seconds for a pending receive call, messages received
+        by it afterwards are handled by the next loop as well.
+        Messages rejected by the connection's message filter are skipped,
+        excess messages are throttled by the connection's flood protection.
+        Messages scheduled using the connection's scheduler are sent while
+        the loop is running.
+        If the connection has a supervisor, the loop is restarted by it
+        after errors the supervisor handles.
         :param callback: The callback function to call for each
                          received message.
                          The callback should have the following format:
                              lambda connection, message: do_stuff()
+                         Per-chat state can be kept in connection.sessions
         :param sleep_time: The time to sleep between loops
+        :param inbox: The inbox that buffers received messages.
+                      By default, an inbox with a capacity of 1000 messages
+                      which blocks the producer while it is full is used
+        :param consumers: The amount of threads calling the callback.
+                          If more than one consumer is used, messages may
+                          be handled out of order
         :return: None
         """
+        self._drain = False
+        if self.supervisor is None:
+            self._run_loop(callback, sleep_time, inbox, consumers)
+        else:
+            self.supervisor.run(
+                lambda: self._run_loop(callback, sleep_time, inbox, consumers)
+            )
+
+    def _run_loop(
+            self,
+            callback: Callable,
+            sleep_time: int,
+            inbox: Optional[Inbox],
+            consumers: int
+    ):
+        """
+        Runs the connection loop once, without supervision
+        :param callback: The callback function to call for each
+                         received message
+        :param sleep_time: The time to sleep between loops
+        :param inbox: The inbox that buffers received messages
+        :param consumers: The amount of threads calling the callback
+        :return: None
+        """
+        # Receive calls of a previous loop may still be pending
+        if self._producer is not None:
+            self._producer.join()
+
+        inbox = Inbox() if inbox is None else inbox
+        inbox.reset()
+        stop_event = threading.Event()
+        wake_event = threading.Event()
+        self._inbox = inbox
+        self._stop_event = stop_event
+        self._wake_event = wake_event
         self.looping = True
-        while True:
-            for message in self.receive():
-                callback(self, message)
+        errors = []  # type: List[BaseException]
+
+        producer = self._producer = threading.Thread(
+            target=self._produce,
+            args=(inbox, stop_event, wake_event, sleep_time, errors)
+        )
+        workers = [
+            threading.Thread(
+                target=self._consume,
+                args=(inbox, stop_event, callback, errors)
+            )
+            for _ in range(consumers - 1)
+        ]
+        for thread in [producer] + workers:
+            thread.daemon = True
+            thread.start()
+        self.scheduler.start()
+
+        try:
+            self._consume(inbox, stop_event, callback, errors)
+            for worker in workers:
+                worker.join()
+        finally:
+            self._halt(inbox, stop_event)
+            wake_event.set()
+            producer.join(self.stop_timeout)
+            self.scheduler.stop()
+            # Queued messages are older than the ones the producer kept
+            self._unhandled.extendleft(reversed(inbox.clear()))
+            self._inbox = None
+            self.looping = False
+            self.sessions.flush()
+
+        if len(errors) > 0:
+            raise errors[0]
+
+    def _produce(
+            self,
+            inbox: Inbox,
+            stop_event: threading.Event,
+            wake_event: threading.Event,
+            sleep_time: int,
+            errors: List[BaseException]
+    ):
+        """
+        Periodically receives messages and adds them to the inbox.
+        Messages received after the loop was stopped are kept for the
+        next loop.
+        :param inbox: The inbox to fill
+        :param stop_event: The event that signals the loop to stop
+        :param wake_event: The event that interrupts the sleep between
+                           receive calls
+        :param sleep_time: The time to sleep between receive calls
+        :param errors: List to which raised exceptions are added
+        :return: None
+        """
+        try:
+            while not stop_event.is_set() and not self._drain:
+                inbox.wait_for_space()
+                if stop_event.is_set() or self._drain:
+                    break
+
+                messages = []  # type: List[Message]
+                while self._unhandled:
+                    messages.append(self._unhandled.popleft())
+                with self.tracer.span("loop.receive"):
+                    received = self.receive()
+                if self.supervisor is not None:
+                    self.supervisor.succeeded()
+
+                if not self.applies_flood_protection:
+                    messages += self.flood_protection.release()
+                for message in received:
+                    if not self.message_filter.allows(message):
+                        continue
+                    if self.applies_flood_protection \
+                            or self.flood_protection.admit(
+                                str(message.sender), message
+                            ):
+                        messages.append(message)
+
+                for message in messages:
+                    if not inbox.put(message) and stop_event.is_set():
+                        self._unhandled.append(message)
+
+                if self.exhausted:
+                    self.stop(drain=True)
+                if self._drain:
+                    break
+
+                wake_event.wait(sleep_time)
+
+        except BaseException as e:
+            errors.append(e)
+            self._halt(inbox, stop_event)
+        finally:
+            inbox.finish()
 
-            if self.loop_break:
-                self.loop_break = False
+    def _consume(
+            self,
+            inbox: Inbox,
+            stop_event: threading.Event,
+            callback: Callable,
+            errors: List[BaseException]
+    ):
+        """
+        Calls the callback for messages from the inbox until the loop stops
+        :param inbox: The inbox to take messages from
+        :param stop_event: The event that signals the loop to stop
+        :param callback: The callback to call
+        :param errors: List to which raised exceptions are added
+        :return: None
+        """
+        while not stop_event.is_set():
+            message = inbox.get()
+            if message is None:
                 break
 
-            time.sleep(sleep_time)
-        self.looping = False
+            try:
+                with self.tracer.span("loop.callback"):
+                    callback(self, message)
+            except BaseException as e:
+                errors.append(e)
+                self._halt(inbox, stop_event)
+
+    def stop(self, drain: bool = False):
+        """
+        Stops the connection loop.
+        :param drain: If True, the loop stops polling for new messages,
+                      but finishes handling the messages that were already
+                      received. Otherwise the loop stops immediately.
+                      In both cases, the loop is not restarted by the
+                      supervisor anymore.
+        :return: None
+        """
+        inbox = self._inbox
+        if drain:
+            self._drain = True
+            if inbox is not None:
+                inbox.finish()
+        else:
+            self._stop_event.set()
+            if inbox is not None:
+                inbox.stop()
+        if self.supervisor is not None:
+            self.supervisor.stop()
+        self._wake_event.set()
+
+    @staticmethod
+    def _halt(inbox: Inbox, stop_event: threading.Event):
+        """
+        Stops a specific run of the connection loop
+        :param inbox: The inbox of the loop
+        :param stop_event: The stop event of the loop
+        :return: None
+        """
+        stop_event.set()
+        inbox.stop()
+
+    @property
+    def loop_break(self) -> bool:
+        """
+        Kept for backwards compatibility, use stop() instead
+        :return: Whether or not the loop was told to stop after handling
+                 the current messages
+        """
+        return self._drain
+
+    @loop_break.setter
+    def loop_break(self, value: bool):
+        """
+        Kept for backwards compatibility, use stop() instead.
+        Stops the loop after the current messages have been handled
+        :param value: Whether or not to stop the loop
+        :return: None
+        """
+        if value:
+            self.stop(drain=True)
 
     def close(self):
         """
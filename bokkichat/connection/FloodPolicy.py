@@ -0,0 +1,31 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from enum import Enum
+
+
+class FloodPolicy(Enum):
+    """
+    Enum that specifies what happens to received messages of a sender that
+    exceeded its inbound rate.
+    DROP: The messages are discarded
+    DEFER: The messages are held back until the sender's rate allows them
+    """
+    DROP = 1
+    DEFER = 2
@@ -0,0 +1,174 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import Any, List, Optional, cast
+from bokkichat.connection.FloodPolicy import FloodPolicy
+from bokkichat.utils.TokenBucket import TokenBucket
+
+
+class FloodProtection:
+    """
+    Class that throttles received messages per sender, so that a single
+    chat can't monopolize the handling of received messages.
+    Every sender gets a token bucket. Buckets of senders that were idle
+    for longer than the expiry time are discarded, as are the least
+    recently active ones if there are more than max_senders of them.
+    Connections apply the protection as early as possible, for example
+    before downloading any media. Protection without a rate allows every
+    message.
+    """
+
+    def __init__(
+            self,
+            rate: Optional[float] = None,
+            burst: Optional[float] = None,
+            policy: FloodPolicy = FloodPolicy.DROP,
+            max_senders: int = 10000,
+            expiry: float = 300.0,
+            max_deferred: int = 100
+    ):
+        """
+        Initializes the flood protection
+        :param rate: The amount of messages per second allowed per sender.
+                     Allows all messages if not provided
+        :param burst: The amount of messages a sender may send at once.
+                      Defaults to one second's worth of messages
+        :param policy: What to do with excess messages
+        :param max_senders: The maximum amount of senders to keep track of
+        :param expiry: The time in seconds after which idle senders are
+                       forgotten
+        :param max_deferred: The maximum amount of deferred messages per
+                             sender. Further excess messages are dropped
+        """
+        self.rate = rate
+        self.burst = burst
+        self.policy = policy
+        self.max_senders = max_senders
+        self.expiry = expiry
+        self.max_deferred = max_deferred
+        self.admitted_count = 0
+        self.dropped_count = 0
+        self.deferred_count = 0
+        self._buckets = OrderedDict()  # type: OrderedDict
+        self._deferred = OrderedDict()  # type: OrderedDict
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """
+        :return: The amount of currently deferred messages
+        """
+        with self._lock:
+            return sum([len(x) for x in self._deferred.values()])
+
+    def next_release(self) -> Optional[float]:
+        """
+        Calculates how long it takes until release returns the next
+        deferred message
+        :return: The time in seconds, None if no messages are deferred
+        """
+        with self._lock:
+            waits = [
+                self._bucket(sender).wait_time()
+                for sender in list(self._deferred.keys())
+            ]
+        return min(waits) if len(waits) > 0 else None
+
+    def admit(self, sender: str, item: Any) -> bool:
+        """
+        Checks whether a received message may be handled right away.
+        If not, the message is dropped or deferred according to the policy
+        :param sender: The address of the message's sender
+        :param item: The message, in whatever form the connection needs
+                     to handle it later on
+        :return: True if the message may be handled right away
+        """
+        if self.rate is None:
+            return True
+
+        with self._lock:
+            queued = self._deferred.get(sender)
+            # Deferred messages go first to keep the order of messages
+            if queued is None and self._bucket(sender).try_acquire():
+                self.admitted_count += 1
+                return True
+
+            if self.policy == FloodPolicy.DEFER:
+                if queued is None and len(self._deferred) < self.max_senders:
+                    queued = deque()
+                    self._deferred[sender] = queued
+                if queued is not None and len(queued) < self.max_deferred:
+                    queued.append(item)
+                    self.deferred_count += 1
+                    return False
+
+            self.dropped_count += 1
+            return False
+
+    def release(self) -> List[Any]:
+        """
+        Takes the deferred messages that may now be handled
+        :return: The released messages, in the order they were deferred
+        """
+        released = []
+        with self._lock:
+            for sender in list(self._deferred.keys()):
+                queued = self._deferred[sender]
+                bucket = self._bucket(sender)
+                while len(queued) > 0 and bucket.try_acquire():
+                    released.append(queued.popleft())
+                if len(queued) == 0:
+                    del self._deferred[sender]
+            self.admitted_count += len(released)
+        return released
+
+    def _bucket(self, sender: str) -> TokenBucket:
+        """
+        Retrieves the token bucket of a sender, creating it if necessary.
+        Must be called while holding the lock.
+        :param sender: The address of the sender
+        :return: The token bucket
+        """
+        bucket = self._buckets.get(sender)
+        if bucket is None:
+            self._expire()
+            bucket = TokenBucket(cast(float, self.rate), self.burst)
+            self._buckets[sender] = bucket
+        else:
+            self._buckets.move_to_end(sender)
+        return bucket
+
+    def _expire(self):
+        """
+        Forgets senders that were idle for too long, and the least recently
+        active senders if too many are tracked.
+        Must be called while holding the lock.
+        :return: None
+        """
+        now = time.monotonic()
+        while len(self._buckets) > 0:
+            sender, bucket = next(iter(self._buckets.items()))
+            if len(self._buckets) >= self.max_senders \
+                    or now - bucket.updated > self.expiry:
+                del self._buckets[sender]
+            else:
+                break
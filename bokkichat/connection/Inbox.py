@@ -0,0 +1,188 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import threading
+from collections import deque
+from typing import Optional, Dict, List
+from bokkichat.entities.message.Message import Message
+from bokkichat.connection.OverflowPolicy import OverflowPolicy
+
+
+class Inbox:
+    """
+    Bounded, thread-safe queue that buffers received messages between the
+    polling producer and the consumers of a connection loop.
+    """
+
+    def __init__(
+            self,
+            maxsize: int = 1000,
+            policy: OverflowPolicy = OverflowPolicy.BLOCK,
+            per_chat_limit: int = 10
+    ):
+        """
+        Initializes the inbox
+        :param maxsize: The maximum amount of queued messages
+        :param policy: Specifies what happens if a message arrives while
+                       the inbox is full
+        :param per_chat_limit: The maximum amount of queued messages per
+                               sender. Only applies to the REJECT_PER_CHAT
+                               policy
+        """
+        self.maxsize = maxsize
+        self.policy = policy
+        self.per_chat_limit = per_chat_limit
+        self.dropped_count = 0
+        self.rejected_count = 0
+        self._queue = deque()  # type: deque
+        self._per_chat = {}  # type: Dict[str, int]
+        self._condition = threading.Condition()
+        self._finished = False
+        self._stopped = False
+
+    def __len__(self) -> int:
+        """
+        :return: The amount of queued messages
+        """
+        return len(self._queue)
+
+    @property
+    def full(self) -> bool:
+        """
+        :return: Whether or not the inbox is full
+        """
+        return len(self._queue) >= self.maxsize
+
+    def put(self, message: Message) -> bool:
+        """
+        Adds a message to the inbox, applying the overflow policy.
+        Messages are not added to a stopped inbox.
+        :param message: The message to add
+        :return: True if the message was queued, False otherwise
+        """
+        chat = str(message.sender)
+
+        with self._condition:
+            if self._stopped:
+                return False
+
+            elif self.policy == OverflowPolicy.REJECT_PER_CHAT:
+                if self.full or \
+                        self._per_chat.get(chat, 0) >= self.per_chat_limit:
+                    self.rejected_count += 1
+                    return False
+
+            elif self.policy == OverflowPolicy.DROP_OLDEST:
+                while self.full and self._queue:
+                    self._pop()
+                    self.dropped_count += 1
+
+            else:
+                while self.full and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return False
+
+            self._queue.append(message)
+            self._per_chat[chat] = self._per_chat.get(chat, 0) + 1
+            self._condition.notify_all()
+            return True
+
+    def get(self) -> Optional[Message]:
+        """
+        Removes the oldest message from the inbox.
+        Blocks until a message is available.
+        :return: The message, or None if the inbox was stopped or
+                 finished and no messages are left
+        """
+        with self._condition:
+            while not self._queue \
+                    and not self._finished and not self._stopped:
+                self._condition.wait()
+            if self._stopped or not self._queue:
+                return None
+            message = self._pop()
+            self._condition.notify_all()
+            return message
+
+    def wait_for_space(self):
+        """
+        Blocks while the inbox is full
+        :return: None
+        """
+        with self._condition:
+            while self.full and not self._stopped:
+                self._condition.wait()
+
+    def finish(self):
+        """
+        Marks that no more messages will be added.
+        Consumers still receive the messages that are left.
+        :return: None
+        """
+        with self._condition:
+            self._finished = True
+            self._condition.notify_all()
+
+    def stop(self):
+        """
+        Wakes up all waiting producers and consumers and makes them
+        return immediately
+        :return: None
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def reset(self):
+        """
+        Makes a finished or stopped inbox usable again.
+        Queued messages are kept.
+        :return: None
+        """
+        with self._condition:
+            self._finished = False
+            self._stopped = False
+
+    def clear(self) -> List[Message]:
+        """
+        Removes all queued messages
+        :return: The removed messages
+        """
+        with self._condition:
+            messages = list(self._queue)
+            self._queue.clear()
+            self._per_chat = {}
+            self._condition.notify_all()
+            return messages
+
+    def _pop(self) -> Message:
+        """
+        Removes the oldest message from the queue.
+        Must be called while holding the lock.
+        :return: The removed message
+        """
+        message = self._queue.popleft()
+        chat = str(message.sender)
+        count = self._per_chat[chat] - 1
+        if count > 0:
+            self._per_chat[chat] = count
+        else:
+            del self._per_chat[chat]
+        return message
@@ -0,0 +1,104 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from typing import Iterable, Optional
+from bokkichat.entities.message.Message import Message
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.entities.message.MediaMessage import MediaMessage
+
+
+class MessageFilter:
+    """
+    Class that declares which received messages a connection should pass
+    on to its callbacks.
+    Connections apply the individual checks as early as possible, for
+    example before downloading any media. A filter without any
+    restrictions allows every message.
+    """
+
+    def __init__(
+            self,
+            allowed_chats: Optional[Iterable[str]] = None,
+            kinds: Optional[Iterable[str]] = None,
+            command_prefixes: Optional[Iterable[str]] = None,
+            max_media_size: Optional[int] = None
+    ):
+        """
+        Initializes the filter
+        :param allowed_chats: The addresses of the chats whose messages are
+                              allowed. Allows all chats if not provided
+        :param kinds: The allowed kinds of messages, being 'text' or the
+                      lowercase name of a MediaType ('image', 'audio',
+                      'video'). Allows all kinds if not provided
+        :param command_prefixes: If provided, only text messages starting
+                                 with one of these prefixes are allowed
+        :param max_media_size: The maximum size of media files in bytes
+        """
+        self.allowed_chats = None if allowed_chats is None \
+            else set(allowed_chats)
+        self.kinds = None if kinds is None else set(kinds)
+        self.command_prefixes = None if command_prefixes is None \
+            else tuple(command_prefixes)
+        self.max_media_size = max_media_size
+
+    def allows_chat(self, chat: str) -> bool:
+        """
+        :param chat: The address of a chat
+        :return: Whether or not messages from the chat are allowed
+        """
+        return self.allowed_chats is None or chat in self.allowed_chats
+
+    def allows_kind(self, kind: str) -> bool:
+        """
+        :param kind: The kind of a message
+        :return: Whether or not messages of this kind are allowed
+        """
+        return self.kinds is None or kind in self.kinds
+
+    def allows_text(self, text: str) -> bool:
+        """
+        :param text: The body of a text message
+        :return: Whether or not the text is allowed
+        """
+        return self.command_prefixes is None \
+            or text.startswith(self.command_prefixes)
+
+    def allows_media_size(self, size: Optional[int]) -> bool:
+        """
+        :param size: The size of a media file in bytes, None if unknown
+        :return: Whether or not the media file is allowed
+        """
+        return self.max_media_size is None or size is None \
+            or size <= self.max_media_size
+
+    def allows(self, message: Message) -> bool:
+        """
+        Checks a fully parsed message against all restrictions
+        :param message: The message to check
+        :return: Whether or not the message is allowed
+        """
+        if not self.allows_chat(str(message.sender)):
+            return False
+        elif isinstance(message, TextMessage):
+            return self.allows_kind("text") and self.allows_text(message.body)
+        elif isinstance(message, MediaMessage):
+            return self.allows_kind(message.media_type.name.lower()) \
+                and self.allows_media_size(len(message.data))
+        else:
+            return True
@@ -0,0 +1,34 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from enum import Enum
+
+
+class OverflowPolicy(Enum):
+    """
+    Enum that specifies how an Inbox handles messages that arrive while
+    it is full.
+    BLOCK: The producer waits until there is space in the inbox
+    DROP_OLDEST: The oldest queued message is discarded
+    REJECT_PER_CHAT: The new message is discarded. This also happens if
+                     its sender already has too many messages queued
+    """
+    BLOCK = 1
+    DROP_OLDEST = 2
+    REJECT_PER_CHAT = 3
@@ -0,0 +1,220 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional, Tuple, Any, Dict
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.Message import Message
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.connection.Connection import Connection
+from bokkichat.connection.wrappers.CapturingConnection import \
+    CapturingConnection
+
+
+class ReplyMemoizer:
+    """
+    Class that caches the replies of loop callbacks whose replies only
+    depend on the received command, for example status or help commands.
+    The messages sent by a memoized callback are cached in their prepared
+    form and sent again to later senders of the same command, without
+    calling the callback. While a reply is generated, other senders of the
+    same command wait for it instead of calling the callback as well.
+    Replies are cached per connection.
+    Usage:
+        memoizer = ReplyMemoizer(ttl=30)
+
+        @memoizer
+        def status(connection, message):
+            ...
+    """
+
+    def __init__(
+            self,
+            ttl: float = 60.0,
+            max_entries: int = 1000,
+            key: Optional[Callable[[Message], Optional[Hashable]]] = None
+    ):
+        """
+        Initializes the memoizer
+        :param ttl: The default time in seconds for which replies are cached
+        :param max_entries: The maximum amount of cached replies. The least
+                            recently used replies are evicted first
+        :param key: Generates the cache key of a received message, None if
+                    the reply to the message should not be cached.
+                    Defaults to the normalized command and arguments of
+                    text messages
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.key = self.command_key if key is None else key
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()  # type: OrderedDict
+        self._flights = {}  # type: dict
+        self._capturing = {}  # type: Dict[Connection, CapturingConnection]
+        self._lock = threading.Lock()
+
+    def __call__(self, callback: Callable) -> Callable:
+        """
+        Memoizes a loop callback using the default time to live.
+        Allows the memoizer to be used as a decorator.
+        :param callback: The callback to memoize
+        :return: The memoized callback
+        """
+        return self.memoize(callback)
+
+    @staticmethod
+    def command_key(message: Message) -> Optional[Tuple[str, str]]:
+        """
+        Generates a cache key from the command and arguments of a text
+        message. Commands are case-insensitive, mentions of the bot in the
+        command and repeated whitespace are ignored.
+        :param message: The received message
+        :return: The command and the arguments, None for media messages
+        """
+        if not isinstance(message, TextMessage):
+            return None
+        words = message.body.split()
+        if len(words) == 0:
+            return None
+        command = words[0].split("@", 1)[0].lower()
+        return command, " ".join(words[1:])
+
+    def memoize(
+            self,
+            callback: Callable,
+            ttl: Optional[float] = None
+    ) -> Callable:
+        """
+        Memoizes a loop callback
+        :param callback: The callback to memoize
+        :param ttl: The time in seconds for which replies of this callback
+                    are cached. Defaults to the memoizer's time to live
+        :return: The memoized callback
+        """
+        ttl = self.ttl if ttl is None else ttl
+
+        def memoized(connection: Connection, message: Message):
+            key = self.key(message)
+            if key is None or ttl <= 0:
+                callback(connection, message)
+                return
+            # Prepared replies are only valid for the connection that
+            # prepared them
+            replies = self._reply(callback, ttl, (callback, connection, key),
+                                  connection, message)
+            for prepared, receiver in replies:
+                connection.send_prepared(
+                    prepared, message.sender if receiver is None else receiver
+                )
+
+        return memoized
+
+    def clear(self):
+        """
+        Removes all cached replies
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def _reply(
+            self,
+            callback: Callable,
+            ttl: float,
+            key: Hashable,
+            connection: Connection,
+            message: Message
+    ) -> List[Tuple[Any, Optional[Address]]]:
+        """
+        Retrieves the cached reply to a message, generating it using the
+        callback if necessary
+        :param callback: The callback
+        :param ttl: The time in seconds for which the reply is cached
+        :param key: The cache key of the message
+        :param connection: The connection that received the message
+        :param message: The received message
+        :return: The prepared messages of the reply and their receivers.
+                 A receiver of None stands for the sender of the message
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                elif entry is not None:
+                    del self._entries[key]
+
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = threading.Event()
+                    self._flights[key] = flight
+                    self.misses += 1
+                    break
+                self.coalesced += 1
+
+            # If generating the reply fails, the next waiter tries again
+            flight.wait()
+
+        try:
+            capturing = self._capturing_wrapper(connection)
+            try:
+                callback(capturing, message)
+            finally:
+                captured = capturing.take()
+            replies = [
+                (
+                    connection.prepare(reply),
+                    None if reply.receiver.address == message.sender.address
+                    else reply.receiver
+                )
+                for reply in captured
+            ]
+            with self._lock:
+                self._entries[key] = (time.monotonic() + ttl, replies)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return replies
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.set()
+
+    def _capturing_wrapper(
+            self,
+            connection: Connection
+    ) -> CapturingConnection:
+        """
+        Retrieves the wrapper that captures the replies sent via a
+        connection, creating it on first use
+        :param connection: The connection
+        :return: The capturing wrapper
+        """
+        with self._lock:
+            capturing = self._capturing.get(connection)
+            if capturing is None:
+                capturing = CapturingConnection(connection)
+                self._capturing[connection] = capturing
+            return capturing
@@ -0,0 +1,212 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import threading
+from typing import Any, List, Optional
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+
+
+class StreamingMessage:
+    """
+    Class that models a text message whose content is updated over time,
+    for example to report the progress of a long-running task.
+    If the connection supports editing messages, the sent message is
+    edited in place. Edits are throttled, and unchanged content is not
+    sent again. An update that was throttled is sent once the interval
+    has passed, even if no further updates follow. Text exceeding the
+    maximum message size is continued in additional messages, which are
+    deleted or cleared again if the text shrinks.
+    Otherwise, the text is sent once the message is finished.
+    Updates of finished messages are ignored.
+    Streaming messages are created using Connection.stream.
+    """
+
+    placeholder = "..."
+    """
+    The text that replaces messages which are no longer needed if they
+    can't be deleted
+    """
+
+    def __init__(
+            self,
+            connection: Any,
+            receiver: Address,
+            interval: float = 1.0,
+            max_chars: int = 4096
+    ):
+        """
+        Initializes the streaming message. Nothing is sent until the text
+        is updated.
+        :param connection: The connection used to send the message
+        :param receiver: The receiver of the message
+        :param interval: The minimum time in seconds between edits
+        :param max_chars: The maximum size of a single message
+        """
+        self.connection = connection
+        self.receiver = receiver
+        self.interval = interval
+        self.max_chars = max_chars
+        self.text = ""
+        self.finished = False
+        self.edit_count = 0
+        self.throttled_count = 0
+        self._references = []  # type: List[Any]
+        self._sent = []  # type: List[str]
+        self._last_push = None  # type: Optional[float]
+        self._trailing = None  # type: Optional[threading.Timer]
+        self._lock = threading.Lock()
+
+    def update(self, text: str):
+        """
+        Replaces the text of the message.
+        The sent message is edited unless the last edit was too recent
+        :param text: The new text
+        :return: None
+        """
+        with self._lock:
+            if self.finished:
+                return
+            self.text = text
+            now = time.monotonic()
+            if self._last_push is None \
+                    or now - self._last_push >= self.interval:
+                self._push(now)
+            else:
+                self.throttled_count += 1
+                if self._trailing is None:
+                    delay = self.interval - (now - self._last_push)
+                    self._trailing = threading.Timer(
+                        delay, self._push_trailing
+                    )
+                    self._trailing.daemon = True
+                    self._trailing.start()
+
+    def append(self, text: str):
+        """
+        Appends text to the message
+        :param text: The text to append
+        :return: None
+        """
+        self.update(self.text + text)
+
+    def flush(self):
+        """
+        Sends the current text, regardless of when the last edit happened
+        :return: None
+        """
+        with self._lock:
+            if not self.finished:
+                self._push(time.monotonic())
+
+    def finish(self, text: Optional[str] = None):
+        """
+        Sends the final text of the message. The message may not be
+        updated afterwards.
+        :param text: The final text. Defaults to the current text
+        :return: None
+        """
+        with self._lock:
+            if self.finished:
+                return
+            if text is not None:
+                self.text = text
+            self.finished = True
+            self._cancel_trailing()
+
+            if self.connection.supports_editing:
+                self._push(time.monotonic())
+            elif self.text.strip() != "":
+                self.connection.send(self._message(self.text))
+
+    def _push(self, now: float):
+        """
+        Sends or edits the messages whose content changed.
+        Must be called while holding the lock.
+        :param now: The current time.monotonic() value
+        :return: None
+        """
+        self._cancel_trailing()
+        if not self.connection.supports_editing \
+                or self.text.strip() == "":
+            return
+        self._last_push = now
+
+        chunks = self._message(self.text).split(self.max_chars)
+        for index, chunk in enumerate(chunks):
+            if index < len(self._sent):
+                if self._sent[index] == chunk:
+                    continue
+                if self.connection.edit(
+                        self._references[index], self._message(chunk)
+                ):
+                    self._sent[index] = chunk
+                    self.edit_count += 1
+            else:
+                reference = self.connection.send_editable(
+                    self._message(chunk)
+                )
+                if reference is None:
+                    return
+                self._references.append(reference)
+                self._sent.append(chunk)
+
+        # Messages that are no longer needed after the text shrank are
+        # deleted. Messages that can't be deleted are cleared and reused
+        # once the text grows again
+        for index in reversed(range(len(chunks), len(self._sent))):
+            reference = self._references[index]
+            if self._sent[index] == self.placeholder:
+                continue
+            elif self.connection.delete(reference, self.receiver):
+                del self._references[index]
+                del self._sent[index]
+            elif self.connection.edit(
+                    reference, self._message(self.placeholder)
+            ):
+                self._sent[index] = self.placeholder
+
+    def _push_trailing(self):
+        """
+        Sends the text of a throttled update
+        :return: None
+        """
+        with self._lock:
+            self._trailing = None
+            if not self.finished:
+                self._push(time.monotonic())
+
+    def _cancel_trailing(self):
+        """
+        Cancels the pending send of a throttled update.
+        Must be called while holding the lock.
+        :return: None
+        """
+        if self._trailing is not None:
+            self._trailing.cancel()
+            self._trailing = None
+
+    def _message(self, text: str) -> TextMessage:
+        """
+        Generates a text message to the receiver
+        :param text: The body of the message
+        :return: The message
+        """
+        return TextMessage(self.connection.address, self.receiver, text)
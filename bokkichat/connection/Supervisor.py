@@ -0,0 +1,216 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import random
+import logging
+import threading
+from typing import Callable, Optional, Tuple, Type, Dict, Any
+from bokkichat.connection.CircuitState import CircuitState
+
+
+class Supervisor:
+    """
+    Class that keeps a function running, usually a connection loop.
+    If the function fails with one of the supervised errors, the supervisor
+    waits using an exponential, jittered backoff and probes whether the
+    service is reachable again before restarting the function.
+    Consecutive failures trip a circuit breaker whose state can be queried
+    by callers. Failures are only forgotten once the function reports
+    that it works again using succeeded, a successful probe alone does
+    not close the circuit.
+    """
+
+    def __init__(
+            self,
+            errors: Tuple[Type[BaseException], ...],
+            probe: Optional[Callable[[], Any]] = None,
+            base_delay: float = 0.2,
+            max_delay: float = 60.0,
+            failure_threshold: int = 3,
+            excluded: Tuple[Type[BaseException], ...] = ()
+    ):
+        """
+        Initializes the supervisor
+        :param errors: The errors that cause a reconnect
+        :param probe: A cheap function that raises one of the supervised
+                      errors while the service is unreachable
+        :param base_delay: The delay in seconds before the first retry
+        :param max_delay: The maximum delay in seconds between retries
+        :param failure_threshold: The amount of consecutive failures after
+                                  which the circuit breaker opens
+        :param excluded: Subclasses of the supervised errors that are
+                         raised anyway, since reconnecting does not fix
+                         them
+        """
+        self.errors = errors
+        self.excluded = excluded
+        self.probe = probe
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.state = CircuitState.CLOSED
+        self.running = False
+        self.reconnecting = False
+        self.failures = 0
+        self.total_failures = 0
+        self.last_error = None  # type: Optional[BaseException]
+        self.last_failure = None  # type: Optional[float]
+        self.last_recovery = None  # type: Optional[float]
+
+        self._random = random.Random()
+        self._stop_event = threading.Event()
+
+    @property
+    def healthy(self) -> bool:
+        """
+        :return: Whether or not the circuit breaker is closed and no
+                 reconnect is pending
+        """
+        return self.state == CircuitState.CLOSED and not self.reconnecting
+
+    @property
+    def ready(self) -> bool:
+        """
+        :return: Whether or not the supervised function is running and
+                 healthy
+        """
+        return self.running and self.healthy
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Summarizes the health of the supervised function
+        :return: A dictionary containing the health information
+        """
+        return {
+            "state": self.state.name,
+            "healthy": self.healthy,
+            "ready": self.ready,
+            "reconnecting": self.reconnecting,
+            "consecutive_failures": self.failures,
+            "total_failures": self.total_failures,
+            "last_error": None if self.last_error is None
+            else str(self.last_error),
+            "last_failure": self.last_failure,
+            "last_recovery": self.last_recovery
+        }
+
+    def run(self, target: Callable[[], Any]):
+        """
+        Runs a function until it returns or the supervisor is stopped.
+        Supervised errors cause the function to be restarted once the
+        service is reachable again, any other errors are raised.
+        :param target: The function to run
+        :return: None
+        """
+        self._stop_event.clear()
+        self.running = True
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    target()
+                    return
+                except self.errors as e:
+                    if isinstance(e, self.excluded):
+                        raise
+                    self._fail(e)
+                self._recover()
+        finally:
+            self.running = False
+            self.reconnecting = False
+
+    def succeeded(self):
+        """
+        Reports that the supervised function works, for example because
+        it received updates. Resets the consecutive failures and closes
+        the circuit breaker.
+        :return: None
+        """
+        if not self.reconnecting and self.failures == 0:
+            return
+
+        self.logger.info("Recovered after {} failures".format(
+            self.failures
+        ))
+        self.failures = 0
+        self.reconnecting = False
+        self.state = CircuitState.CLOSED
+        self.last_recovery = time.time()
+
+    def stop(self):
+        """
+        Stops the supervisor. A pending reconnect is cancelled.
+        :return: None
+        """
+        self._stop_event.set()
+
+    def next_delay(self) -> float:
+        """
+        Calculates the delay before the next retry, based on the amount of
+        consecutive failures
+        :return: The delay in seconds
+        """
+        exponent = min(max(self.failures - 1, 0), 32)
+        cap = min(self.max_delay, self.base_delay * 2 ** exponent)
+        return self._random.uniform(cap / 2, cap)
+
+    def _recover(self):
+        """
+        Waits with increasing delays and probes the service until it is
+        reachable again or the supervisor is stopped.
+        A successful probe moves an open circuit breaker to half-open,
+        it is only closed once the restarted function succeeded.
+        :return: None
+        """
+        while True:
+            delay = self.next_delay()
+            self.logger.info("Reconnecting in {:.2f}s".format(delay))
+            if self._stop_event.wait(delay):
+                return
+
+            if self.state == CircuitState.OPEN:
+                self.state = CircuitState.HALF_OPEN
+
+            try:
+                if self.probe is not None:
+                    self.probe()
+            except self.errors as e:
+                self._fail(e)
+                continue
+
+            self.logger.info("Service reachable, restarting")
+            return
+
+    def _fail(self, error: BaseException):
+        """
+        Records a failure and updates the circuit breaker
+        :param error: The error that caused the failure
+        :return: None
+        """
+        self.logger.error("Encountered error: {}".format(error))
+        self.reconnecting = True
+        self.failures += 1
+        self.total_failures += 1
+        self.last_error = error
+        self.last_failure = time.time()
+        if self.failures >= self.failure_threshold \
+                or self.state == CircuitState.HALF_OPEN:
+            self.state = CircuitState.OPEN
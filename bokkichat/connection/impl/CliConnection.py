@@ -17,11 +17,16 @@ You should have received a copy of the GNU General Public License
 along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-from typing import List, Type
+import os
+import sys
+import selectors
+import threading
+from typing import List, Type, Optional, Callable
 from bokkichat.entities.Address import Address
 from bokkichat.entities.message.Message import Message
 from bokkichat.entities.message.TextMessage import TextMessage
 from bokkichat.connection.Connection import Connection
+from bokkichat.connection.Inbox import Inbox
 from bokkichat.settings.impl.CliSettings import CliSettings
 
 
@@ -30,6 +35,46 @@ class CliConnection(Connection):
     Class that implements a CLI connection which can be used in testing
     """
 
+    read_size = 65536
+    """
+    The amount of bytes read from stdin at once
+    """
+
+    max_batch_size = 1048576
+    """
+    The maximum amount of bytes read from stdin during a single receive call
+    """
+
+    def __init__(self, settings: CliSettings):
+        """
+        Initializes the connection, with credentials provided by a
+        Settings object.
+        :param settings: The settings for the connection
+        """
+        super().__init__(settings)
+        self.settings = settings  # type: CliSettings
+        self.eof = False
+        self._read_buffer = b""
+        self._output = []  # type: List[str]
+        self._output_size = 0
+        self._output_lock = threading.Lock()
+
+        self._stdin_fd = None  # type: Optional[int]
+        self._selector = None  # type: Optional[selectors.BaseSelector]
+        try:
+            self._stdin_fd = sys.stdin.fileno()
+        except (AttributeError, ValueError, OSError):
+            # stdin was replaced by an object without a file descriptor
+            return
+
+        try:
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self._stdin_fd, selectors.EVENT_READ)
+        except (ValueError, OSError):
+            # Regular files can't be registered with epoll,
+            # but reading from them never blocks anyway
+            self._selector = None
+
     @classmethod
     def name(cls) -> str:
         """
@@ -47,6 +92,13 @@ class CliConnection(Connection):
         """
         return Address("CLI")
 
+    @property
+    def exhausted(self) -> bool:
+        """
+        :return: Whether or not the input has ended
+        """
+        return self.eof
+
     @classmethod
     def settings_cls(cls) -> Type[CliSettings]:
         """
@@ -55,25 +107,136 @@ class CliConnection(Connection):
         """
         return CliSettings
 
-    # noinspection PyMethodMayBeStatic
     def send(self, message: Message):
         """
-        Prints a "sent" message
+        Prints a "sent" message.
+        If buffered output is enabled, the message is only written once
+        the buffer is full or the connection gets flushed.
         :param message: The message to "send"
         :return: None
         """
-        print(message)
+        if not self.settings.buffered_output:
+            print(message)
+            return
+
+        text = str(message) + "\n"
+        with self._output_lock:
+            self._output.append(text)
+            self._output_size += len(text)
+            full = self._output_size >= self.settings.buffer_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes any buffered output to stdout
+        :return: None
+        """
+        with self._output_lock:
+            if self._output:
+                sys.stdout.write("".join(self._output))
+                self._output = []
+                self._output_size = 0
+            sys.stdout.flush()
+
+    def loop(
+            self,
+            callback: Callable,
+            sleep_time: int = 1,
+            inbox: Optional[Inbox] = None,
+            consumers: int = 1
+    ):
+        """
+        Runs the connection loop, writing any buffered output once it ends.
+        See Connection.loop for details.
+        :param callback: The callback function to call for each
+                         received message
+        :param sleep_time: The time to sleep between loops
+        :param inbox: The inbox that buffers received messages
+        :param consumers: The amount of threads calling the callback
+        :return: None
+        """
+        try:
+            super().loop(callback, sleep_time, inbox, consumers)
+        finally:
+            self.flush()
 
     def receive(self) -> List[Message]:
         """
-        A CLI Connection receives messages by listening to the input
+        A CLI Connection receives messages by listening to the input.
+        Blocks until at least one chunk of input is available, then reads
+        everything that can be read without blocking and turns every
+        complete line into a message.
+        Reaching the end of the input ends the connection loop.
         :return: A list of pending Message objects
         """
-        return [TextMessage(self.address, self.address, input())]
+        self.flush()
+
+        if self.eof:
+            return []
+
+        if self._stdin_fd is None:
+            lines = self._read_line()
+        else:
+            lines = self._read_available(self._stdin_fd)
+
+        return [
+            TextMessage(self.address, self.address, line)
+            for line in lines
+        ]
+
+    def _read_line(self) -> List[str]:
+        """
+        Reads a single line using input().
+        Used if stdin does not provide a file descriptor.
+        :return: The read line, or an empty list if the input has ended
+        """
+        try:
+            return [input()]
+        except EOFError:
+            self.eof = True
+            return []
+
+    def _read_available(self, fd: int) -> List[str]:
+        """
+        Reads all currently available data from stdin.
+        Only the first read may block.
+        :param fd: The file descriptor of stdin
+        :return: The complete lines that were read
+        """
+        chunks = [self._read_buffer]
+        total = 0
+        timeout = None  # type: Optional[float]
+
+        while total < self.max_batch_size:
+            if self._selector is not None \
+                    and not self._selector.select(timeout):
+                break
+
+            chunk = os.read(fd, self.read_size)
+            if not chunk:
+                self.eof = True
+                break
+
+            chunks.append(chunk)
+            total += len(chunk)
+            timeout = 0
+
+        lines = b"".join(chunks).split(b"\n")
+        self._read_buffer = lines.pop()
+        if self.eof and self._read_buffer:
+            lines.append(self._read_buffer)
+            self._read_buffer = b""
+
+        encoding = sys.stdin.encoding or "utf-8"
+        return [line.decode(encoding, "replace") for line in lines]
 
     def close(self):
         """
         Disconnects the Connection.
         :return: None
         """
-        pass
+        self.flush()
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
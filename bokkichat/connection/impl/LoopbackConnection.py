@@ -0,0 +1,184 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import heapq
+import random
+import itertools
+import threading
+from collections import deque
+from typing import List, Type, Tuple, Optional
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.Message import Message
+from bokkichat.connection.Connection import Connection
+from bokkichat.settings.impl.LoopbackSettings import LoopbackSettings
+
+
+class LoopbackConnection(Connection):
+    """
+    Class that implements an in-memory connection.
+    Two loopback connections can be paired, afterwards every message sent
+    by one endpoint can be received by the other one.
+    Messages are handed over by reference without any serialization,
+    which makes this connection useful for load-testing and for
+    deterministic tests of callbacks and the connection loop.
+    """
+
+    def __init__(self, settings: LoopbackSettings):
+        """
+        Initializes the connection, with credentials provided by a
+        Settings object.
+        :param settings: The settings for the connection
+        """
+        super().__init__(settings)
+        self.settings = settings  # type: LoopbackSettings
+        self.peer = None  # type: Optional[LoopbackConnection]
+        self.sent_count = 0
+        self.lost_count = 0
+        self.received_count = 0
+        self._random = random.Random(settings.seed)
+        self._delivered = deque()  # type: deque
+        self._delayed = []  # type: List[Tuple[float, int, Message]]
+        self._delayed_lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        The name of the connection class
+        :return: The connection class name
+        """
+        return "loopback"
+
+    @property
+    def address(self) -> Address:
+        """
+        The address of the endpoint is defined by its settings
+        :return: The entities of the connection
+        """
+        return Address(self.settings.address)
+
+    @classmethod
+    def settings_cls(cls) -> Type[LoopbackSettings]:
+        """
+        The settings class used by this connection
+        :return: The settings class
+        """
+        return LoopbackSettings
+
+    @classmethod
+    def pair(
+            cls,
+            first: LoopbackSettings,
+            second: LoopbackSettings
+    ) -> Tuple["LoopbackConnection", "LoopbackConnection"]:
+        """
+        Generates two connected loopback endpoints
+        :param first: The settings of the first endpoint
+        :param second: The settings of the second endpoint
+        :return: The two endpoints
+        """
+        one = cls(first)
+        two = cls(second)
+        one.peer = two
+        two.peer = one
+        return one, two
+
+    @property
+    def pending(self) -> int:
+        """
+        :return: The amount of messages that were delivered to this
+                 endpoint but not received yet, including delayed ones
+        """
+        return len(self._delivered) + len(self._delayed)
+
+    def send(self, message: Message):
+        """
+        Delivers a message to the peer endpoint, applying the configured
+        loss and latency model.
+        :param message: The message to send
+        :return: None
+        """
+        if self.peer is None:
+            self.logger.warning("Loopback connection has no peer")
+            return
+
+        self.sent_count += 1
+        settings = self.settings
+
+        if settings.loss > 0 and self._random.random() < settings.loss:
+            self.lost_count += 1
+            return
+
+        delay = settings.latency
+        if settings.jitter > 0:
+            delay += self._random.uniform(0, settings.jitter)
+
+        if delay <= 0:
+            self.peer._delivered.append(message)
+        else:
+            self.peer._delay(message, delay)
+
+    def _delay(self, message: Message, delay: float):
+        """
+        Schedules a message for delivery once the delay has passed
+        :param message: The message to deliver
+        :param delay: The delay in seconds
+        :return: None
+        """
+        with self._delayed_lock:
+            heapq.heappush(
+                self._delayed,
+                (time.monotonic() + delay, next(self._sequence), message)
+            )
+
+    def receive(self) -> List[Message]:
+        """
+        Receives all messages that were delivered to this endpoint
+        :return: A list of pending Message objects
+        """
+        messages = []
+        delivered = self._delivered
+
+        try:
+            while True:
+                messages.append(delivered.popleft())
+        except IndexError:
+            pass
+
+        if self._delayed:
+            now = time.monotonic()
+            with self._delayed_lock:
+                while self._delayed and self._delayed[0][0] <= now:
+                    messages.append(heapq.heappop(self._delayed)[2])
+
+        self.received_count += len(messages)
+        return messages
+
+    def close(self):
+        """
+        Disconnects the Connection, discarding any undelivered messages.
+        :return: None
+        """
+        self._delivered.clear()
+        with self._delayed_lock:
+            self._delayed = []
+        if self.peer is not None and self.peer.peer is self:
+            self.peer.peer = None
+        self.peer = None
@@ -0,0 +1,149 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from typing import List, Type, Optional, Tuple
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.Message import Message
+from bokkichat.connection.Connection import Connection
+from bokkichat.recording.Direction import Direction
+from bokkichat.recording.TrafficLog import TrafficLog
+from bokkichat.settings.impl.ReplaySettings import ReplaySettings
+
+
+class ReplayConnection(Connection):
+    """
+    Class that implements a connection which replays the inbound messages
+    of a TrafficLog, either in real time, accelerated or as fast as
+    possible. Sent messages are only counted.
+    Once the log is exhausted, the connection loop ends.
+    For accurate timing, the loop should be started with a sleep time of 0,
+    receive waits for the next message by itself.
+    """
+
+    max_wait = 1.0
+    """
+    The maximum time in seconds a receive call waits for the next message
+    """
+
+    def __init__(self, settings: ReplaySettings):
+        """
+        Initializes the connection, with credentials provided by a
+        Settings object.
+        :param settings: The settings for the connection
+        """
+        super().__init__(settings)
+        self.settings = settings  # type: ReplaySettings
+        self.sent_count = 0
+        self.replayed_count = 0
+        self._entries = (
+            (timestamp, message)
+            for timestamp, direction, message in TrafficLog.read(settings.path)
+            if direction == Direction.INBOUND
+        )
+        self._next = None  # type: Optional[Tuple[float, Message]]
+        self._next = next(self._entries, None)
+        self._started = False
+        self._start = 0.0
+        self._origin = 0.0
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        The name of the connection class
+        :return: The connection class name
+        """
+        return "replay"
+
+    @property
+    def address(self) -> Address:
+        """
+        The address of the replay connection is defined by its settings
+        :return: The entities of the connection
+        """
+        return Address(self.settings.address)
+
+    @classmethod
+    def settings_cls(cls) -> Type[ReplaySettings]:
+        """
+        The settings class used by this connection
+        :return: The settings class
+        """
+        return ReplaySettings
+
+    @property
+    def exhausted(self) -> bool:
+        """
+        :return: Whether or not all messages were replayed
+        """
+        return self._next is None
+
+    def send(self, message: Message):
+        """
+        Counts a sent message
+        :param message: The message to send
+        :return: None
+        """
+        self.sent_count += 1
+
+    def receive(self) -> List[Message]:
+        """
+        Receives all messages that are due according to the replay speed.
+        If no message is due yet, waits for the next one.
+        :return: A list of pending Message objects
+        """
+        messages = []  # type: List[Message]
+        speed = self.settings.speed
+
+        if self._next is not None and not self._started:
+            self._started = True
+            self._start = time.monotonic()
+            self._origin = self._next[0]
+
+        if self._next is not None and speed > 0:
+            wait = self._due(self._next[0]) - time.monotonic()
+            if wait > 0:
+                time.sleep(min(wait, self.max_wait))
+
+        while self._next is not None \
+                and len(messages) < self.settings.batch_size:
+            timestamp, message = self._next
+            if speed > 0 and self._due(timestamp) > time.monotonic():
+                break
+            messages.append(message)
+            self._next = next(self._entries, None)
+
+        self.replayed_count += len(messages)
+        return messages
+
+    def _due(self, timestamp: float) -> float:
+        """
+        Calculates when a logged message is due for replay
+        :param timestamp: The timestamp of the logged message
+        :return: The due time as a time.monotonic() value
+        """
+        return self._start + (timestamp - self._origin) / self.settings.speed
+
+    def close(self):
+        """
+        Stops the replay
+        :return: None
+        """
+        self._entries.close()
+        self._next = None
@@ -17,20 +17,38 @@ You should have received a copy of the GNU General Public License
 along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-import time
+import io
+import json
+import math
 import socket
+from collections import deque
 # noinspection PyPackageRequirements
 import telegram
+# noinspection PyPackageRequirements
+from telegram.utils.request import Request
 import requests
-from typing import List, Dict, Any, Optional, Type, Callable
+from typing import List, Dict, Any, Optional, Type, Callable, Tuple
 from bokkichat.entities.Address import Address
 from bokkichat.entities.message.Message import Message
 from bokkichat.entities.message.TextMessage import TextMessage
 from bokkichat.entities.message.MediaType import MediaType
 from bokkichat.entities.message.MediaMessage import MediaMessage
 from bokkichat.connection.Connection import Connection
+from bokkichat.connection.Supervisor import Supervisor
+from bokkichat.connection.impl.TelegramPreparedMessage import \
+    TelegramPreparedMessage
 from bokkichat.settings.impl.TelegramBotSettings import TelegramBotSettings
-from bokkichat.exceptions import InvalidMessageData, InvalidSettings
+from bokkichat.exceptions import InvalidMessageData, InvalidSettings, \
+    MemoryBudgetExceeded
+from bokkichat.utils.DedupWindow import DedupWindow
+from bokkichat.utils.DiskCache import DiskCache
+
+try:
+    # noinspection PyPackageRequirements
+    import orjson
+    json_loads = orjson.loads  # type: Callable[[Any], Any]
+except ImportError:
+    json_loads = json.loads
 
 
 class TelegramBotConnection(Connection):
@@ -38,6 +56,35 @@ class TelegramBotConnection(Connection):
     Class that implements a Telegram bot connection
     """
 
+    max_send_rate = 30.0
+    """
+    Telegram allows bots to send about 30 messages per second
+    """
+
+    supports_editing = True
+
+    applies_flood_protection = True
+
+    transient_errors = (
+        telegram.error.RetryAfter,
+        telegram.error.NetworkError
+    )  # type: Tuple[Type[Exception], ...]
+
+    connection_pool_size = 8
+    """
+    The amount of HTTP connections the bot keeps open, so that sending
+    from multiple threads doesn't wait for a pending getUpdates call
+    """
+
+    media_keys = {
+        MediaType.AUDIO: "audio",
+        MediaType.VIDEO: "video",
+        MediaType.IMAGE: "photo"
+    }
+    """
+    Maps media types to their parameter names in the Telegram API
+    """
+
     def __init__(self, settings: TelegramBotSettings):
         """
         Initializes the connection, with credentials provided by a
@@ -45,11 +92,30 @@ class TelegramBotConnection(Connection):
         :param settings: The settings for the connection
         """
         super().__init__(settings)
+        self.dedup = DedupWindow(settings.dedup_size, settings.dedup_path)
+        self.media_cache = None  # type: Optional[DiskCache]
+        if settings.media_cache_dir is not None:
+            self.media_cache = DiskCache(
+                settings.media_cache_dir, settings.media_cache_size
+            )
+
         try:
-            self.bot = telegram.Bot(settings.api_key)
+            self.bot = telegram.Bot(
+                settings.api_key,
+                request=Request(con_pool_size=self.connection_pool_size)
+            )
         except telegram.error.InvalidToken:
             raise InvalidSettings()
 
+        # Bad requests are network errors, but retrying doesn't fix them
+        self.supervisor = Supervisor(
+            (telegram.error.NetworkError,),
+            probe=self.bot.get_me,
+            excluded=(telegram.error.BadRequest,)
+        )
+        self.session = requests.Session() if settings.raw_updates else None
+        self._budget_deferred = deque()  # type: deque
+
         try:
             self.update_id = self.bot.get_updates()[0].update_id
         except IndexError:
@@ -88,54 +154,230 @@ class TelegramBotConnection(Connection):
         """
 
         self.logger.info("Sending message to " + message.receiver.address)
+        self.send_prepared(self.prepare(message), message.receiver)
 
-        try:
-            if isinstance(message, TextMessage):
-                for chunk in message.split(4096):
-                    self.bot.send_message(
-                        chat_id=message.receiver.address,
-                        text=self._escape_invalid_characters(chunk),
-                        parse_mode=telegram.ParseMode.MARKDOWN
-                    )
-            elif isinstance(message, MediaMessage):
-                media_map = {
-                    MediaType.AUDIO: ("audio", self.bot.send_audio),
-                    MediaType.VIDEO: ("video", self.bot.send_video),
-                    MediaType.IMAGE: ("photo", self.bot.send_photo)
-                }
-
-                send_func = media_map[message.media_type][1]
-
-                # Write to file TODO: Check if this can be done with bytes
-                with open("/tmp/bokkichat-telegram-temp", "wb") as f:
-                    f.write(message.data)
-
-                tempfile = open("/tmp/bokkichat-telegram-temp", "rb")
-                params = {
-                    "chat_id": message.receiver.address,
-                    media_map[message.media_type][0]: tempfile,
-                    "parse_mode": telegram.ParseMode.MARKDOWN,
-                    "timeout": 30,
-                    "caption": ""
-                }
-                if message.caption is not None:
-                    params["caption"] = self._escape_invalid_characters(
+    def prepare(self, message: Message) -> TelegramPreparedMessage:
+        """
+        Splits and escapes a message, so that it can be sent to
+        multiple receivers without doing so again.
+        :param message: The message to prepare
+        :return: The prepared message
+        """
+        if isinstance(message, TextMessage):
+            with self.tracer.span("send.split"):
+                chunks = message.split(4096)
+            with self.tracer.span("send.escape"):
+                chunks = [
+                    self._escape_invalid_characters(chunk)
+                    for chunk in chunks
+                ]
+            return TelegramPreparedMessage(chunks=chunks)
+
+        elif isinstance(message, MediaMessage):
+            media_key = self.media_keys[message.media_type]
+            caption = ""
+            if message.caption is not None:
+                with self.tracer.span("send.escape"):
+                    caption = self._escape_invalid_characters(
                         message.caption
                     )
+            prepared = TelegramPreparedMessage(
+                media_key=media_key,
+                data=message.data,
+                caption=caption,
+                # Increase timeout for videos
+                timeout=60 if media_key == "video" else 30
+            )
+            # Media received by this bot does not need to be uploaded again
+            if message.reference is not None \
+                    and message.reference[0] == str(self.address):
+                prepared.file_id = message.reference[1]
+            return prepared
 
-                if media_map[message.media_type][0] == "video":
-                    params["timeout"] = 60  # Increase timeout for videos
-
-                try:
-                    send_func(**params)
-                except (socket.timeout, telegram.error.NetworkError):
-                    self.logger.error("Media Sending timed out")
-                tempfile.close()
+        else:
+            raise TypeError("Unsupported message type")
 
+    def send_prepared(
+            self,
+            prepared: TelegramPreparedMessage,
+            receiver: Address
+    ) -> bool:
+        """
+        Sends a prepared message to a receiver.
+        Media is uploaded only once, subsequent sends reuse the
+        uploaded file.
+        :param prepared: The prepared message
+        :param receiver: The receiver of the message
+        :return: True if the message was sent successfully, False otherwise
+        """
+        try:
+            self.deliver(prepared, receiver)
+            return True
         except (telegram.error.Unauthorized, telegram.error.BadRequest):
             self.logger.warning(
-                "Failed to send message to {}".format(message.receiver)
+                "Failed to send message to {}".format(receiver)
             )
+            prepared.delivered.pop(receiver.address, None)
+        except (socket.timeout, telegram.error.NetworkError):
+            if not prepared.is_media:
+                raise
+            self.logger.error("Media Sending timed out")
+        except MemoryBudgetExceeded:
+            self.logger.error("Media memory budget exhausted")
+        return False
+
+    def deliver(self, prepared: TelegramPreparedMessage, receiver: Address):
+        """
+        Sends a prepared message to a receiver.
+        Unlike send_prepared, errors are not handled.
+        Text chunks that were already delivered to the receiver by a
+        previous, failed call are skipped.
+        :param prepared: The prepared message
+        :param receiver: The receiver of the message
+        :return: None
+        :raises: telegram.error.TelegramError if sending fails
+        :raises: MemoryBudgetExceeded if the media memory budget does not
+                 allow uploading the media
+        """
+        if prepared.media_key is None:
+            delivered = prepared.delivered
+            start = delivered.get(receiver.address, 0)
+            for index in range(start, len(prepared.chunks)):
+                self.deliver_chunk(prepared.chunks[index], receiver)
+                delivered[receiver.address] = index + 1
+            delivered.pop(receiver.address, None)
+            return
+
+        send_func = {
+            "audio": self.bot.send_audio,
+            "video": self.bot.send_video,
+            "photo": self.bot.send_photo
+        }[prepared.media_key]
+        params = {
+            "chat_id": receiver.address,
+            "parse_mode": telegram.ParseMode.MARKDOWN,
+            "timeout": prepared.timeout,
+            "caption": prepared.caption
+        }
+
+        # Only the first send uploads the data, concurrent sends wait for it
+        with prepared.upload_lock:
+            if prepared.file_id is None:
+                # Data of received media is reserved until it is collected
+                size = 0 if self.media_budget.is_held(prepared.data) \
+                    else len(prepared.data)
+                if size > 0 and not self.media_budget.acquire(size):
+                    raise MemoryBudgetExceeded()
+                try:
+                    params[prepared.media_key] = io.BytesIO(prepared.data)
+                    with self.tracer.span("send.api"):
+                        sent = send_func(**params)
+                finally:
+                    self.media_budget.release(size)
+                prepared.file_id = self._uploaded_file_id(
+                    sent, prepared.media_key
+                )
+                return
+
+        params[prepared.media_key] = prepared.file_id
+        with self.tracer.span("send.api"):
+            send_func(**params)
+
+    def deliver_chunk(self, chunk: str, receiver: Address):
+        """
+        Sends a single escaped chunk of a prepared text message.
+        Errors are not handled.
+        :param chunk: The chunk to send
+        :param receiver: The receiver of the chunk
+        :return: None
+        :raises: telegram.error.TelegramError if sending fails
+        """
+        with self.tracer.span("send.api"):
+            self.bot.send_message(
+                chat_id=receiver.address,
+                text=chunk,
+                parse_mode=telegram.ParseMode.MARKDOWN
+            )
+
+    def send_editable(self, message: TextMessage) -> Optional[int]:
+        """
+        Sends a text message that can be edited later on
+        :param message: The message to send. Its body must fit into
+                        a single Telegram message
+        :return: The ID of the sent message,
+                 None if the message could not be sent
+        """
+        try:
+            with self.tracer.span("send.api"):
+                sent = self.bot.send_message(
+                    chat_id=message.receiver.address,
+                    text=self._escape_invalid_characters(message.body),
+                    parse_mode=telegram.ParseMode.MARKDOWN
+                )
+            return sent.message_id
+        except telegram.error.TelegramError as e:
+            self.logger.warning("Failed to send message: {}".format(e))
+            return None
+
+    def edit(self, reference: int, message: TextMessage) -> bool:
+        """
+        Replaces the body of a message sent using send_editable
+        :param reference: The ID of the message
+        :param message: The message containing the new body
+        :return: True if the message was edited successfully,
+                 False otherwise
+        """
+        try:
+            with self.tracer.span("send.api"):
+                self.bot.edit_message_text(
+                    text=self._escape_invalid_characters(message.body),
+                    chat_id=message.receiver.address,
+                    message_id=reference,
+                    parse_mode=telegram.ParseMode.MARKDOWN
+                )
+            return True
+        except telegram.error.BadRequest as e:
+            # The rendered text did not change
+            if "not modified" in str(e).lower():
+                return True
+            self.logger.warning("Failed to edit message: {}".format(e))
+        except telegram.error.TelegramError as e:
+            self.logger.warning("Failed to edit message: {}".format(e))
+        return False
+
+    def delete(self, reference: int, receiver: Address) -> bool:
+        """
+        Deletes a message sent using send_editable
+        :param reference: The ID of the message
+        :param receiver: The receiver of the message
+        :return: True if the message was deleted successfully,
+                 False otherwise
+        """
+        try:
+            with self.tracer.span("send.api"):
+                return bool(self.bot.delete_message(
+                    chat_id=receiver.address,
+                    message_id=reference
+                ))
+        except telegram.error.TelegramError as e:
+            self.logger.warning("Failed to delete message: {}".format(e))
+            return False
+
+    @staticmethod
+    def _uploaded_file_id(
+            sent: telegram.Message,
+            media_key: str
+    ) -> Optional[str]:
+        """
+        Retrieves the file ID of uploaded media from the sent message
+        :param sent: The message returned by the Telegram API
+        :param media_key: The API parameter name of the media
+        :return: The file ID, or None if it could not be determined
+        """
+        media = getattr(sent, media_key, None)
+        if isinstance(media, list):
+            media = media[-1] if len(media) > 0 else None
+        return None if media is None else media.file_id
 
     def receive(self) -> List[Message]:
         """
@@ -143,29 +385,71 @@ class TelegramBotConnection(Connection):
         :return: A list of pending Message objects
         """
         messages = []
+        session = self.session
+        raw = session is not None
+        # The flood protection may be shared with other bots, for example
+        # in a pool, so messages are kept together with their bot
+        admitted = []  # type: List[Tuple[TelegramBotConnection, Dict]]
+        # Only wait for new updates until deferred messages may be handled
+        timeout = 10
+        release = self.flood_protection.next_release()
+        if len(self._budget_deferred) > 0:
+            timeout = 1
+        elif release is not None:
+            timeout = min(timeout, max(1, int(math.ceil(release))))
 
         try:
-            for update in self.bot.get_updates(
-                    offset=self.update_id, timeout=10
-            ):
-                self.update_id = update.update_id + 1
+            with self.tracer.span("receive.get_updates"):
+                if session is not None:
+                    updates = self._get_raw_updates(
+                        session, timeout
+                    )  # type: List[Tuple[int, Any]]
+                else:
+                    updates = [
+                        (update.update_id, update.message)
+                        for update in self.bot.get_updates(
+                            offset=self.update_id,
+                            timeout=timeout,
+                            allowed_updates=["message"]
+                        )
+                    ]
+
+            # Deferred messages were received earlier, so they go first
+            admitted += self._budget_deferred
+            self._budget_deferred.clear()
+            admitted += self.flood_protection.release()
+
+            for update_id, message in updates:
+                self.update_id = update_id + 1
+
+                if message is None:
+                    continue
+
+                if raw:
+                    chat_id = message["chat"]["id"]
+                    message_id = message["message_id"]
+                else:
+                    chat_id = message.chat_id
+                    message_id = message.message_id
 
-                if update.message is None:
+                if not self.message_filter.allows_chat(str(chat_id)):
                     continue
 
-                telegram_message = update.message.to_dict()
+                if self._is_duplicate(update_id, chat_id, message_id):
+                    self.logger.debug(
+                        "Dropping duplicate update {}".format(update_id)
+                    )
+                    continue
 
-                try:
-                    generated = self._parse_message(telegram_message)
-                    if generated is None:
-                        continue
-                    self.logger.info(
-                        "Received message from {}".format(generated.sender)
+                telegram_message = message if raw else message.to_dict()
+
+                item = (self, telegram_message)
+                if self.flood_protection.admit(str(chat_id), item):
+                    admitted.append(item)
+                else:
+                    self.logger.debug(
+                        "Throttling update {}".format(update_id)
                     )
-                    self.logger.debug(str(generated))
-                    messages.append(generated)
-                except InvalidMessageData as e:
-                    self.logger.error(str(e))
 
         except telegram.error.Unauthorized:
             # The self.bot.get_update method may cause an
@@ -175,21 +459,123 @@ class TelegramBotConnection(Connection):
         except telegram.error.TimedOut:
             pass
 
+        finally:
+            self.dedup.checkpoint()
+
+        for index, (bot, telegram_message) in enumerate(admitted):
+            try:
+                with self.tracer.span("receive.parse"):
+                    generated = bot._parse_message(telegram_message)
+                if generated is None:
+                    continue
+                self.logger.info(
+                    "Received message from {}".format(generated.sender)
+                )
+                self.logger.debug(str(generated))
+                messages.append(generated)
+            except InvalidMessageData as e:
+                self.logger.error(str(e))
+            except MemoryBudgetExceeded:
+                # Keeps the order of messages by deferring all remaining
+                self.logger.warning("Media memory budget exhausted")
+                self._budget_deferred.extend(admitted[index:])
+                break
+
         return messages
 
+    def _get_raw_updates(
+            self,
+            session: requests.Session,
+            timeout: int = 10
+    ) -> List[Tuple[int, Optional[Dict]]]:
+        """
+        Fetches pending updates directly from the getUpdates API endpoint
+        without converting them into python-telegram-bot objects.
+        If orjson is installed, it is used to decode the response.
+        :param session: The HTTP session to use
+        :param timeout: The long polling timeout in seconds
+        :return: The update IDs and the message data of the updates
+        :raises: telegram.error.TelegramError subclasses analogous to the
+                 ones raised by telegram.Bot.get_updates
+        """
+        url = "{}/getUpdates".format(self.bot.base_url)
+        params = {
+            "offset": self.update_id,
+            "timeout": timeout,
+            "allowed_updates": ["message"]
+        }
+
+        try:
+            resp = session.post(
+                url, json=params, timeout=timeout + 10
+            )
+        except requests.exceptions.Timeout:
+            raise telegram.error.TimedOut()
+        except requests.exceptions.RequestException as e:
+            raise telegram.error.NetworkError(str(e))
+
+        try:
+            data = json_loads(resp.content)
+        except ValueError:
+            raise telegram.error.NetworkError(
+                "Invalid server response ({})".format(resp.status_code)
+            )
+
+        if not data.get("ok"):
+            description = data.get("description", "Unknown error")
+            if resp.status_code in (401, 403):
+                raise telegram.error.Unauthorized(description)
+            elif resp.status_code == 400:
+                raise telegram.error.BadRequest(description)
+            else:
+                raise telegram.error.NetworkError(description)
+
+        return [
+            (update["update_id"], update.get("message"))
+            for update in data["result"]
+        ]
+
+    def _is_duplicate(
+            self,
+            update_id: int,
+            chat_id: int,
+            message_id: int
+    ) -> bool:
+        """
+        Checks if an update was already received before, either with the
+        same update ID or with the same chat and message ID.
+        The IDs are remembered in the de-duplication window afterwards.
+        :param update_id: The ID of the update
+        :param chat_id: The ID of the chat the message was sent in
+        :param message_id: The ID of the message within the chat
+        :return: True if the update is a duplicate, False otherwise
+        """
+        new_update = self.dedup.add(update_id)
+        new_message = self.dedup.add((chat_id, message_id))
+        return not (new_update and new_message)
+
     def _parse_message(self, message_data: Dict[str, Any]) -> \
             Optional[Message]:
         """
         Parses the message data of a Telegram message and generates a
         corresponding Message object.
+        Messages that are rejected by the connection's message filter are
+        discarded before any media is downloaded.
         :param message_data: The telegram message data
-        :return: The generated Message object.
+        :return: The generated Message object,
+                 None if the message was filtered out
         :raises: InvalidMessageData if the parsing failed
+        :raises: MemoryBudgetExceeded if the media memory budget does not
+                 allow downloading the media
         """
         address = Address(str(message_data["chat"]["id"]))
+        message_filter = self.message_filter
 
         if "text" in message_data:
             body = message_data["text"]
+            if not message_filter.allows_kind("text") \
+                    or not message_filter.allows_text(body):
+                return None
             self.logger.debug("Message Body: {}".format(body))
             return TextMessage(address, self.address, body)
 
@@ -204,6 +590,11 @@ class TelegramBotConnection(Connection):
 
                 if media_key in message_data:
 
+                    if not message_filter.allows_kind(
+                            media_type.name.lower()
+                    ):
+                        return None
+
                     self.logger.debug("Media Type: {}".format(media_key))
                     media_info = message_data[media_key]
 
@@ -211,51 +602,75 @@ class TelegramBotConnection(Connection):
                         continue
 
                     if isinstance(media_info, list):
-                        largest = media_info[len(media_info) - 1]
-                        file_id = largest["file_id"]
-                    elif isinstance(media_info, dict):
-                        file_id = media_info["file_id"]
-                    else:
+                        media_info = media_info[len(media_info) - 1]
+                    elif not isinstance(media_info, dict):
                         continue
 
-                    file_info = self.bot.get_file(file_id)
-                    resp = requests.get(file_info["file_path"])
-                    data = resp.content
-
-                    return MediaMessage(
+                    if not message_filter.allows_media_size(
+                            media_info.get("file_size")
+                    ):
+                        return None
+
+                    # Voice messages can't be sent again as audio files
+                    reference = None if media_key == "voice" \
+                        else (str(self.address), media_info["file_id"])
+                    reserved = media_info.get("file_size") or 0
+                    if not self.media_budget.acquire(reserved):
+                        raise MemoryBudgetExceeded()
+                    try:
+                        data = self._download_media(media_info)
+                    finally:
+                        self.media_budget.release(reserved)
+                    self.media_budget.charge(len(data))
+
+                    generated = MediaMessage(
                         address,
                         self.address,
                         media_type,
                         data,
-                        message_data.get("caption", "")
+                        message_data.get("caption", ""),
+                        reference
                     )
+                    self.media_budget.hold(generated, len(data), data)
+                    return generated
 
         raise InvalidMessageData(message_data)
 
-    def close(self):
+    def _download_media(self, media_info: Dict[str, Any]) -> bytes:
         """
-        Disconnects the Connection.
-        :return: None
+        Downloads the file of a media object.
+        If a media cache is configured, files are looked up by their
+        unique file ID first and cached after downloading.
+        :param media_info: The media object, for example a PhotoSize
+        :return: The content of the file
         """
-        pass
+        file_id = media_info["file_id"]
+        # The python-telegram-bot objects don't contain the unique ID,
+        # only raw updates do. Otherwise the file ID is used, which
+        # differs for every bot and may change over time.
+        key = media_info.get("file_unique_id") or file_id
+
+        if self.media_cache is not None:
+            data = self.media_cache.get(key)
+            if data is not None:
+                return data
 
-    def loop(self, callback: Callable, sleep_time: int = 1):
+        with self.tracer.span("receive.download"):
+            file_info = self.bot.get_file(file_id)
+            resp = requests.get(file_info["file_path"])
+
+        if self.media_cache is not None and resp.ok:
+            self.media_cache.put(key, resp.content)
+        return resp.content
+
+    def close(self):
         """
-        Starts a loop that periodically checks for new messages, calling
-        a provided callback function in the process.
-        :param callback: The callback function to call for each
-                         received message.
-                         The callback should have the following format:
-                             lambda connection, message: do_stuff()
-        :param sleep_time: The time to sleep between loops
+        Disconnects the Connection.
         :return: None
         """
-        try:
-            super().loop(callback, sleep_time)
-        except telegram.error.NetworkError:
-            self.logger.error("Encountered Network Error. Trying to reconnect")
-            time.sleep(10)
-            self.loop(callback, sleep_time)
+        self.dedup.save()
+        if self.session is not None:
+            self.session.close()
 
     @staticmethod
     def _escape_invalid_characters(text: str) -> str:
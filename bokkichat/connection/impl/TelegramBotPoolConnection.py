@@ -0,0 +1,403 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import zlib
+import socket
+import threading
+# noinspection PyPackageRequirements
+import telegram
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Type, Dict, Any, Optional, Set, Tuple
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.Message import Message
+from bokkichat.connection.Connection import Connection
+from bokkichat.connection.Supervisor import Supervisor
+from bokkichat.connection.impl.TelegramBotConnection import \
+    TelegramBotConnection
+from bokkichat.connection.impl.TelegramPreparedMessage import \
+    TelegramPreparedMessage
+from bokkichat.settings.impl.TelegramBotPoolSettings import \
+    TelegramBotPoolSettings
+from bokkichat.exceptions import InvalidSettings, MemoryBudgetExceeded
+from bokkichat.utils.TokenBucket import TokenBucket
+
+
+class TelegramBotPoolConnection(Connection):
+    """
+    Class that implements a connection which spreads sent messages over
+    multiple Telegram bots serving the same audience, multiplying the
+    available send rate.
+    Receivers stick to the bot that reached them last. A receiver is only
+    moved to another bot if its bot is rate-limited or invalid, or if the
+    receiver can't be reached by it (for example because the receiver
+    never started that bot).
+    Received messages are collected from all bots, which also teaches the
+    pool which bots a receiver has started.
+    All bots share the pool's media memory budget, message filter and
+    flood protection.
+    """
+
+    applies_flood_protection = True
+
+    transient_errors = TelegramBotConnection.transient_errors
+
+    def __init__(self, settings: TelegramBotPoolSettings):
+        """
+        Initializes the connection, with credentials provided by a
+        Settings object.
+        :param settings: The settings for the connection
+        """
+        super().__init__(settings)
+        self.settings = settings  # type: TelegramBotPoolSettings
+        self.members = []  # type: List[TelegramBotConnection]
+        for index in range(len(settings.api_keys)):
+            try:
+                self.members.append(TelegramBotConnection(
+                    settings.member_settings(index)
+                ))
+            except (InvalidSettings, telegram.error.Unauthorized):
+                self.logger.warning("Skipping invalid bot API key")
+
+        if len(self.members) == 0:
+            raise InvalidSettings()
+
+        for member in self.members:
+            member.media_budget = self.media_budget
+        self._indexes = {
+            member.address.address: index
+            for index, member in enumerate(self.members)
+        }  # type: Dict[str, int]
+        self.supervisor = Supervisor(
+            (telegram.error.NetworkError,),
+            probe=self._probe,
+            excluded=(telegram.error.BadRequest,)
+        )
+
+        rate = TelegramBotConnection.max_send_rate
+        self.max_send_rate = rate * len(self.members)
+        self.buckets = [TokenBucket(rate) for _ in self.members]
+        self.blocked_until = [0.0 for _ in self.members]
+        self.disabled = [False for _ in self.members]
+        self.sent_counts = [0 for _ in self.members]
+        self._affinity = OrderedDict()  # type: OrderedDict
+        self._unreachable = OrderedDict()  # type: OrderedDict
+        self._lock = threading.Lock()
+        self._pollers = ThreadPoolExecutor(max_workers=len(self.members))
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        The name of the connection class
+        :return: The connection class name
+        """
+        return "telegram-bot-pool"
+
+    @property
+    def address(self) -> Address:
+        """
+        The pool uses the address of its first bot
+        :return: The entities of the connection
+        """
+        return self.members[0].address
+
+    @classmethod
+    def settings_cls(cls) -> Type[TelegramBotPoolSettings]:
+        """
+        The settings class used by this connection
+        :return: The settings class
+        """
+        return TelegramBotPoolSettings
+
+    def capacity(self) -> List[Dict[str, Any]]:
+        """
+        Summarizes the state of every bot in the pool
+        :return: A list of dictionaries containing the available send
+                 tokens, the remaining rate-limit time in seconds, whether
+                 or not the bot is disabled and the amount of sent messages
+        """
+        now = time.monotonic()
+        return [
+            {
+                "tokens": self.buckets[index].tokens,
+                "blocked_for": max(self.blocked_until[index] - now, 0.0),
+                "disabled": self.disabled[index],
+                "sent": self.sent_counts[index]
+            }
+            for index in range(len(self.members))
+        ]
+
+    def send(self, message: Message):
+        """
+        Sends a message using one of the bots in the pool
+        :param message: The message to send
+        :return: None
+        """
+        self.logger.info("Sending message to " + message.receiver.address)
+        self.send_prepared(self.prepare(message), message.receiver)
+
+    def prepare(
+            self,
+            message: Message
+    ) -> Tuple[Message, Dict[int, TelegramPreparedMessage]]:
+        """
+        Prepares a message. The message is rendered lazily for each bot,
+        since uploaded media can only be reused by the bot that
+        uploaded it.
+        :param message: The message to prepare
+        :return: The prepared message
+        """
+        return message, {}
+
+    def send_prepared(
+            self,
+            prepared: Tuple[Message, Dict[int, TelegramPreparedMessage]],
+            receiver: Address
+    ) -> bool:
+        """
+        Sends a prepared message, failing over to other bots if necessary
+        :param prepared: The prepared message
+        :param receiver: The receiver of the message
+        :return: True if the message was sent successfully, False otherwise
+        """
+        message, rendered = prepared
+        tried = set()  # type: Set[int]
+        # Text chunks that reached the receiver are not sent again
+        # when failing over
+        sent_chunks = 0
+
+        while True:
+            index = self._select(receiver.address, tried)
+            if index is None:
+                self.logger.warning(
+                    "No bot in the pool can reach {}".format(receiver)
+                )
+                return False
+
+            member = self.members[index]
+            if index not in rendered:
+                rendered[index] = member.prepare(message)
+            member_prepared = rendered[index]
+
+            try:
+                if member_prepared.is_media:
+                    member.deliver(member_prepared, receiver)
+                else:
+                    chunks = member_prepared.chunks
+                    while sent_chunks < len(chunks):
+                        member.deliver_chunk(chunks[sent_chunks], receiver)
+                        sent_chunks += 1
+            except telegram.error.RetryAfter as e:
+                self.logger.info("Bot {} is rate-limited".format(index))
+                with self._lock:
+                    self.blocked_until[index] = \
+                        time.monotonic() + e.retry_after
+                continue
+            except telegram.error.InvalidToken:
+                self._disable(index)
+                continue
+            except telegram.error.Unauthorized as e:
+                if "forbidden" in str(e).lower():
+                    self._mark_unreachable(receiver.address, index)
+                    tried.add(index)
+                else:
+                    self._disable(index)
+                continue
+            except telegram.error.BadRequest as e:
+                if "chat not found" in str(e).lower():
+                    self._mark_unreachable(receiver.address, index)
+                    tried.add(index)
+                    continue
+                self.logger.warning(
+                    "Failed to send message to {}".format(receiver)
+                )
+                return False
+            except (socket.timeout, telegram.error.NetworkError) as e:
+                self.logger.error("Failed to send message: {}".format(e))
+                return False
+            except MemoryBudgetExceeded:
+                self.logger.error("Media memory budget exhausted")
+                return False
+
+            with self._lock:
+                self.sent_counts[index] += 1
+                self._remember(self._affinity, receiver.address, index)
+            return True
+
+    def receive(self) -> List[Message]:
+        """
+        Receives all pending messages of all bots in the pool.
+        The bots are polled concurrently, so that their long polling
+        timeouts overlap.
+        The bots that received messages are remembered as reaching
+        their senders.
+        :return: A list of pending Message objects
+        :raises: telegram.error.NetworkError if no bot could be polled
+        """
+        # The filter and flood protection may have been replaced
+        for member in self.members:
+            member.message_filter = self.message_filter
+            member.flood_protection = self.flood_protection
+
+        polls = [
+            (index, self._pollers.submit(member.receive))
+            for index, member in enumerate(self.members)
+            if not self.disabled[index]
+        ]
+
+        messages = []
+        errors = []
+        for index, poll in polls:
+            try:
+                received = poll.result()
+            except telegram.error.NetworkError as e:
+                self.logger.error("Bot {}: {}".format(index, e))
+                errors.append(e)
+                continue
+
+            with self._lock:
+                for message in received:
+                    # Deferred messages may be released by any bot
+                    owner = self._indexes.get(message.receiver.address, index)
+                    sender = message.sender.address
+                    if sender not in self._affinity:
+                        self._remember(self._affinity, sender, owner)
+                    excluded = self._unreachable.get(sender)
+                    if excluded is not None:
+                        excluded.discard(owner)
+            messages += received
+
+        if len(errors) > 0 and len(errors) == len(polls):
+            raise errors[0]
+        return messages
+
+    def close(self):
+        """
+        Disconnects all bots in the pool.
+        :return: None
+        """
+        self._pollers.shutdown()
+        for member in self.members:
+            member.close()
+
+    def _probe(self):
+        """
+        Checks whether the Telegram API can be reached by any bot
+        :return: None
+        :raises: telegram.error.NetworkError if no bot reaches the API
+        """
+        error = telegram.error.NetworkError("All bots are disabled")
+        for index, member in enumerate(self.members):
+            if self.disabled[index]:
+                continue
+            try:
+                member.bot.get_me()
+                return
+            except telegram.error.NetworkError as e:
+                error = e
+        raise error
+
+    def _select(self, receiver: str, tried: Set[int]) -> Optional[int]:
+        """
+        Selects the bot to send the next message to a receiver with.
+        Bots the receiver is bound to are preferred, otherwise bots are
+        picked by a hash of the receiver's address, skipping bots without
+        send capacity. Waits if all candidate bots are rate-limited.
+        :param receiver: The address of the receiver
+        :param tried: The bots that already failed to reach the receiver
+        :return: The index of the selected bot,
+                 None if no bot can reach the receiver
+        """
+        while True:
+            with self._lock:
+                sticky = self._affinity.get(receiver)
+                excluded = self._unreachable.get(receiver, set())
+                count = len(self.members)
+                start = zlib.crc32(receiver.encode("utf-8")) % count \
+                    if sticky is None else sticky
+                candidates = [
+                    index for index in
+                    [(start + offset) % count for offset in range(count)]
+                    if not self.disabled[index]
+                    and index not in excluded and index not in tried
+                ]
+                if len(candidates) == 0:
+                    return None
+
+                now = time.monotonic()
+                available = [
+                    index for index in candidates
+                    if self.blocked_until[index] <= now
+                ]
+                if len(available) == 0:
+                    wait = min([self.blocked_until[x] for x in candidates])
+                    wait -= now
+
+            if len(available) == 0:
+                time.sleep(wait)
+                continue
+
+            if sticky is not None and sticky == available[0]:
+                self.buckets[sticky].acquire()
+                return sticky
+
+            for index in available:
+                if self.buckets[index].try_acquire():
+                    return index
+            self.buckets[available[0]].acquire()
+            return available[0]
+
+    def _disable(self, index: int):
+        """
+        Disables a bot whose API key is no longer valid
+        :param index: The index of the bot
+        :return: None
+        """
+        self.logger.error("Disabling bot {}: invalid API key".format(index))
+        with self._lock:
+            self.disabled[index] = True
+
+    def _mark_unreachable(self, receiver: str, index: int):
+        """
+        Records that a bot can't reach a receiver
+        :param receiver: The address of the receiver
+        :param index: The index of the bot
+        :return: None
+        """
+        with self._lock:
+            excluded = self._unreachable.get(receiver, set())
+            excluded.add(index)
+            self._remember(self._unreachable, receiver, excluded)
+            if self._affinity.get(receiver) == index:
+                del self._affinity[receiver]
+
+    def _remember(self, mapping: OrderedDict, key: str, value: Any):
+        """
+        Stores a value in a bounded mapping, evicting the least recently
+        stored entries. Must be called while holding the lock.
+        :param mapping: The mapping
+        :param key: The key
+        :param value: The value
+        :return: None
+        """
+        mapping[key] = value
+        mapping.move_to_end(key)
+        while len(mapping) > self.settings.affinity_size:
+            mapping.popitem(last=False)
@@ -0,0 +1,68 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import threading
+from typing import List, Dict, Optional
+
+
+class TelegramPreparedMessage:
+    """
+    Class that holds a message rendered for the Telegram API, so that it
+    can be sent to many receivers without rendering it again.
+    Text messages are stored as escaped chunks. Media messages store their
+    data until they were uploaded once, afterwards the file ID of the
+    upload is reused.
+    If sending a text fails after some of its chunks were delivered,
+    sending it to the same receiver again resumes with the first chunk
+    that was not delivered.
+    """
+
+    def __init__(
+            self,
+            chunks: Optional[List[str]] = None,
+            media_key: Optional[str] = None,
+            data: Optional[bytes] = None,
+            caption: str = "",
+            timeout: int = 30
+    ):
+        """
+        Initializes the prepared message
+        :param chunks: The escaped chunks of a text message
+        :param media_key: The API parameter name of the media,
+                          for example 'photo'
+        :param data: The media data
+        :param caption: The escaped caption of the media
+        :param timeout: The timeout for uploading the media
+        """
+        self.chunks = chunks if chunks is not None else []  # type: List[str]
+        self.media_key = media_key
+        self.data = data if data is not None else b""  # type: bytes
+        self.caption = caption
+        self.timeout = timeout
+        self.file_id = None  # type: Optional[str]
+        self.upload_lock = threading.Lock()
+        # Delivered chunk counts of receivers whose delivery didn't finish
+        self.delivered = {}  # type: Dict[str, int]
+
+    @property
+    def is_media(self) -> bool:
+        """
+        :return: Whether or not the prepared message is a media message
+        """
+        return self.media_key is not None
@@ -0,0 +1,75 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import threading
+from typing import List
+from bokkichat.entities.message.Message import Message
+from bokkichat.connection.Connection import Connection
+from bokkichat.connection.wrappers.ConnectionWrapper import ConnectionWrapper
+
+
+class CapturingConnection(ConnectionWrapper):
+    """
+    Connection wrapper that collects sent messages instead of sending them.
+    Messages are collected per thread, so a single wrapper can be used by
+    multiple threads at once.
+    """
+
+    def __init__(self, connection: Connection):
+        """
+        Initializes the wrapper
+        :param connection: The connection to wrap
+        """
+        super().__init__(connection)
+        self._local = threading.local()
+
+    @property
+    def captured(self) -> List[Message]:
+        """
+        :return: The messages captured in the current thread
+        """
+        captured = getattr(self._local, "captured", None)
+        if captured is None:
+            captured = self._local.captured = []
+        return captured
+
+    def take(self) -> List[Message]:
+        """
+        Removes the messages captured in the current thread
+        :return: The removed messages
+        """
+        captured = self.captured
+        self._local.captured = []
+        return captured
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        The name of the connection class
+        :return: The connection class name
+        """
+        return "capturing"
+
+    def send(self, message: Message):
+        """
+        Captures a message
+        :param message: The message to capture
+        :return: None
+        """
+        self.captured.append(message)
@@ -0,0 +1,267 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.Message import Message
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.connection.Connection import Connection
+from bokkichat.connection.wrappers.ConnectionWrapper import ConnectionWrapper
+
+
+class CoalescingConnection(ConnectionWrapper):
+    """
+    Connection wrapper that buffers text messages per receiver for a short
+    time and merges them into as few messages as possible.
+    The bodies of merged messages are joined line by line, so the merged
+    message is split the same way as the individual messages would have
+    been. Only messages with the same sender and title are merged.
+    A buffer is flushed once it holds max_chars characters, once the
+    window has passed since its first message, when a message that can't
+    be merged with it arrives or when flush is called.
+    Other messages are sent after flushing the buffer of their receiver,
+    so the order of messages per receiver is kept.
+    All messages are sent by a background thread, which retries transient
+    errors of the wrapped connection. Messages that could not be sent are
+    reported by flush.
+    """
+
+    def __init__(
+            self,
+            connection: Connection,
+            window: float = 0.5,
+            max_chars: int = 4096,
+            max_retries: int = 3,
+            retry_delay: float = 1.0
+    ):
+        """
+        Initializes the wrapper
+        :param connection: The connection to wrap
+        :param window: The maximum time in seconds a text message is
+                       buffered
+        :param max_chars: The maximum size of a merged message
+        :param max_retries: The maximum amount of retries per message
+                            after transient errors
+        :param retry_delay: The initial delay in seconds between retries,
+                            doubled after every retry
+        """
+        super().__init__(connection)
+        self.window = window
+        self.max_chars = max_chars
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.buffered_count = 0
+        self.sent_count = 0
+        # Messages that could not be sent since the last flush
+        self.failed = []  # type: List[Tuple[Message, Exception]]
+        self._buffers = {}  # type: Dict[str, List[TextMessage]]
+        self._sizes = {}  # type: Dict[str, int]
+        self._deadlines = {}  # type: Dict[str, float]
+        self._ready = deque()  # type: deque
+        self._sending = 0
+        self._condition = threading.Condition()
+        self._flusher = None  # type: Optional[threading.Thread]
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        The name of the connection class
+        :return: The connection class name
+        """
+        return "coalescing"
+
+    def send(self, message: Message):
+        """
+        Buffers a text message or queues any other message for sending
+        :param message: The message to send
+        :return: None
+        """
+        receiver = message.receiver.address
+
+        with self._condition:
+            self._start_flusher()
+
+            if not isinstance(message, TextMessage):
+                self._release(receiver)
+                self._ready.append(message)
+                self._condition.notify_all()
+                return
+
+            size = len(message.body) + 1
+            buffered = self._buffers.get(receiver)
+            if self._sizes.get(receiver, 0) + size > self.max_chars or \
+                    (buffered is not None
+                     and not self._mergeable(buffered[0], message)):
+                self._release(receiver)
+
+            if receiver not in self._buffers:
+                self._buffers[receiver] = []
+                self._sizes[receiver] = 0
+                self._deadlines[receiver] = time.monotonic() + self.window
+
+            self._buffers[receiver].append(message)
+            self._sizes[receiver] += size
+            self.buffered_count += 1
+            self._condition.notify_all()
+
+    def flush(self, receiver: Optional[Address] = None):
+        """
+        Sends the buffered messages and waits until they were sent
+        :param receiver: If provided, only the buffer of this receiver is
+                         flushed
+        :return: None
+        :raises: The error of the first message that could not be sent
+                 since the last flush
+        """
+        with self._condition:
+            if receiver is None:
+                for address in list(self._buffers):
+                    self._release(address)
+            else:
+                self._release(receiver.address)
+            self._condition.notify_all()
+
+            while self._ready or self._sending > 0:
+                self._condition.wait()
+
+            failed = self.failed
+            self.failed = []
+        if len(failed) > 0:
+            raise failed[0][1]
+
+    def close(self):
+        """
+        Flushes all buffers and disconnects the wrapped connection
+        :return: None
+        :raises: The error of the first message that could not be sent
+        """
+        try:
+            self.flush()
+        finally:
+            self.connection.close()
+
+    @staticmethod
+    def _mergeable(first: TextMessage, second: TextMessage) -> bool:
+        """
+        Checks whether two text messages to the same receiver may be
+        merged
+        :param first: The first message
+        :param second: The second message
+        :return: True if the messages have the same sender and title
+        """
+        return str(first.sender) == str(second.sender) \
+            and first.title == second.title
+
+    def _release(self, receiver: str):
+        """
+        Moves the buffer of a receiver into the send queue.
+        Must be called while holding the lock.
+        :param receiver: The address of the receiver
+        :return: None
+        """
+        messages = self._buffers.pop(receiver, None)
+        if messages is None:
+            return
+        del self._sizes[receiver]
+        del self._deadlines[receiver]
+
+        first = messages[0]
+        if len(messages) == 1:
+            self._ready.append(first)
+        else:
+            body = "\n".join([message.body for message in messages])
+            self._ready.append(
+                TextMessage(first.sender, first.receiver, body, first.title)
+            )
+
+    def _start_flusher(self):
+        """
+        Starts the background thread if it is not running yet.
+        Must be called while holding the lock.
+        :return: None
+        """
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop)
+            self._flusher.daemon = True
+            self._flusher.start()
+
+    def _flush_loop(self):
+        """
+        Sends queued messages and releases expired buffers
+        :return: None
+        """
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    for receiver, deadline in list(self._deadlines.items()):
+                        if deadline <= now:
+                            self._release(receiver)
+
+                    if self._ready:
+                        message = self._ready.popleft()
+                        self._sending += 1
+                        break
+
+                    timeout = None
+                    if self._deadlines:
+                        timeout = min(self._deadlines.values()) - now
+                    self._condition.wait(timeout)
+
+            try:
+                self._deliver(message)
+            finally:
+                with self._condition:
+                    self._sending -= 1
+                    self._condition.notify_all()
+
+    def _deliver(self, message: Message):
+        """
+        Sends a message using the wrapped connection, retrying transient
+        errors. Messages that could not be sent are recorded as failed.
+        :param message: The message to send
+        :return: None
+        """
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.connection.send(message)
+                self.sent_count += 1
+                return
+            except self.transient_errors as e:
+                if attempt == self.max_retries:
+                    error = e  # type: Exception
+                    break
+                wait = getattr(e, "retry_after", None)
+                wait = delay if wait is None else float(wait)
+                self.logger.warning("Retrying send in {}s: {}".format(
+                    wait, e
+                ))
+                time.sleep(wait)
+                delay *= 2
+            except Exception as e:
+                error = e
+                break
+
+        self.logger.error("Failed to send message: {}".format(error))
+        with self._condition:
+            self.failed.append((message, error))
@@ -0,0 +1,115 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from typing import List, Any
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.Message import Message
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.connection.Connection import Connection
+
+
+class ConnectionWrapper(Connection):
+    """
+    Base class for connections that wrap another connection to add
+    functionality to it.
+    All operations are delegated to the wrapped connection.
+    The wrapper shares the session store, the flood protection, the media
+    memory budget and the supervisor of the wrapped connection.
+    The loop is run by the wrapper itself, so that wrapped
+    receive calls pass through the wrapper.
+    """
+
+    def __init__(self, connection: Connection):
+        """
+        Initializes the wrapper
+        :param connection: The connection to wrap
+        """
+        super().__init__(connection.settings)
+        self.connection = connection
+        self.sessions = connection.sessions
+        self.media_budget = connection.media_budget
+        self.flood_protection = connection.flood_protection
+        self.applies_flood_protection = \
+            connection.applies_flood_protection
+        self.supports_editing = connection.supports_editing
+        self.transient_errors = connection.transient_errors
+        self.supervisor = connection.supervisor
+
+    @property
+    def address(self) -> Address:
+        """
+        :return: The address of the wrapped connection
+        """
+        return self.connection.address
+
+    @property
+    def exhausted(self) -> bool:
+        """
+        :return: Whether or not the wrapped connection won't receive any
+                 more messages
+        """
+        return self.connection.exhausted
+
+    def send(self, message: Message):
+        """
+        Sends a message using the wrapped connection
+        :param message: The message to send
+        :return: None
+        """
+        self.connection.send(message)
+
+    def send_editable(self, message: TextMessage) -> Any:
+        """
+        Sends an editable message using the wrapped connection
+        :param message: The message to send
+        :return: A reference to the sent message
+        """
+        return self.connection.send_editable(message)
+
+    def edit(self, reference: Any, message: TextMessage) -> bool:
+        """
+        Edits a message using the wrapped connection
+        :param reference: The reference returned by send_editable
+        :param message: The message containing the new body
+        :return: True if the message was edited successfully
+        """
+        return self.connection.edit(reference, message)
+
+    def delete(self, reference: Any, receiver: Address) -> bool:
+        """
+        Deletes a message using the wrapped connection
+        :param reference: The reference returned by send_editable
+        :param receiver: The receiver of the message
+        :return: True if the message was deleted successfully
+        """
+        return self.connection.delete(reference, receiver)
+
+    def receive(self) -> List[Message]:
+        """
+        Receives all pending messages of the wrapped connection
+        :return: A list of pending Message objects
+        """
+        return self.connection.receive()
+
+    def close(self):
+        """
+        Disconnects the wrapped connection
+        :return: None
+        """
+        self.connection.close()
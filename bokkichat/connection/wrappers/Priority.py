@@ -0,0 +1,32 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from enum import Enum
+
+
+class Priority(Enum):
+    """
+    Enum that specifies the priority classes of outgoing messages
+    INTERACTIVE: Direct replies to users
+    NORMAL: Regular messages
+    BULK: Mass sends like broadcasts
+    """
+    INTERACTIVE = 1
+    NORMAL = 2
+    BULK = 3
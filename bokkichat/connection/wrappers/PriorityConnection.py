@@ -0,0 +1,189 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import threading
+from collections import deque
+from typing import Dict, Optional, List, Deque, Tuple
+from bokkichat.entities.message.Message import Message
+from bokkichat.connection.Connection import Connection
+from bokkichat.connection.wrappers.ConnectionWrapper import ConnectionWrapper
+from bokkichat.connection.wrappers.Priority import Priority
+
+
+class PriorityConnection(ConnectionWrapper):
+    """
+    Connection wrapper that queues outgoing messages by priority class.
+    A scheduler thread serves the classes using smooth weighted round robin,
+    so that interactive replies are not stuck behind bulk sends while bulk
+    sends still make progress.
+    Messages sent with a time to live are shed once they expire without
+    being sent.
+    """
+
+    default_weights = {
+        Priority.INTERACTIVE: 8,
+        Priority.NORMAL: 4,
+        Priority.BULK: 1
+    }
+    """
+    The default share of sends each priority class receives
+    """
+
+    def __init__(
+            self,
+            connection: Connection,
+            weights: Optional[Dict[Priority, int]] = None,
+            workers: int = 1
+    ):
+        """
+        Initializes the wrapper
+        :param connection: The connection to wrap
+        :param weights: The weights of the priority classes
+        :param workers: The amount of scheduler threads. If more than one
+                        is used, messages may be sent out of order
+        """
+        super().__init__(connection)
+        self.weights = dict(self.default_weights)
+        if weights is not None:
+            self.weights.update(weights)
+
+        self.sent_counts = {priority: 0 for priority in Priority}
+        self.shed_counts = {priority: 0 for priority in Priority}
+        self._queues = {
+            priority: deque() for priority in Priority
+        }  # type: Dict[Priority, Deque[Tuple[Message, Optional[float]]]]
+        self._credits = {priority: 0 for priority in Priority}
+        self._sending = 0
+        self._condition = threading.Condition()
+
+        self._workers = []  # type: List[threading.Thread]
+        for _ in range(workers):
+            worker = threading.Thread(target=self._work)
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        The name of the connection class
+        :return: The connection class name
+        """
+        return "priority"
+
+    def send(
+            self,
+            message: Message,
+            priority: Priority = Priority.NORMAL,
+            ttl: Optional[float] = None
+    ):
+        """
+        Queues a message for sending
+        :param message: The message to send
+        :param priority: The priority class of the message
+        :param ttl: The time in seconds after which the message is
+                    discarded if it was not sent yet
+        :return: None
+        """
+        deadline = None if ttl is None else time.monotonic() + ttl
+        with self._condition:
+            self._queues[priority].append((message, deadline))
+            self._condition.notify()
+
+    def pending(self, priority: Optional[Priority] = None) -> int:
+        """
+        :param priority: The priority class to count.
+                         If not provided, all classes are counted
+        :return: The amount of queued messages
+        """
+        if priority is not None:
+            return len(self._queues[priority])
+        return sum([len(queue) for queue in self._queues.values()])
+
+    def flush(self):
+        """
+        Waits until all queued messages were sent or shed
+        :return: None
+        """
+        with self._condition:
+            while self.pending() > 0 or self._sending > 0:
+                self._condition.wait()
+
+    def close(self):
+        """
+        Sends all queued messages and disconnects the wrapped connection
+        :return: None
+        """
+        self.flush()
+        self.connection.close()
+
+    def _next(self) -> Optional[Priority]:
+        """
+        Selects the priority class to serve next using smooth weighted
+        round robin. Must be called while holding the lock.
+        :return: The selected priority class, None if all queues are empty
+        """
+        selected = None
+        total = 0
+        for priority, queue in self._queues.items():
+            if not queue:
+                continue
+            weight = self.weights[priority]
+            total += weight
+            self._credits[priority] += weight
+            if selected is None \
+                    or self._credits[priority] > self._credits[selected]:
+                selected = priority
+
+        if selected is not None:
+            self._credits[selected] -= total
+        return selected
+
+    def _work(self):
+        """
+        Sends queued messages, shedding expired ones
+        :return: None
+        """
+        while True:
+            with self._condition:
+                while True:
+                    priority = self._next()
+                    if priority is None:
+                        self._condition.notify_all()
+                        self._condition.wait()
+                        continue
+
+                    message, deadline = self._queues[priority].popleft()
+                    if deadline is not None and deadline < time.monotonic():
+                        self.shed_counts[priority] += 1
+                        continue
+
+                    self._sending += 1
+                    break
+
+            try:
+                self.connection.send(message)
+                self.sent_counts[priority] += 1
+            except Exception as e:
+                self.logger.error("Failed to send message: {}".format(e))
+            finally:
+                with self._condition:
+                    self._sending -= 1
+                    self._condition.notify_all()
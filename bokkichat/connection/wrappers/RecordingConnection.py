@@ -0,0 +1,76 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from typing import List
+from bokkichat.entities.message.Message import Message
+from bokkichat.connection.Connection import Connection
+from bokkichat.connection.wrappers.ConnectionWrapper import ConnectionWrapper
+from bokkichat.recording.Direction import Direction
+from bokkichat.recording.RecordingSink import RecordingSink
+
+
+class RecordingConnection(ConnectionWrapper):
+    """
+    Connection wrapper that passes every received and sent message
+    to a recording sink, for example a TrafficLog.
+    """
+
+    def __init__(self, connection: Connection, sink: RecordingSink):
+        """
+        Initializes the wrapper
+        :param connection: The connection to wrap
+        :param sink: The sink that records the messages
+        """
+        super().__init__(connection)
+        self.sink = sink
+
+    @classmethod
+    def name(cls) -> str:
+        """
+        The name of the connection class
+        :return: The connection class name
+        """
+        return "recording"
+
+    def send(self, message: Message):
+        """
+        Sends and records a message
+        :param message: The message to send
+        :return: None
+        """
+        self.connection.send(message)
+        self.sink.record(Direction.OUTBOUND, message)
+
+    def receive(self) -> List[Message]:
+        """
+        Receives and records all pending messages
+        :return: A list of pending Message objects
+        """
+        messages = self.connection.receive()
+        for message in messages:
+            self.sink.record(Direction.INBOUND, message)
+        return messages
+
+    def close(self):
+        """
+        Closes the sink and the wrapped connection
+        :return: None
+        """
+        self.sink.close()
+        self.connection.close()
@@ -17,7 +17,8 @@ You should have received a copy of the GNU General Public License
 along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-from typing import Optional
+import base64
+from typing import Optional, Dict, Any, Tuple
 from bokkichat.entities.message.Message import Message
 from bokkichat.entities.Address import Address
 from bokkichat.entities.message.MediaType import MediaType
@@ -35,7 +36,8 @@ class MediaMessage(Message):
             receiver: Address,
             media_type: MediaType,
             data: bytes,
-            caption: Optional[str] = ""
+            caption: Optional[str] = "",
+            reference: Optional[Tuple[str, str]] = None
     ):
         """
         Initializes the TextMessage object
@@ -44,11 +46,16 @@ class MediaMessage(Message):
         :param media_type: The type of the contained media
         :param data: The data of the attached media
         :param caption: The caption attached to the media
+        :param reference: The address of the connection that received the
+                          media and the chat service's ID of the media file.
+                          Allows that connection to send the media again
+                          without uploading the data
         """
         super().__init__(sender, receiver)
         self.media_type = media_type
         self.data = data
         self.caption = caption
+        self.reference = reference
 
     def __str__(self) -> str:
         """
@@ -69,6 +76,8 @@ class MediaMessage(Message):
         :param caption: The caption attached to the media
         :return: The generated reply
         """
+        reference = self.reference \
+            if data is None and media_type is None else None
         if media_type is None:
             media_type = self.media_type
         if data is None:
@@ -76,7 +85,41 @@ class MediaMessage(Message):
         if caption is None:
             caption = self.caption
         return MediaMessage(
-            self.receiver, self.sender, media_type, data, caption
+            self.receiver, self.sender, media_type, data, caption, reference
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the message into a JSON-compatible dictionary.
+        The media data is base64-encoded.
+        :return: The serialized message
+        """
+        return {
+            "type": "media",
+            "sender": self.sender.address,
+            "receiver": self.receiver.address,
+            "media_type": self.media_type.name,
+            "data": base64.b64encode(self.data).decode("ascii"),
+            "caption": self.caption,
+            "reference": None if self.reference is None
+            else list(self.reference)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MediaMessage":
+        """
+        Generates a message from a dictionary created using to_dict
+        :param data: The serialized message
+        :return: The generated message
+        """
+        return cls(
+            Address(data["sender"]),
+            Address(data["receiver"]),
+            MediaType[data["media_type"]],
+            base64.b64decode(data["data"]),
+            data.get("caption", ""),
+            None if data.get("reference") is None
+            else tuple(data["reference"])
         )
 
     @staticmethod
@@ -17,6 +17,7 @@ You should have received a copy of the GNU General Public License
 along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
+from typing import Dict, Any
 from bokkichat.entities.Address import Address
 
 
@@ -60,3 +61,31 @@ class Message:
         :return: Whether or not the message is a media message
         """
         return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the message into a JSON-compatible dictionary
+        :return: The serialized message
+        """
+        raise NotImplementedError()
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "Message":
+        """
+        Generates a message from a dictionary created using to_dict
+        :param data: The serialized message
+        :return: The generated message
+        :raises: InvalidMessageData if the message type is unknown
+        """
+        # Imported here to avoid circular imports
+        from bokkichat.entities.message.TextMessage import TextMessage
+        from bokkichat.entities.message.MediaMessage import MediaMessage
+        from bokkichat.exceptions import InvalidMessageData
+
+        message_type = data.get("type")
+        if message_type == "text":
+            return TextMessage.from_dict(data)
+        elif message_type == "media":
+            return MediaMessage.from_dict(data)
+        else:
+            raise InvalidMessageData(data)
@@ -17,7 +17,7 @@ You should have received a copy of the GNU General Public License
 along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from bokkichat.entities.message.Message import Message
 from bokkichat.entities.Address import Address
 
@@ -69,6 +69,33 @@ class TextMessage(Message):
             title = self.title
         return TextMessage(self.receiver, self.sender, body, title)
 
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the message into a JSON-compatible dictionary
+        :return: The serialized message
+        """
+        return {
+            "type": "text",
+            "sender": self.sender.address,
+            "receiver": self.receiver.address,
+            "body": self.body,
+            "title": self.title
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TextMessage":
+        """
+        Generates a message from a dictionary created using to_dict
+        :param data: The serialized message
+        :return: The generated message
+        """
+        return cls(
+            Address(data["sender"]),
+            Address(data["receiver"]),
+            data["body"],
+            data.get("title", "")
+        )
+
     @staticmethod
     def is_text() -> bool:
         """
@@ -47,3 +47,11 @@ class InvalidSettings(Exception):
     Example: Invalid API key, connection can't be established
     """
     pass
+
+
+class MemoryBudgetExceeded(Exception):
+    """
+    Exception that gets raised when media can't be held in memory because
+    the connection's media memory budget is exhausted
+    """
+    pass
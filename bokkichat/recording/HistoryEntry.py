@@ -0,0 +1,78 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from typing import Optional
+from bokkichat.entities.Address import Address
+from bokkichat.recording.Direction import Direction
+
+
+class HistoryEntry:
+    """
+    Class that models the metadata of a message stored in a HistoryStore
+    """
+
+    __slots__ = (
+        "id", "time", "direction", "chat", "sender", "receiver",
+        "kind", "text", "media_size"
+    )
+
+    def __init__(
+            self,
+            entry_id: int,
+            timestamp: float,
+            direction: Direction,
+            chat: Address,
+            sender: Address,
+            receiver: Address,
+            kind: str,
+            text: str,
+            media_size: Optional[int]
+    ):
+        """
+        Initializes the history entry
+        :param entry_id: The ID of the entry. IDs increase over time
+        :param timestamp: The UNIX timestamp at which the message was
+                          recorded
+        :param direction: Whether the message was received or sent
+        :param chat: The address of the other party of the conversation
+        :param sender: The sender of the message
+        :param receiver: The receiver of the message
+        :param kind: The kind of the message, being 'text' or the
+                     lowercase name of a MediaType
+        :param text: The body or caption of the message
+        :param media_size: The size of the media in bytes,
+                           None for text messages
+        """
+        self.id = entry_id
+        self.time = timestamp
+        self.direction = direction
+        self.chat = chat
+        self.sender = sender
+        self.receiver = receiver
+        self.kind = kind
+        self.text = text
+        self.media_size = media_size
+
+    def __str__(self) -> str:
+        """
+        :return: A string representation of the history entry
+        """
+        return "{} {} {}: {}".format(
+            self.direction.value, self.chat, self.kind, self.text
+        )
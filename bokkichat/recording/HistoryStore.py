@@ -0,0 +1,300 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import sqlite3
+import logging
+import threading
+from typing import List, Optional, Tuple, Any
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.Message import Message
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.entities.message.MediaMessage import MediaMessage
+from bokkichat.recording.Direction import Direction
+from bokkichat.recording.HistoryEntry import HistoryEntry
+from bokkichat.recording.RecordingSink import RecordingSink
+
+
+class HistoryStore(RecordingSink):
+    """
+    Recording sink that stores the metadata of received and sent text and
+    media messages in an SQLite database, allowing handlers to look up
+    recent messages of a chat or to search past messages.
+    Media data itself is not stored.
+    Entries are indexed by chat and time. Bodies and captions are indexed
+    using FTS5 if the SQLite library supports it, otherwise searches fall
+    back to scanning the entries.
+    Recorded messages are written in batches by a background thread.
+    Usage:
+        connection = RecordingConnection(connection, HistoryStore(path))
+        connection.sink.last(message.sender)
+    """
+
+    def __init__(
+            self,
+            path: str,
+            flush_interval: float = 1.0,
+            batch_size: int = 1000
+    ):
+        """
+        Opens the database, creating it if it does not exist yet
+        :param path: The path to the SQLite database
+        :param flush_interval: The time in seconds between writes to the
+                               database
+        :param batch_size: The amount of recorded messages that causes an
+                           early write to the database
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._pending = []  # type: List[Tuple]
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                "id INTEGER PRIMARY KEY, "
+                "time REAL NOT NULL, "
+                "direction TEXT NOT NULL, "
+                "chat TEXT NOT NULL, "
+                "sender TEXT NOT NULL, "
+                "receiver TEXT NOT NULL, "
+                "kind TEXT NOT NULL, "
+                "text TEXT NOT NULL, "
+                "media_size INTEGER)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS history_chat_time "
+                "ON history (chat, time)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS history_time ON history (time)"
+            )
+        try:
+            with self._db:
+                self._db.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS history_fts "
+                    "USING fts5(text, content='history', content_rowid='id')"
+                )
+            self.full_text = True
+        except sqlite3.OperationalError:
+            self.logger.warning("FTS5 not available, searches are slow")
+            self.full_text = False
+
+        self._flusher = threading.Thread(target=self._flush_periodically)
+        self._flusher.daemon = True
+        self._flusher.start()
+
+    def record(self, direction: Direction, message: Message):
+        """
+        Schedules the metadata of a text or media message to be stored.
+        Other messages are ignored.
+        :param direction: Whether the message was received or sent
+        :param message: The message to record
+        :return: None
+        """
+        if isinstance(message, TextMessage):
+            kind, text, size = "text", message.body, None
+        elif isinstance(message, MediaMessage):
+            kind = message.media_type.name.lower()
+            text, size = message.caption or "", len(message.data)
+        else:
+            return
+
+        chat = message.sender if direction == Direction.INBOUND \
+            else message.receiver
+        row = (
+            time.time(), direction.value, str(chat),
+            str(message.sender), str(message.receiver), kind, text, size
+        )
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+    def flush(self):
+        """
+        Writes all recorded messages to the database.
+        If the database can not be written to, the messages are kept and
+        written by the next flush. If only some messages are rejected by
+        the database, the others are written one by one.
+        :return: None
+        """
+        with self._db_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if len(pending) == 0:
+                return
+
+            try:
+                self._insert(pending)
+            except sqlite3.IntegrityError:
+                for row in pending:
+                    try:
+                        self._insert([row])
+                    except sqlite3.IntegrityError as e:
+                        self.logger.error(
+                            "Dropping history entry {}: {}".format(row, e)
+                        )
+            except sqlite3.Error:
+                with self._lock:
+                    self._pending[:0] = pending
+                raise
+
+    def _insert(self, rows: List[Tuple]):
+        """
+        Writes rows to the history table and its full text index in a
+        single transaction
+        :param rows: The rows to write
+        :return: None
+        """
+        with self._db:
+            last_id = self._db.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM history"
+            ).fetchone()[0]
+            self._db.executemany(
+                "INSERT INTO history (time, direction, chat, sender, "
+                "receiver, kind, text, media_size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            if self.full_text:
+                self._db.execute(
+                    "INSERT INTO history_fts (rowid, text) "
+                    "SELECT id, text FROM history WHERE id > ?",
+                    (last_id,)
+                )
+
+    def close(self):
+        """
+        Writes all recorded messages to the database and closes it
+        :return: None
+        """
+        self._stopped.set()
+        self._wake.set()
+        self._flusher.join()
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+    def last(
+            self,
+            chat: Address,
+            limit: int = 20,
+            before: Optional[float] = None
+    ) -> List[HistoryEntry]:
+        """
+        Retrieves the most recent messages of a chat
+        :param chat: The address of the chat
+        :param limit: The maximum amount of messages to retrieve
+        :param before: If provided, only messages recorded before this
+                       UNIX timestamp are retrieved
+        :return: The messages, oldest first
+        """
+        query = "SELECT * FROM history WHERE chat = ?"
+        params = [str(chat)]  # type: List[Any]
+        if before is not None:
+            query += " AND time < ?"
+            params.append(before)
+        query += " ORDER BY time DESC LIMIT ?"
+        params.append(limit)
+        return list(reversed(self._query(query, params)))
+
+    def search(
+            self,
+            text: str,
+            chat: Optional[Address] = None,
+            limit: int = 20
+    ) -> List[HistoryEntry]:
+        """
+        Searches for messages whose body or caption contains all words of
+        a text
+        :param text: The text to search for
+        :param chat: If provided, only messages of this chat are searched
+        :param limit: The maximum amount of messages to retrieve
+        :return: The matching messages, newest first
+        """
+        words = text.split()
+        if len(words) == 0:
+            return []
+
+        params = []  # type: List[Any]
+        if self.full_text:
+            query = "SELECT history.* FROM history_fts " \
+                    "JOIN history ON history.id = history_fts.rowid " \
+                    "WHERE history_fts MATCH ?"
+            params.append(" ".join([
+                "\"" + word.replace("\"", "\"\"") + "\"" for word in words
+            ]))
+        else:
+            query = "SELECT * FROM history WHERE " + " AND ".join(
+                ["text LIKE ? ESCAPE '\\'"] * len(words)
+            )
+            params += [
+                "%" + word.replace("\\", "\\\\").replace("%", "\\%")
+                .replace("_", "\\_") + "%"
+                for word in words
+            ]
+
+        if chat is not None:
+            query += " AND history.chat = ?"
+            params.append(str(chat))
+        query += " ORDER BY history.id DESC LIMIT ?"
+        params.append(limit)
+        return self._query(query, params)
+
+    def _query(self, query: str, params: List[Any]) -> List[HistoryEntry]:
+        """
+        Runs a query on the history table.
+        Recorded messages are written to the database beforehand.
+        :param query: The query, which selects all columns of the table
+        :param params: The parameters of the query
+        :return: The resulting history entries
+        """
+        self.flush()
+        with self._db_lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [
+            HistoryEntry(
+                row[0], row[1], Direction(row[2]), Address(row[3]),
+                Address(row[4]), Address(row[5]), row[6], row[7], row[8]
+            )
+            for row in rows
+        ]
+
+    def _flush_periodically(self):
+        """
+        Writes recorded messages to the database until the store is closed
+        :return: None
+        """
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                self.logger.error("Failed to store history: {}".format(e))
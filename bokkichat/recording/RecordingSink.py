@@ -0,0 +1,44 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from bokkichat.entities.message.Message import Message
+from bokkichat.recording.Direction import Direction
+
+
+class RecordingSink:
+    """
+    Class that defines methods a sink for recorded messages must implement.
+    Sinks are fed by a RecordingConnection.
+    """
+
+    def record(self, direction: Direction, message: Message):
+        """
+        Records a message
+        :param direction: Whether the message was received or sent
+        :param message: The message to record
+        :return: None
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Flushes and closes the sink
+        :return: None
+        """
+        raise NotImplementedError()
@@ -0,0 +1,84 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import json
+import time
+import threading
+from typing import Iterator, Tuple
+from bokkichat.entities.message.Message import Message
+from bokkichat.recording.Direction import Direction
+from bokkichat.recording.RecordingSink import RecordingSink
+
+
+class TrafficLog(RecordingSink):
+    """
+    Append-only log of received and sent messages.
+    Every entry is stored as a single line of compact JSON containing
+    the timestamp, the direction and the serialized message.
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens the log file. Existing logs are appended to.
+        :param path: The path to the log file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a")
+
+    def record(self, direction: Direction, message: Message):
+        """
+        Appends a message to the log
+        :param direction: Whether the message was received or sent
+        :param message: The message to record
+        :return: None
+        """
+        line = json.dumps(
+            {"t": time.time(), "d": direction.value, "m": message.to_dict()},
+            separators=(",", ":")
+        )
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        """
+        Closes the log file
+        :return: None
+        """
+        with self._lock:
+            self._file.close()
+
+    @staticmethod
+    def read(path: str) -> Iterator[Tuple[float, Direction, Message]]:
+        """
+        Reads the entries of a log file
+        :param path: The path to the log file
+        :return: A generator of timestamp, direction and message tuples
+        """
+        with open(path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                yield (
+                    entry["t"],
+                    Direction(entry["d"]),
+                    Message.from_dict(entry["m"])
+                )
@@ -0,0 +1,244 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import copy
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Hashable
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.Message import Message
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.entities.message.MediaMessage import MediaMessage
+from bokkichat.connection.Connection import Connection
+from bokkichat.relay.Route import Route
+
+
+class Relay:
+    """
+    Class that bridges chats across connections.
+    Messages received by a source connection are forwarded according to a
+    routing table. Media received by a Telegram bot and relayed through the
+    same bot is sent by its file ID instead of being uploaded again.
+    To prevent relay loops, relayed messages are marked by appending an
+    invisible marker to their text or caption, and marked messages are
+    not relayed again. Messages that arrive in a chat shortly after the
+    relay forwarded the same content to it are not relayed either, in
+    case the marker was removed on the way.
+    """
+
+    def __init__(
+            self,
+            loop_window: float = 60.0,
+            loop_size: int = 10000,
+            marker: str = "\u2063"
+    ):
+        """
+        Initializes the relay
+        :param loop_window: The time in seconds for which forwarded content
+                            is remembered for loop protection
+        :param loop_size: The maximum amount of forwarded contents to
+                          remember for loop protection
+        :param marker: The text appended to relayed messages.
+                       Defaults to an invisible separator character.
+                       An empty marker disables marking messages
+        """
+        self.routes = []  # type: List[Route]
+        self.loop_window = loop_window
+        self.loop_size = loop_size
+        self.marker = marker
+        self.looped_count = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._forwarded = OrderedDict()  # type: OrderedDict
+        self._lock = threading.Lock()
+        self._threads = []  # type: List[threading.Thread]
+
+    def add_route(
+            self,
+            source: Connection,
+            destination: Connection,
+            destination_address: Address,
+            source_address: Optional[Address] = None
+    ) -> Route:
+        """
+        Adds a route to the routing table
+        :param source: The connection whose messages are relayed
+        :param destination: The connection the messages are relayed to
+        :param destination_address: The address the messages are sent to
+        :param source_address: If provided, only messages from this
+                               address are relayed
+        :return: The route
+        """
+        route = Route(source, destination, destination_address, source_address)
+        self.routes.append(route)
+        return route
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        """
+        :return: The throughput metrics of all routes
+        """
+        return [route.metrics() for route in self.routes]
+
+    def handle(self, connection: Connection, message: Message):
+        """
+        Relays a received message.
+        Can be used as the callback of a connection's loop.
+        :param connection: The connection that received the message
+        :param message: The received message
+        :return: None
+        """
+        fingerprint = self._fingerprint(message)
+        if fingerprint is None:
+            return
+        if self._is_marked(message) \
+                or self._is_looped(message.sender, fingerprint):
+            with self._lock:
+                self.looped_count += 1
+            self.logger.debug("Not relaying looped message")
+            return
+
+        for route in self.routes:
+            if route.matches(connection, message.sender):
+                self._forward(route, message, fingerprint)
+
+    def start(self, sleep_time: int = 1):
+        """
+        Starts the loops of all source connections in separate threads
+        :param sleep_time: The time to sleep between receiving messages
+        :return: None
+        """
+        sources = []  # type: List[Connection]
+        for route in self.routes:
+            if not any([route.source is x for x in sources]):
+                sources.append(route.source)
+
+        for source in sources:
+            thread = threading.Thread(
+                target=source.loop, args=(self.handle, sleep_time)
+            )
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """
+        Stops the loops of all source connections
+        :return: None
+        """
+        for route in self.routes:
+            route.source.stop()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _forward(self, route: Route, message: Message, fingerprint: Hashable):
+        """
+        Forwards a message along a route
+        :param route: The route
+        :param message: The message to forward
+        :param fingerprint: The fingerprint of the message's content
+        :return: None
+        """
+        destination = route.destination
+        forwarded = copy.copy(message)
+        forwarded.sender = destination.address
+        forwarded.receiver = route.destination_address
+        if isinstance(forwarded, TextMessage):
+            forwarded.body += self.marker
+        elif isinstance(forwarded, MediaMessage):
+            forwarded.caption = (forwarded.caption or "") + self.marker
+
+        prepared = destination.prepare(forwarded)
+        # Remembered before sending, the message may arrive immediately
+        self._remember(route.destination_address, fingerprint)
+        if not destination.send_prepared(prepared, route.destination_address):
+            route.record_failure()
+            return
+
+        if isinstance(message, TextMessage):
+            route.record_forward(len(message.body.encode("utf-8")))
+        elif isinstance(message, MediaMessage):
+            if message.reference is not None \
+                    and message.reference[0] == destination.address.address:
+                route.record_forward(0, referenced=True)
+            else:
+                route.record_forward(len(message.data))
+
+    @staticmethod
+    def _fingerprint(message: Message) -> Optional[Hashable]:
+        """
+        Generates a fingerprint of a message's content
+        :param message: The message
+        :return: The fingerprint, None if the message can't be relayed
+        """
+        if isinstance(message, TextMessage):
+            return "text", message.title, message.body
+        elif isinstance(message, MediaMessage):
+            return "media", message.caption, \
+                hashlib.sha1(message.data).hexdigest()
+        else:
+            return None
+
+    def _is_marked(self, message: Message) -> bool:
+        """
+        Checks whether a received message was relayed by a relay
+        :param message: The message
+        :return: Whether or not the message carries the relay marker
+        """
+        if self.marker == "":
+            return False
+        elif isinstance(message, TextMessage):
+            return message.body.endswith(self.marker)
+        elif isinstance(message, MediaMessage):
+            return (message.caption or "").endswith(self.marker)
+        else:
+            return False
+
+    def _is_looped(self, sender: Address, fingerprint: Hashable) -> bool:
+        """
+        Checks whether a received message was forwarded by the relay
+        :param sender: The address the message was received from
+        :param fingerprint: The fingerprint of the message's content
+        :return: Whether or not the message was forwarded by the relay
+        """
+        key = (sender.address, fingerprint)
+        with self._lock:
+            expiry = self._forwarded.get(key)
+            return expiry is not None and expiry > time.monotonic()
+
+    def _remember(self, address: Address, fingerprint: Hashable):
+        """
+        Remembers content forwarded to an address
+        :param address: The address the content was forwarded to
+        :param fingerprint: The fingerprint of the content
+        :return: None
+        """
+        key = (address.address, fingerprint)
+        now = time.monotonic()
+        with self._lock:
+            self._forwarded[key] = now + self.loop_window
+            self._forwarded.move_to_end(key)
+            while len(self._forwarded) > 0:
+                oldest = next(iter(self._forwarded.values()))
+                if len(self._forwarded) > self.loop_size or oldest <= now:
+                    self._forwarded.popitem(last=False)
+                else:
+                    break
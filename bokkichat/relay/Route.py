@@ -0,0 +1,122 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import threading
+from typing import Optional, Dict, Any
+from bokkichat.entities.Address import Address
+from bokkichat.connection.Connection import Connection
+
+
+class Route:
+    """
+    Class that models an entry of a relay's routing table, as well as the
+    throughput metrics of the entry
+    """
+
+    def __init__(
+            self,
+            source: Connection,
+            destination: Connection,
+            destination_address: Address,
+            source_address: Optional[Address] = None
+    ):
+        """
+        Initializes the route
+        :param source: The connection whose messages are relayed
+        :param destination: The connection the messages are relayed to
+        :param destination_address: The address the messages are sent to
+        :param source_address: If provided, only messages from this
+                               address are relayed
+        """
+        self.source = source
+        self.destination = destination
+        self.destination_address = destination_address
+        self.source_address = source_address
+        self.started = time.monotonic()
+        self.forwarded_count = 0
+        self.forwarded_bytes = 0
+        self.referenced_count = 0
+        self.failed_count = 0
+        self._lock = threading.Lock()
+
+    def __str__(self) -> str:
+        """
+        :return: A string representation of the route
+        """
+        return "{}:{} -> {}:{}".format(
+            self.source.name(),
+            "*" if self.source_address is None else self.source_address,
+            self.destination.name(),
+            self.destination_address
+        )
+
+    def matches(self, connection: Connection, sender: Address) -> bool:
+        """
+        Checks whether a received message is relayed by this route
+        :param connection: The connection that received the message
+        :param sender: The sender of the message
+        :return: Whether or not the message is relayed by this route
+        """
+        return connection is self.source and (
+            self.source_address is None
+            or self.source_address.address == sender.address
+        )
+
+    def record_forward(self, size: int, referenced: bool = False):
+        """
+        Records a forwarded message
+        :param size: The amount of forwarded bytes
+        :param referenced: Whether or not media was forwarded without
+                           uploading it again
+        :return: None
+        """
+        with self._lock:
+            self.forwarded_count += 1
+            self.forwarded_bytes += size
+            if referenced:
+                self.referenced_count += 1
+
+    def record_failure(self):
+        """
+        Records a message that could not be forwarded
+        :return: None
+        """
+        with self._lock:
+            self.failed_count += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Summarizes the throughput of the route
+        :return: The amount of forwarded messages and bytes, the amount of
+                 media forwarded without uploading it again, the amount of
+                 failed forwards and the forwarded messages and bytes per
+                 second since the route was created
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        with self._lock:
+            return {
+                "route": str(self),
+                "forwarded": self.forwarded_count,
+                "bytes": self.forwarded_bytes,
+                "referenced": self.referenced_count,
+                "failed": self.failed_count,
+                "messages_per_second": self.forwarded_count / elapsed,
+                "bytes_per_second": self.forwarded_bytes / elapsed
+            }
@@ -0,0 +1,245 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import os
+import json
+import math
+import time
+import logging
+import tempfile
+import threading
+from typing import Callable, Optional
+from bokkichat.entities.message.Message import Message
+from bokkichat.scheduling.Timer import Timer
+from bokkichat.scheduling.TimingWheel import TimingWheel
+
+
+class Scheduler:
+    """
+    Class that sends messages at given times or in regular intervals.
+    Timers are kept in a hierarchical timing wheel which is turned by a
+    background thread. The thread only runs while the scheduler is started
+    and timers are pending.
+    Every connection has a scheduler which sends through the connection's
+    send method and runs while the connection's loop is running.
+    Pending timers can optionally be persisted to a JSON file.
+    """
+
+    def __init__(
+            self,
+            send: Callable[[Message], None],
+            resolution: float = 0.1,
+            path: Optional[str] = None
+    ):
+        """
+        Initializes the scheduler. If a path is provided and the file
+        exists, the previously persisted timers are loaded. Timers that
+        expired in the meantime fire right after the scheduler is started.
+        :param send: The function used to send messages
+        :param resolution: The time in seconds between ticks of the
+                           timing wheel
+        :param path: The path to the file in which timers are persisted
+        """
+        self.send = send
+        self.resolution = resolution
+        self.path = path
+        self.fired_count = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._wheel = TimingWheel()
+        self._origin = time.monotonic()
+        self._wall_origin = time.time()
+        self._lock = threading.Lock()
+        self._started = False
+        self._stop_event = threading.Event()
+        self._thread = None  # type: Optional[threading.Thread]
+
+        if path is not None and os.path.isfile(path):
+            self.load()
+
+    def __len__(self) -> int:
+        """
+        :return: The amount of pending timers
+        """
+        return len(self._wheel)
+
+    def schedule(
+            self,
+            message: Message,
+            at: float,
+            interval: Optional[float] = None
+    ) -> Timer:
+        """
+        Schedules a message to be sent at a given time
+        :param message: The message to send
+        :param at: The UNIX timestamp at which to send the message
+        :param interval: If provided, the message is sent again every
+                         interval seconds
+        :return: The timer, which may be used to cancel the message
+        """
+        return self.schedule_in(message, at - time.time(), interval)
+
+    def schedule_in(
+            self,
+            message: Message,
+            delay: float,
+            interval: Optional[float] = None
+    ) -> Timer:
+        """
+        Schedules a message to be sent after a delay
+        :param message: The message to send
+        :param delay: The delay in seconds
+        :param interval: If provided, the message is sent again every
+                         interval seconds
+        :return: The timer, which may be used to cancel the message
+        """
+        ticks = None if interval is None \
+            else max(int(round(interval / self.resolution)), 1)
+        deadline = time.monotonic() + delay - self._origin
+        timer = Timer(
+            int(math.ceil(deadline / self.resolution)), message, ticks
+        )
+        with self._lock:
+            # Avoids turning the wheel through a long idle period
+            self._wheel.skip(int(
+                (time.monotonic() - self._origin) / self.resolution
+            ))
+            self._wheel.add(timer)
+            if self._started and self._thread is None:
+                self._start_thread()
+        return timer
+
+    def cancel(self, timer: Timer):
+        """
+        Cancels a timer
+        :param timer: The timer to cancel
+        :return: None
+        """
+        with self._lock:
+            self._wheel.cancel(timer)
+
+    def start(self):
+        """
+        Starts sending scheduled messages
+        :return: None
+        """
+        with self._lock:
+            self._started = True
+            self._stop_event.clear()
+            if self._thread is None and len(self._wheel) > 0:
+                self._start_thread()
+
+    def stop(self):
+        """
+        Stops sending scheduled messages and persists the pending timers
+        if a persistence file was configured
+        :return: None
+        """
+        with self._lock:
+            self._started = False
+            self._stop_event.set()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        self.save()
+
+    def save(self):
+        """
+        Atomically writes the pending timers to the persistence file,
+        if one was configured
+        :return: None
+        """
+        if self.path is None:
+            return
+
+        with self._lock:
+            # Expiry ticks count from the origin, the wheel's tick may lag
+            timers = [
+                {
+                    "at": self._wall_origin
+                    + timer.expires * self.resolution,
+                    "interval": None if timer.interval is None
+                    else timer.interval * self.resolution,
+                    "message": timer.message.to_dict()
+                }
+                for timer in self._wheel
+            ]
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "w") as f:
+            for timer in timers:
+                f.write(json.dumps(timer, separators=(",", ":")) + "\n")
+        os.replace(temp_path, self.path)
+
+    def load(self):
+        """
+        Loads the timers from the persistence file
+        :return: None
+        """
+        with open(self.path, "r") as f:
+            for line in f:
+                if line.strip() == "":
+                    continue
+                timer = json.loads(line)
+                self.schedule(
+                    Message.from_dict(timer["message"]),
+                    timer["at"],
+                    timer["interval"]
+                )
+
+    def _start_thread(self):
+        """
+        Starts the thread that turns the timing wheel.
+        Must be called while holding the lock.
+        :return: None
+        """
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        """
+        Turns the timing wheel until the scheduler is stopped or no timers
+        are left, sending the messages of expired timers
+        :return: None
+        """
+        while True:
+            with self._lock:
+                if self._stop_event.is_set() or len(self._wheel) == 0:
+                    self._thread = None
+                    return
+
+                target = (time.monotonic() - self._origin) / self.resolution
+                fired = []
+                while self._wheel.tick + 1 <= target:
+                    fired += self._wheel.advance()
+
+            for timer in fired:
+                try:
+                    self.send(timer.message)
+                    self.fired_count += 1
+                except Exception as e:
+                    self.logger.error(
+                        "Failed to send scheduled message: {}".format(e)
+                    )
+
+            self._stop_event.wait(
+                (self._wheel.tick + 1) * self.resolution
+                - (time.monotonic() - self._origin)
+            )
@@ -0,0 +1,49 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from typing import Optional
+from bokkichat.entities.message.Message import Message
+
+
+class Timer:
+    """
+    Class that models a scheduled message.
+    Uses __slots__ since schedulers may hold millions of timers.
+    """
+
+    __slots__ = ("expires", "interval", "message", "cancelled")
+
+    def __init__(
+            self,
+            expires: int,
+            message: Message,
+            interval: Optional[int] = None
+    ):
+        """
+        Initializes the timer
+        :param expires: The tick of the timing wheel at which the timer
+                        fires
+        :param message: The message to send once the timer fires
+        :param interval: The amount of ticks after which a recurring timer
+                         fires again, None if the timer only fires once
+        """
+        self.expires = expires
+        self.message = message
+        self.interval = interval
+        self.cancelled = False
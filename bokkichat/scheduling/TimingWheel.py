@@ -0,0 +1,163 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from typing import List, Iterator
+from bokkichat.scheduling.Timer import Timer
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel.
+    Every level consists of 64 slots, a slot of level n covering 64^n
+    ticks. Timers are put into the lowest level whose range covers their
+    expiry and are moved to lower levels as the wheel turns.
+    Timers too far in the future for the highest level are kept in an
+    overflow list.
+    Adding and cancelling timers take constant time. Cancelled timers are
+    only marked as such and discarded once their slot is reached.
+    This class is not thread-safe.
+    """
+
+    bits = 6
+    """
+    The amount of bits of a tick each level covers
+    """
+
+    def __init__(self, levels: int = 4):
+        """
+        Initializes the timing wheel
+        :param levels: The amount of levels of the wheel
+        """
+        self.levels = levels
+        self.tick = 0
+        self._slots = [
+            [[] for _ in range(1 << self.bits)] for _ in range(levels)
+        ]  # type: List[List[List[Timer]]]
+        self._overflow = []  # type: List[Timer]
+        self._count = 0
+
+    def __len__(self) -> int:
+        """
+        :return: The amount of pending timers
+        """
+        return self._count
+
+    def __iter__(self) -> Iterator[Timer]:
+        """
+        :return: An iterator over all pending timers
+        """
+        for level in self._slots:
+            for slot in level:
+                for timer in slot:
+                    if not timer.cancelled:
+                        yield timer
+        for timer in self._overflow:
+            if not timer.cancelled:
+                yield timer
+
+    def add(self, timer: Timer):
+        """
+        Adds a timer to the wheel. Timers that expire at or before the
+        current tick fire on the next tick.
+        :param timer: The timer to add
+        :return: None
+        """
+        if timer.expires <= self.tick:
+            timer.expires = self.tick + 1
+        self._count += 1
+        self._place(timer)
+
+    def cancel(self, timer: Timer):
+        """
+        Cancels a timer
+        :param timer: The timer to cancel
+        :return: None
+        """
+        if not timer.cancelled:
+            timer.cancelled = True
+            self._count -= 1
+
+    def skip(self, tick: int):
+        """
+        Moves the wheel forward to a tick without turning it.
+        Only has an effect while no timers are pending.
+        :param tick: The tick to move to
+        :return: None
+        """
+        if self._count == 0 and tick > self.tick:
+            for level in self._slots:
+                for index in range(len(level)):
+                    level[index] = []
+            self._overflow = []
+            self.tick = tick
+
+    def advance(self) -> List[Timer]:
+        """
+        Advances the wheel by one tick.
+        Recurring timers are rescheduled automatically.
+        :return: The timers that fired
+        """
+        self.tick += 1
+        tick = self.tick
+
+        for level in range(1, self.levels + 1):
+            if tick & ((1 << (self.bits * level)) - 1) != 0:
+                break
+            elif level == self.levels:
+                timers, self._overflow = self._overflow, []
+            else:
+                slots = self._slots[level]
+                index = (tick >> (self.bits * level)) & ((1 << self.bits) - 1)
+                timers, slots[index] = slots[index], []
+            for timer in timers:
+                if not timer.cancelled:
+                    self._place(timer)
+
+        slots = self._slots[0]
+        index = tick & ((1 << self.bits) - 1)
+        timers, slots[index] = slots[index], []
+
+        fired = []
+        for timer in timers:
+            if timer.cancelled:
+                continue
+            fired.append(timer)
+            if timer.interval is None:
+                self._count -= 1
+            else:
+                timer.expires = max(timer.expires + timer.interval, tick + 1)
+                self._place(timer)
+        return fired
+
+    def _place(self, timer: Timer):
+        """
+        Puts a timer into the slot matching its expiry.
+        Timers cascading down at their expiry tick are put into the
+        current slot, which is processed right afterwards.
+        :param timer: The timer to place
+        :return: None
+        """
+        delta = timer.expires - self.tick
+        for level in range(self.levels):
+            if delta < 1 << (self.bits * (level + 1)):
+                index = (timer.expires >> (self.bits * level)) \
+                    & ((1 << self.bits) - 1)
+                self._slots[level][index].append(timer)
+                return
+        self._overflow.append(timer)
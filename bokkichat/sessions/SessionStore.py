@@ -0,0 +1,274 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from bokkichat.entities.Address import Address
+
+
+class SessionStore:
+    """
+    Class that stores per-chat session state.
+    A session is a JSON-serializable dictionary. Recently used sessions are
+    kept in a bounded in-memory LRU cache, all others are loaded from an
+    SQLite database when they are needed.
+    Changes are written to the database in batches by a background thread.
+    Sessions may expire a fixed time after they were last stored.
+    The session dictionaries returned by get are shared, changes to them
+    have to be stored using set.
+    """
+
+    def __init__(
+            self,
+            path: str = ":memory:",
+            cache_size: int = 1000,
+            ttl: Optional[float] = None,
+            flush_interval: float = 1.0,
+            batch_size: int = 1000
+    ):
+        """
+        Initializes the session store.
+        The database is only opened once it is needed.
+        :param path: The path to the SQLite database.
+                     By default, an in-memory database is used
+        :param cache_size: The maximum amount of sessions kept in memory
+        :param ttl: The time in seconds after which sessions expire.
+                    Sessions don't expire if not provided
+        :param flush_interval: The time in seconds between writes to the
+                               database
+        :param batch_size: The amount of changed sessions that causes an
+                           early write to the database
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()  # type: OrderedDict
+        self._dirty = {}  # type: Dict[str, Optional[Tuple[Dict, float]]]
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None  # type: Optional[sqlite3.Connection]
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._flusher = None  # type: Optional[threading.Thread]
+
+    def get(self, address: Address, default: Any = None) -> Any:
+        """
+        Retrieves the session of a chat
+        :param address: The address of the chat
+        :param default: The value to return if there is no session
+        :return: The session, or the default value
+        """
+        key = str(address)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            elif key in self._dirty:
+                entry = self._dirty[key]
+                if entry is not None:
+                    self._cache_entry(key, entry)
+
+            if entry is not None or key in self._dirty:
+                self.hits += 1
+                return self._value(entry, default)
+            self.misses += 1
+
+        with self._db_lock:
+            row = self._database().execute(
+                "SELECT data, updated FROM sessions WHERE address = ?",
+                (key,)
+            ).fetchone()
+        loaded = None if row is None else (json.loads(row[0]), row[1])
+
+        with self._lock:
+            # The session may have been stored in the meantime
+            if key in self._cache:
+                return self._value(self._cache[key], default)
+            elif key in self._dirty:
+                return self._value(self._dirty[key], default)
+            elif loaded is not None:
+                self._cache_entry(key, loaded)
+            return self._value(loaded, default)
+
+    def set(self, address: Address, session: Dict[str, Any]):
+        """
+        Stores the session of a chat
+        :param address: The address of the chat
+        :param session: The session
+        :return: None
+        """
+        key = str(address)
+        entry = (session, time.time())
+        with self._lock:
+            self._cache_entry(key, entry)
+            self._mark_dirty(key, entry)
+
+    def delete(self, address: Address):
+        """
+        Deletes the session of a chat
+        :param address: The address of the chat
+        :return: None
+        """
+        key = str(address)
+        with self._lock:
+            self._cache.pop(key, None)
+            self._mark_dirty(key, None)
+
+    def flush(self):
+        """
+        Writes all changed sessions to the database and removes expired
+        sessions from it
+        :return: None
+        """
+        with self._db_lock:
+            with self._lock:
+                if len(self._dirty) == 0 and self.ttl is None:
+                    return
+                dirty = self._dirty
+                self._dirty = {}
+                stored = [
+                    (key, json.dumps(entry[0]), entry[1])
+                    for key, entry in dirty.items() if entry is not None
+                ]
+            deleted = [(key,) for key, entry in dirty.items() if entry is None]
+
+            database = self._database()
+            with database:
+                database.executemany(
+                    "INSERT OR REPLACE INTO sessions (address, data, updated) "
+                    "VALUES (?, ?, ?)",
+                    stored
+                )
+                database.executemany(
+                    "DELETE FROM sessions WHERE address = ?", deleted
+                )
+                if self.ttl is not None:
+                    database.execute(
+                        "DELETE FROM sessions WHERE updated < ?",
+                        (time.time() - self.ttl,)
+                    )
+
+    def close(self):
+        """
+        Stops the background thread, writes all changes to the database
+        and closes it. The store reopens the database if it is used again.
+        :return: None
+        """
+        self._stopped.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self._stopped.clear()
+        self.flush()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _value(self, entry: Optional[Tuple[Dict, float]], default: Any) -> Any:
+        """
+        Extracts the session from a cache entry
+        :param entry: The cache entry, consisting of the session and the
+                      time it was stored at
+        :param default: The value to return if there is no valid session
+        :return: The session, or the default value if there is no session
+                 or the session expired
+        """
+        if entry is None:
+            return default
+        elif self.ttl is not None and time.time() - entry[1] > self.ttl:
+            return default
+        else:
+            return entry[0]
+
+    def _cache_entry(self, key: str, entry: Tuple[Dict, float]):
+        """
+        Puts an entry into the in-memory cache, evicting the least recently
+        used entries if necessary. Evicted sessions with pending changes
+        are kept until they were written to the database.
+        Must be called while holding the lock.
+        :param key: The key of the entry
+        :param entry: The entry
+        :return: None
+        """
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _mark_dirty(self, key: str, entry: Optional[Tuple[Dict, float]]):
+        """
+        Schedules an entry to be written to the database, starting the
+        background thread if necessary.
+        Must be called while holding the lock.
+        :param key: The key of the entry
+        :param entry: The entry, None if the session was deleted
+        :return: None
+        """
+        self._dirty[key] = entry
+        if len(self._dirty) >= self.batch_size:
+            self._wake.set()
+
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_periodically)
+            self._flusher.daemon = True
+            self._flusher.start()
+
+    def _flush_periodically(self):
+        """
+        Writes changes to the database until the store is closed
+        :return: None
+        """
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _database(self) -> sqlite3.Connection:
+        """
+        Opens the database if necessary.
+        Must be called while holding the database lock.
+        :return: The database connection
+        """
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            if self.path != ":memory:":
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+            with self._db:
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS sessions ("
+                    "address TEXT PRIMARY KEY, "
+                    "data TEXT NOT NULL, "
+                    "updated REAL NOT NULL)"
+                )
+                self._db.execute(
+                    "CREATE INDEX IF NOT EXISTS sessions_updated "
+                    "ON sessions (updated)"
+                )
+        return self._db
@@ -17,6 +17,7 @@ You should have received a copy of the GNU General Public License
 along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
+import json
 from bokkichat.settings.Settings import Settings
 
 
@@ -25,22 +26,46 @@ class CliSettings(Settings):
     Class that defines a Settings object for a CLI connection
     """
 
+    def __init__(
+            self,
+            buffered_output: bool = False,
+            buffer_size: int = 65536
+    ):
+        """
+        Initializes the CLI settings
+        :param buffered_output: If True, sent messages are collected in a
+                                buffer and written to stdout in bulk
+        :param buffer_size: The amount of characters that may be buffered
+                            before the output is flushed
+        """
+        self.buffered_output = buffered_output
+        self.buffer_size = buffer_size
+
     # noinspection PyMethodMayBeStatic
     def serialize(self) -> str:
         """
         Serializes the settings to a string
         :return: The serialized Settings object
         """
-        return ""
+        return json.dumps({
+            "buffered_output": self.buffered_output,
+            "buffer_size": self.buffer_size
+        })
 
     @classmethod
-    def deserialize(cls, _: str) -> "CliSettings":
+    def deserialize(cls, serialized: str) -> "CliSettings":
         """
         Deserializes a string and generates a Settings object from it
-        :param _: The serialized string
+        :param serialized: The serialized string
         :return: The deserialized Settings object
         """
-        return cls()
+        if not serialized:
+            return cls()
+        obj = json.loads(serialized)
+        return cls(
+            obj.get("buffered_output", False),
+            obj.get("buffer_size", 65536)
+        )
 
     @classmethod
     def prompt(cls) -> Settings:
@@ -0,0 +1,95 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import json
+from typing import Optional
+from bokkichat.settings.Settings import Settings
+
+
+class LoopbackSettings(Settings):
+    """
+    Class that defines a Settings object for a loopback connection.
+    The latency and loss values are applied to every message sent from a
+    connection using these settings.
+    """
+
+    def __init__(
+            self,
+            address: str = "loopback",
+            latency: float = 0.0,
+            jitter: float = 0.0,
+            loss: float = 0.0,
+            seed: Optional[int] = None
+    ):
+        """
+        Initializes the loopback settings
+        :param address: The address of the endpoint
+        :param latency: The fixed delay in seconds before a sent message
+                        can be received by the peer
+        :param jitter: Additional random delay in seconds, uniformly
+                       distributed between 0 and this value
+        :param loss: The probability (0.0 - 1.0) that a sent message
+                     gets lost
+        :param seed: Seed for the random number generator, used to make
+                     jitter and loss deterministic
+        """
+        self.address = address
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.seed = seed
+
+    # noinspection PyMethodMayBeStatic
+    def serialize(self) -> str:
+        """
+        Serializes the settings to a string
+        :return: The serialized Settings object
+        """
+        return json.dumps({
+            "address": self.address,
+            "latency": self.latency,
+            "jitter": self.jitter,
+            "loss": self.loss,
+            "seed": self.seed
+        })
+
+    @classmethod
+    def deserialize(cls, serialized: str) -> "LoopbackSettings":
+        """
+        Deserializes a string and generates a Settings object from it
+        :param serialized: The serialized string
+        :return: The deserialized Settings object
+        """
+        obj = json.loads(serialized)
+        return cls(
+            obj.get("address", "loopback"),
+            obj.get("latency", 0.0),
+            obj.get("jitter", 0.0),
+            obj.get("loss", 0.0),
+            obj.get("seed")
+        )
+
+    @classmethod
+    def prompt(cls) -> Settings:
+        """
+        Prompts the user for input to generate a Settings object
+        :return: The generated settings object
+        """
+        address = cls.user_input("Address")
+        return cls(address=address)
@@ -0,0 +1,87 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import json
+from bokkichat.settings.Settings import Settings
+
+
+class ReplaySettings(Settings):
+    """
+    Class that defines a Settings object for a replay connection
+    """
+
+    def __init__(
+            self,
+            path: str,
+            speed: float = 1.0,
+            batch_size: int = 1000,
+            address: str = "replay"
+    ):
+        """
+        Initializes the replay settings
+        :param path: The path to the traffic log to replay
+        :param speed: The replay speed. 1.0 replays the log in real time,
+                      2.0 at twice the speed etc.
+                      0 replays the log as fast as possible
+        :param batch_size: The maximum amount of messages returned by a
+                           single receive call
+        :param address: The address of the replay connection
+        """
+        self.path = path
+        self.speed = speed
+        self.batch_size = batch_size
+        self.address = address
+
+    # noinspection PyMethodMayBeStatic
+    def serialize(self) -> str:
+        """
+        Serializes the settings to a string
+        :return: The serialized Settings object
+        """
+        return json.dumps({
+            "path": self.path,
+            "speed": self.speed,
+            "batch_size": self.batch_size,
+            "address": self.address
+        })
+
+    @classmethod
+    def deserialize(cls, serialized: str) -> "ReplaySettings":
+        """
+        Deserializes a string and generates a Settings object from it
+        :param serialized: The serialized string
+        :return: The deserialized Settings object
+        """
+        obj = json.loads(serialized)
+        return cls(
+            obj["path"],
+            obj.get("speed", 1.0),
+            obj.get("batch_size", 1000),
+            obj.get("address", "replay")
+        )
+
+    @classmethod
+    def prompt(cls) -> Settings:
+        """
+        Prompts the user for input to generate a Settings object
+        :return: The generated settings object
+        """
+        path = cls.user_input("Traffic Log")
+        speed = float(cls.user_input("Speed (0 for maximum speed)"))
+        return cls(path, speed)
@@ -0,0 +1,129 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import os
+import json
+from typing import List, Optional
+from bokkichat.settings.Settings import Settings
+from bokkichat.settings.impl.TelegramBotSettings import TelegramBotSettings
+
+
+class TelegramBotPoolSettings(Settings):
+    """
+    Class that defines a Settings object for a pool of Telegram bots
+    """
+
+    def __init__(
+            self,
+            api_keys: List[str],
+            affinity_size: int = 100000,
+            dedup_size: int = 10000,
+            dedup_path: Optional[str] = None,
+            media_cache_dir: Optional[str] = None,
+            media_cache_size: int = 268435456,
+            raw_updates: bool = False
+    ):
+        """
+        Initializes the Telegram bot pool settings
+        :param api_keys: The API keys of the bots in the pool
+        :param affinity_size: The maximum amount of receivers for which the
+                              pool remembers which bots can reach them
+        :param dedup_size: The amount of recently received update and
+                           message IDs every bot remembers to drop
+                           duplicate updates
+        :param dedup_path: Optional path prefix of the files in which the
+                           bots persist their received IDs. The index of
+                           the bot's API key is appended to it
+        :param media_cache_dir: Optional directory in which downloaded
+                                media files are cached. Every bot uses a
+                                subdirectory named after the index of its
+                                API key
+        :param media_cache_size: The maximum size of the media cache of all
+                                 bots together in bytes
+        :param raw_updates: If True, updates are decoded directly from the
+                            JSON API responses instead of being converted
+                            into python-telegram-bot objects first
+        """
+        self.api_keys = api_keys
+        self.affinity_size = affinity_size
+        self.dedup_size = dedup_size
+        self.dedup_path = dedup_path
+        self.media_cache_dir = media_cache_dir
+        self.media_cache_size = media_cache_size
+        self.raw_updates = raw_updates
+
+    def member_settings(self, index: int) -> TelegramBotSettings:
+        """
+        Generates the settings of a bot in the pool
+        :param index: The index of the bot's API key
+        :return: The settings of the bot
+        """
+        return TelegramBotSettings(
+            self.api_keys[index],
+            self.dedup_size,
+            None if self.dedup_path is None
+            else "{}.{}".format(self.dedup_path, index),
+            None if self.media_cache_dir is None
+            else os.path.join(self.media_cache_dir, str(index)),
+            self.media_cache_size // max(len(self.api_keys), 1),
+            self.raw_updates
+        )
+
+    # noinspection PyMethodMayBeStatic
+    def serialize(self) -> str:
+        """
+        Serializes the settings to a string
+        :return: The serialized Settings object
+        """
+        return json.dumps({
+            "api_keys": self.api_keys,
+            "affinity_size": self.affinity_size,
+            "dedup_size": self.dedup_size,
+            "dedup_path": self.dedup_path,
+            "media_cache_dir": self.media_cache_dir,
+            "media_cache_size": self.media_cache_size,
+            "raw_updates": self.raw_updates
+        })
+
+    @classmethod
+    def deserialize(cls, serialized: str) -> "TelegramBotPoolSettings":
+        """
+        Deserializes a string and generates a Settings object from it
+        :param serialized: The serialized string
+        :return: The deserialized Settings object
+        """
+        obj = json.loads(serialized)
+        return cls(
+            obj["api_keys"],
+            obj.get("affinity_size", 100000),
+            obj.get("dedup_size", 10000),
+            obj.get("dedup_path"),
+            obj.get("media_cache_dir"),
+            obj.get("media_cache_size", 268435456),
+            obj.get("raw_updates", False)
+        )
+
+    @classmethod
+    def prompt(cls) -> Settings:
+        """
+        Prompts the user for input to generate a Settings object
+        :return: The generated settings object
+        """
+        api_keys = cls.user_input("API Keys (comma-separated)")
+        return cls([key.strip() for key in api_keys.split(",")])
@@ -18,6 +18,7 @@ along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
 LICENSE"""
 
 import json
+from typing import Optional
 from bokkichat.settings.Settings import Settings
 
 
@@ -26,12 +27,41 @@ class TelegramBotSettings(Settings):
     Class that defines a Settings object for a Telegram bot connection
     """
 
-    def __init__(self, api_key: str):
+    def __init__(
+            self,
+            api_key: str,
+            dedup_size: int = 10000,
+            dedup_path: Optional[str] = None,
+            media_cache_dir: Optional[str] = None,
+            media_cache_size: int = 268435456,
+            raw_updates: bool = False
+    ):
         """
         Initializes the Telegram Connection.
         :param api_key: The API key used for authentication
+        :param dedup_size: The amount of recently received update and
+                           message IDs remembered to drop duplicate updates
+        :param dedup_path: Optional path to a file in which the received
+                           update and message IDs are persisted. The file
+                           is updated every 30 seconds and when the
+                           connection is closed
+        :param media_cache_dir: Optional directory in which downloaded
+                                media files are cached. Files are
+                                identified by their unique ID only if
+                                raw_updates is enabled, otherwise by
+                                their file ID, which may change
+        :param media_cache_size: The maximum size of the media cache in
+                                 bytes
+        :param raw_updates: If True, updates are decoded directly from the
+                            JSON API responses instead of being converted
+                            into python-telegram-bot objects first
         """
         self.api_key = api_key
+        self.dedup_size = dedup_size
+        self.dedup_path = dedup_path
+        self.media_cache_dir = media_cache_dir
+        self.media_cache_size = media_cache_size
+        self.raw_updates = raw_updates
 
     # noinspection PyMethodMayBeStatic
     def serialize(self) -> str:
@@ -40,7 +70,12 @@ class TelegramBotSettings(Settings):
         :return: The serialized Settings object
         """
         return json.dumps({
-            "api_key": self.api_key
+            "api_key": self.api_key,
+            "dedup_size": self.dedup_size,
+            "dedup_path": self.dedup_path,
+            "media_cache_dir": self.media_cache_dir,
+            "media_cache_size": self.media_cache_size,
+            "raw_updates": self.raw_updates
         })
 
     @classmethod
@@ -51,7 +86,14 @@ class TelegramBotSettings(Settings):
         :return: The deserialized Settings object
         """
         obj = json.loads(serialized)
-        return cls(obj["api_key"])
+        return cls(
+            obj["api_key"],
+            obj.get("dedup_size", 10000),
+            obj.get("dedup_path"),
+            obj.get("media_cache_dir"),
+            obj.get("media_cache_size", 268435456),
+            obj.get("raw_updates", False)
+        )
 
     @classmethod
     def prompt(cls) -> Settings:
@@ -0,0 +1,97 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import io
+import os
+import sys
+import time
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+from bokkichat.connection.impl.CliConnection import CliConnection
+from bokkichat.connection.wrappers.CapturingConnection import \
+    CapturingConnection
+from bokkichat.settings.impl.CliSettings import CliSettings
+
+
+class TestCliConnection(TestCase):
+    """
+    Tests the CliConnection class, reading from a pipe
+    """
+
+    def setUp(self):
+        """
+        Replaces stdin with a pipe and stdout with a buffer
+        :return: None
+        """
+        read_fd, self.write_fd = os.pipe()
+        self.stdin = os.fdopen(read_fd)
+        self.addCleanup(self.stdin.close)
+        for name, stream in [("stdin", self.stdin), ("stdout", io.StringIO())]:
+            patcher = patch.object(sys, name, stream)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write(self, data: bytes, close: bool = True):
+        """
+        Writes to the pipe
+        :param data: The data to write
+        :param close: Whether or not to close the pipe afterwards
+        :return: None
+        """
+        os.write(self.write_fd, data)
+        if close:
+            os.close(self.write_fd)
+
+    def test_receive(self):
+        """
+        Tests that lines are received until the input ends
+        :return: None
+        """
+        connection = CliConnection(CliSettings())
+        self.write(b"one\ntwo\nth", close=False)
+        self.assertEqual(
+            [x.body for x in connection.receive()], ["one", "two"]
+        )
+        self.assertFalse(connection.exhausted)
+
+        self.write(b"ree")
+        self.assertEqual([x.body for x in connection.receive()], ["three"])
+        self.assertTrue(connection.exhausted)
+        self.assertEqual(connection.receive(), [])
+        connection.close()
+
+    def test_loop_ends_with_input(self):
+        """
+        Tests that the loop of a wrapped connection ends once the input
+        ended
+        :return: None
+        """
+        wrapper = CapturingConnection(CliConnection(CliSettings()))
+        handled = []
+        self.write(b"one\ntwo\n")
+
+        timer = threading.Timer(10, wrapper.stop)
+        timer.start()
+        start = time.monotonic()
+        wrapper.loop(lambda con, msg: handled.append(msg.body), sleep_time=0)
+        timer.cancel()
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(handled, ["one", "two"])
+        self.assertTrue(wrapper.exhausted)
@@ -0,0 +1,139 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from unittest import TestCase
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.connection.impl.LoopbackConnection import LoopbackConnection
+from bokkichat.connection.wrappers.CoalescingConnection import \
+    CoalescingConnection
+from bokkichat.settings.impl.LoopbackSettings import LoopbackSettings
+
+
+class TestCoalescingConnection(TestCase):
+    """
+    Tests the CoalescingConnection class
+    """
+
+    def setUp(self):
+        """
+        Pairs two loopback connections and wraps the sending one
+        :return: None
+        """
+        self.sender, self.receiver = LoopbackConnection.pair(
+            LoopbackSettings("sender"), LoopbackSettings("receiver")
+        )
+        self.sender.transient_errors = (ConnectionError,)
+        self.coalescing = CoalescingConnection(
+            self.sender, window=30, max_chars=20, retry_delay=0.001
+        )
+
+    def send(self, body: str, title: str = "Message"):
+        """
+        Sends a text message to the receiving connection
+        :param body: The body of the message
+        :param title: The title of the message
+        :return: None
+        """
+        self.coalescing.send(TextMessage(
+            self.sender.address, self.receiver.address, body, title
+        ))
+
+    def received(self):
+        """
+        :return: The bodies and titles of the received messages
+        """
+        return [(x.body, x.title) for x in self.receiver.receive()]
+
+    def test_merging(self):
+        """
+        Tests that buffered messages are merged up to the size limit
+        :return: None
+        """
+        for body in ["one", "two", "three", "four", "five"]:
+            self.send(body)
+        self.assertEqual(self.received(), [])
+
+        self.coalescing.flush()
+        self.assertEqual(self.received(), [
+            ("one\ntwo\nthree\nfour", "Message"),
+            ("five", "Message")
+        ])
+        self.assertEqual(self.coalescing.buffered_count, 5)
+        self.assertEqual(self.coalescing.sent_count, 2)
+
+    def test_titles_are_kept(self):
+        """
+        Tests that only messages with the same title are merged
+        :return: None
+        """
+        self.send("one", "A")
+        self.send("two", "A")
+        self.send("three", "B")
+        self.send("four", "A")
+        self.coalescing.flush()
+        self.assertEqual(self.received(), [
+            ("one\ntwo", "A"), ("three", "B"), ("four", "A")
+        ])
+
+    def test_window(self):
+        """
+        Tests that buffers are flushed once the window has passed
+        :return: None
+        """
+        self.coalescing.window = 0.01
+        self.send("one")
+        self.send("two")
+        self.coalescing.flush(self.receiver.address)
+        self.assertEqual(self.received(), [("one\ntwo", "Message")])
+
+    def test_transient_errors_are_retried(self):
+        """
+        Tests that messages are sent again after transient errors
+        :return: None
+        """
+        send = self.sender.send
+        errors = [ConnectionError(), ConnectionError()]
+
+        def failing_send(message):
+            if len(errors) > 0:
+                raise errors.pop(0)
+            send(message)
+
+        self.sender.send = failing_send
+        self.send("one")
+        self.coalescing.flush()
+        self.assertEqual(self.received(), [("one", "Message")])
+        self.assertEqual(self.coalescing.failed, [])
+
+    def test_errors_are_raised(self):
+        """
+        Tests that flush raises errors of messages that weren't sent
+        :return: None
+        """
+        def failing_send(message):
+            raise ValueError(message.body)
+
+        self.sender.send = failing_send
+        self.send("one")
+        self.send("two", "Other")
+        with self.assertRaises(ValueError) as context:
+            self.coalescing.flush()
+        self.assertEqual(str(context.exception), "one")
+        self.assertEqual(self.coalescing.failed, [])
+        self.coalescing.flush()
@@ -0,0 +1,200 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import threading
+from unittest import TestCase
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.connection.Supervisor import Supervisor
+from bokkichat.connection.impl.LoopbackConnection import LoopbackConnection
+from bokkichat.settings.impl.LoopbackSettings import LoopbackSettings
+
+
+class TestConnectionLoop(TestCase):
+    """
+    Tests the connection loop using loopback connections
+    """
+
+    def setUp(self):
+        """
+        Pairs two loopback connections
+        :return: None
+        """
+        self.sender, self.receiver = LoopbackConnection.pair(
+            LoopbackSettings("sender"), LoopbackSettings("receiver")
+        )
+
+    def send(self, *bodies: str):
+        """
+        Sends text messages to the receiving connection
+        :param bodies: The bodies of the messages
+        :return: None
+        """
+        for body in bodies:
+            self.sender.send(TextMessage(
+                self.sender.address, self.receiver.address, body
+            ))
+
+    def test_messages_are_handled_in_order(self):
+        """
+        Tests that a single consumer handles messages in order
+        :return: None
+        """
+        handled = []
+
+        def callback(connection, message):
+            handled.append(message.body)
+            if message.body == "4":
+                connection.stop(drain=True)
+
+        self.send("0", "1", "2", "3", "4")
+        self.receiver.loop(callback, sleep_time=30)
+        self.assertEqual(handled, ["0", "1", "2", "3", "4"])
+
+    def test_drain_finishes_received_messages(self):
+        """
+        Tests that draining handles the messages that were already
+        received and ends the loop without waiting for the next poll
+        :return: None
+        """
+        handled = []
+
+        def callback(connection, message):
+            if message.body == "0":
+                connection.loop_break = True
+            handled.append(message.body)
+
+        self.send("0", "1", "2")
+        timer = threading.Timer(10, self.receiver.stop)
+        timer.start()
+        self.receiver.loop(callback, sleep_time=30)
+        timer.cancel()
+        self.assertEqual(handled, ["0", "1", "2"])
+
+    def test_stop_keeps_unhandled_messages(self):
+        """
+        Tests that messages not handled when the loop stopped are handled
+        by the next loop
+        :return: None
+        """
+        handled = []
+
+        def stopping(connection, message):
+            handled.append(message.body)
+            connection.stop()
+
+        def draining(connection, message):
+            handled.append(message.body)
+            if message.body == "2":
+                connection.stop(drain=True)
+
+        self.send("0", "1", "2")
+        self.receiver.loop(stopping, sleep_time=30)
+        self.assertEqual(handled, ["0"])
+        self.assertFalse(self.receiver.looping)
+
+        self.receiver.loop(draining, sleep_time=30)
+        self.assertEqual(handled, ["0", "1", "2"])
+
+    def test_stop_does_not_wait_for_receive(self):
+        """
+        Tests that stopping the loop doesn't wait for a slow receive call
+        and that the messages it receives are handled by the next loop
+        :return: None
+        """
+        handled = []
+        release = threading.Event()
+        receive = self.receiver.receive
+
+        def blocking_receive():
+            release.wait(10)
+            return receive()
+
+        def draining(connection, message):
+            handled.append(message.body)
+            connection.stop(drain=True)
+
+        self.send("0")
+        self.receiver.receive = blocking_receive
+        threading.Timer(0.05, self.receiver.stop).start()
+        start = time.monotonic()
+        self.receiver.loop(draining, sleep_time=30)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(handled, [])
+
+        self.receiver.receive = receive
+        release.set()
+        self.receiver.loop(draining, sleep_time=30)
+        self.assertEqual(handled, ["0"])
+
+    def test_drain_stops_supervisor(self):
+        """
+        Tests that a draining loop is not restarted by its supervisor
+        :return: None
+        """
+        handled = []
+        supervisor = Supervisor((ConnectionError,), base_delay=0.001)
+        self.receiver.supervisor = supervisor
+
+        def callback(connection, message):
+            handled.append(message.body)
+            connection.loop_break = True
+            raise ConnectionError()
+
+        self.send("0", "1")
+        timer = threading.Timer(10, self.receiver.stop)
+        timer.start()
+        self.receiver.loop(callback, sleep_time=30)
+        timer.cancel()
+        self.assertEqual(handled, ["0"])
+        self.assertEqual(supervisor.total_failures, 1)
+
+    def test_multiple_consumers(self):
+        """
+        Tests that multiple consumers handle every message exactly once
+        :return: None
+        """
+        handled = []
+        lock = threading.Lock()
+
+        def callback(connection, message):
+            with lock:
+                handled.append(message.body)
+                if len(handled) == 100:
+                    connection.stop(drain=True)
+
+        self.send(*[str(x) for x in range(100)])
+        self.receiver.loop(callback, sleep_time=30, consumers=4)
+        self.assertEqual(
+            sorted(handled, key=int), [str(x) for x in range(100)]
+        )
+
+    def test_callback_errors_are_raised(self):
+        """
+        Tests that errors raised by the callback stop the loop and are
+        raised by it
+        :return: None
+        """
+        def callback(connection, message):
+            raise ValueError(message.body)
+
+        self.send("boom")
+        with self.assertRaises(ValueError):
+            self.receiver.loop(callback, sleep_time=30)
+        self.assertFalse(self.receiver.looping)
@@ -0,0 +1,100 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from bokkichat.utils.DedupWindow import DedupWindow
+
+
+class TestDedupWindow(TestCase):
+    """
+    Tests the DedupWindow class
+    """
+
+    def setUp(self):
+        """
+        Creates a temporary directory
+        :return: None
+        """
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, "dedup.json")
+
+    def tearDown(self):
+        """
+        Deletes the temporary directory
+        :return: None
+        """
+        shutil.rmtree(self.tempdir)
+
+    def test_duplicates(self):
+        """
+        Tests that keys are only added once
+        :return: None
+        """
+        window = DedupWindow()
+        self.assertTrue(window.add(1))
+        self.assertFalse(window.add(1))
+        self.assertTrue(window.add((1, 2)))
+        self.assertIn((1, 2), window)
+        self.assertEqual(len(window), 2)
+
+    def test_eviction(self):
+        """
+        Tests that the oldest keys are evicted once the window is full
+        :return: None
+        """
+        window = DedupWindow(size=3)
+        for key in range(5):
+            window.add(key)
+        self.assertEqual(len(window), 3)
+        self.assertNotIn(1, window)
+        self.assertIn(2, window)
+        self.assertTrue(window.add(0))
+
+    def test_persistence(self):
+        """
+        Tests that saved keys, including tuples, are loaded again
+        :return: None
+        """
+        window = DedupWindow(path=self.path)
+        window.add(5)
+        window.add((1, 2))
+        window.save()
+        self.assertFalse(window.dirty)
+
+        loaded = DedupWindow(path=self.path)
+        self.assertIn(5, loaded)
+        self.assertIn((1, 2), loaded)
+        self.assertFalse(loaded.dirty)
+
+    def test_checkpoint_interval(self):
+        """
+        Tests that checkpoints only save once the save interval passed
+        :return: None
+        """
+        window = DedupWindow(path=self.path, save_interval=3600)
+        window.add(1)
+        window.checkpoint()
+        self.assertFalse(os.path.isfile(self.path))
+
+        window.save_interval = 0
+        window.checkpoint()
+        self.assertTrue(os.path.isfile(self.path))
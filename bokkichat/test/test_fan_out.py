@@ -0,0 +1,122 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import threading
+from unittest import TestCase
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.connection.impl.LoopbackConnection import LoopbackConnection
+from bokkichat.settings.impl.LoopbackSettings import LoopbackSettings
+from bokkichat.broadcast.FanOut import FanOut
+from bokkichat.broadcast.DeliveryStatus import DeliveryStatus
+
+
+class TestFanOut(TestCase):
+    """
+    Tests the FanOut class
+    """
+
+    def setUp(self):
+        """
+        Creates a fast and a blocking connection
+        :return: None
+        """
+        self.fast, self.fast_peer = LoopbackConnection.pair(
+            LoopbackSettings("fast"), LoopbackSettings("fast-peer")
+        )
+        self.slow, self.slow_peer = LoopbackConnection.pair(
+            LoopbackSettings("slow"), LoopbackSettings("slow-peer")
+        )
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        send = self.slow.send
+
+        def blocking_send(message):
+            self.release.wait(10)
+            send(message)
+
+        self.slow.send = blocking_send
+        self.message = TextMessage(Address("me"), Address("you"), "Alert")
+
+    def test_send(self):
+        """
+        Tests that every receiver of every connection gets the message
+        :return: None
+        """
+        self.release.set()
+        result = FanOut().send(self.message, [
+            (self.fast, Address("a")),
+            (self.slow, Address("b")),
+            (self.fast, Address("c"))
+        ])
+        self.assertTrue(result.succeeded)
+        self.assertEqual(
+            [str(x.receiver) for x in self.fast_peer.receive()], ["a", "c"]
+        )
+        self.assertEqual(len(self.slow_peer.receive()), 1)
+        self.assertEqual(len(result.latencies), 2)
+
+    def test_timeouts(self):
+        """
+        Tests that slow connections time out without delaying others
+        :return: None
+        """
+        fan_out = FanOut(timeout=5)
+        start = time.monotonic()
+        result = fan_out.send(
+            self.message,
+            [(self.slow, Address("a")), (self.fast, Address("b"))],
+            {self.slow: 0.05}
+        )
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(
+            [x[2] for x in result.statuses],
+            [DeliveryStatus.TIMED_OUT, DeliveryStatus.SENT]
+        )
+        self.assertEqual(result.latencies[0], (self.slow, None))
+
+    def test_timed_out_sends_dont_block(self):
+        """
+        Tests that sends that timed out and still run in the background
+        don't delay later sends
+        :return: None
+        """
+        fan_out = FanOut(timeout=0.01)
+        for _ in range(20):
+            fan_out.send(self.message, [(self.slow, Address("a"))])
+
+        fan_out.timeout = 5
+        start = time.monotonic()
+        result = fan_out.send(self.message, [(self.fast, Address("b"))])
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertTrue(result.succeeded)
+
+    def test_failures(self):
+        """
+        Tests that errors raised while sending are reported
+        :return: None
+        """
+        def failing_send(message):
+            raise ValueError(str(message.receiver))
+
+        self.fast.send = failing_send
+        result = FanOut().send(self.message, [(self.fast, Address("a"))])
+        self.assertEqual(result.count(DeliveryStatus.FAILED), 1)
+        self.assertEqual(str(result.errors[0][1]), "a")
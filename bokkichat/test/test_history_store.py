@@ -0,0 +1,103 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from unittest import TestCase
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.entities.message.MediaMessage import MediaMessage
+from bokkichat.entities.message.MediaType import MediaType
+from bokkichat.recording.Direction import Direction
+from bokkichat.recording.HistoryStore import HistoryStore
+
+
+class TestHistoryStore(TestCase):
+    """
+    Tests the HistoryStore class
+    """
+
+    def setUp(self):
+        """
+        Opens an in-memory history store
+        :return: None
+        """
+        self.store = HistoryStore(":memory:", flush_interval=3600)
+        self.user = Address("user")
+        self.bot = Address("bot")
+
+    def tearDown(self):
+        """
+        Closes the history store
+        :return: None
+        """
+        self.store.close()
+
+    def test_last(self):
+        """
+        Tests retrieving the most recent messages of a chat
+        :return: None
+        """
+        for index in range(5):
+            self.store.record(
+                Direction.INBOUND,
+                TextMessage(self.user, self.bot, str(index))
+            )
+        self.store.record(
+            Direction.OUTBOUND, TextMessage(self.bot, self.user, "reply")
+        )
+        self.store.record(
+            Direction.INBOUND,
+            TextMessage(Address("other"), self.bot, "unrelated")
+        )
+        self.store.flush()
+
+        entries = self.store.last(self.user, limit=3)
+        self.assertEqual([x.text for x in entries], ["3", "4", "reply"])
+        self.assertEqual(entries[-1].direction, Direction.OUTBOUND)
+
+    def test_search(self):
+        """
+        Tests searching for messages containing words
+        :return: None
+        """
+        for body in ["hello world", "goodbye world", "hello there"]:
+            self.store.record(
+                Direction.INBOUND, TextMessage(self.user, self.bot, body)
+            )
+        self.store.flush()
+
+        found = self.store.search("hello world")
+        self.assertEqual([x.text for x in found], ["hello world"])
+        self.assertEqual(len(self.store.search("world")), 2)
+
+    def test_media_without_caption(self):
+        """
+        Tests that media messages without a caption are stored
+        :return: None
+        """
+        message = MediaMessage(
+            self.user, self.bot, MediaType.IMAGE, b"abc", None
+        )
+        self.store.record(Direction.INBOUND, message)
+        self.store.flush()
+
+        entries = self.store.last(self.user)
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].kind, "image")
+        self.assertEqual(entries[0].text, "")
+        self.assertEqual(entries[0].media_size, 3)
@@ -0,0 +1,95 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from unittest import TestCase
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.connection.Inbox import Inbox
+from bokkichat.connection.OverflowPolicy import OverflowPolicy
+
+
+class TestInbox(TestCase):
+    """
+    Tests the Inbox class
+    """
+
+    @staticmethod
+    def message(sender: str, body: str) -> TextMessage:
+        """
+        Generates a text message
+        :param sender: The address of the sender
+        :param body: The body of the message
+        :return: The message
+        """
+        return TextMessage(Address(sender), Address("bot"), body)
+
+    def test_fifo_order(self):
+        """
+        Tests that messages are taken in the order they were added
+        :return: None
+        """
+        inbox = Inbox()
+        for index in range(5):
+            self.assertTrue(inbox.put(self.message("a", str(index))))
+        inbox.finish()
+        bodies = []
+        while True:
+            message = inbox.get()
+            if message is None:
+                break
+            bodies.append(message.body)
+        self.assertEqual(bodies, ["0", "1", "2", "3", "4"])
+
+    def test_drop_oldest(self):
+        """
+        Tests that the DROP_OLDEST policy discards the oldest messages
+        :return: None
+        """
+        inbox = Inbox(maxsize=2, policy=OverflowPolicy.DROP_OLDEST)
+        for index in range(4):
+            inbox.put(self.message("a", str(index)))
+        self.assertEqual(inbox.dropped_count, 2)
+        self.assertEqual([x.body for x in inbox.clear()], ["2", "3"])
+
+    def test_reject_per_chat(self):
+        """
+        Tests that the REJECT_PER_CHAT policy limits single senders
+        :return: None
+        """
+        inbox = Inbox(
+            policy=OverflowPolicy.REJECT_PER_CHAT, per_chat_limit=2
+        )
+        self.assertTrue(inbox.put(self.message("a", "1")))
+        self.assertTrue(inbox.put(self.message("a", "2")))
+        self.assertFalse(inbox.put(self.message("a", "3")))
+        self.assertTrue(inbox.put(self.message("b", "1")))
+        self.assertEqual(inbox.rejected_count, 1)
+
+    def test_stop(self):
+        """
+        Tests that a stopped inbox doesn't hand out or block on messages
+        :return: None
+        """
+        inbox = Inbox(maxsize=1)
+        inbox.put(self.message("a", "1"))
+        inbox.stop()
+        self.assertIsNone(inbox.get())
+        self.assertFalse(inbox.put(self.message("a", "2")))
+        inbox.reset()
+        self.assertEqual(inbox.get().body, "1")
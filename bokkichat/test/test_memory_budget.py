@@ -0,0 +1,106 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import gc
+import threading
+from unittest import TestCase
+from bokkichat.utils.MemoryBudget import MemoryBudget
+
+
+class Owner:
+    """
+    Object that holds reserved bytes in the tests
+    """
+
+    def __init__(self, data: bytes):
+        """
+        Initializes the owner
+        :param data: The data the owner holds
+        """
+        self.data = data
+
+
+class TestMemoryBudget(TestCase):
+    """
+    Tests the MemoryBudget class
+    """
+
+    def test_acquire_and_release(self):
+        """
+        Tests reserving and releasing bytes
+        :return: None
+        """
+        budget = MemoryBudget(100, timeout=0)
+        self.assertTrue(budget.acquire(60))
+        self.assertFalse(budget.acquire(60))
+        self.assertEqual(budget.exhausted_count, 1)
+        budget.release(60)
+        self.assertTrue(budget.acquire(60))
+        self.assertEqual(budget.used, 60)
+        self.assertEqual(budget.high_water, 60)
+
+    def test_oversized_request(self):
+        """
+        Tests that a request exceeding the capacity is granted once
+        nothing else is held
+        :return: None
+        """
+        budget = MemoryBudget(100, timeout=0)
+        self.assertTrue(budget.acquire(500))
+        self.assertFalse(budget.acquire(1))
+
+    def test_waits_for_release(self):
+        """
+        Tests that acquiring waits until enough bytes are released
+        :return: None
+        """
+        budget = MemoryBudget(100, timeout=10)
+        budget.acquire(100)
+        threading.Timer(0.05, budget.release, (100,)).start()
+        self.assertTrue(budget.acquire(50))
+        self.assertEqual(budget.used, 50)
+
+    def test_hold(self):
+        """
+        Tests that held bytes are released once their owner is collected,
+        and that held data is recognized
+        :return: None
+        """
+        budget = MemoryBudget(100)
+        data = b"x" * 40
+        owner = Owner(data)
+        budget.charge(len(data))
+        budget.hold(owner, len(data), data)
+        self.assertTrue(budget.is_held(data))
+        self.assertFalse(budget.is_held(b"y" * 40))
+
+        del owner
+        gc.collect()
+        self.assertEqual(budget.used, 0)
+        self.assertFalse(budget.is_held(data))
+
+    def test_unlimited(self):
+        """
+        Tests that usage is tracked without a capacity
+        :return: None
+        """
+        budget = MemoryBudget()
+        self.assertTrue(budget.acquire(10 ** 12))
+        budget.charge(5)
+        self.assertEqual(budget.used, 10 ** 12 + 5)
@@ -0,0 +1,130 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from unittest import TestCase
+from unittest.mock import patch
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.entities.message.MediaType import MediaType
+from bokkichat.entities.message.MediaMessage import MediaMessage
+from bokkichat.connection.MessageFilter import MessageFilter
+from bokkichat.connection.impl.LoopbackConnection import LoopbackConnection
+from bokkichat.connection.impl.TelegramBotConnection import \
+    TelegramBotConnection
+from bokkichat.settings.impl.LoopbackSettings import LoopbackSettings
+from bokkichat.settings.impl.TelegramBotSettings import TelegramBotSettings
+from bokkichat.test.test_telegram_bot_connection import FakeBot, \
+    FakeUpdate, text_data
+
+
+class TestMessageFilter(TestCase):
+    """
+    Tests the MessageFilter class and how connections apply it
+    """
+
+    def test_allows(self):
+        """
+        Tests the checks on fully parsed messages
+        :return: None
+        """
+        message_filter = MessageFilter(
+            allowed_chats=["1"],
+            kinds=["text", "image"],
+            command_prefixes=["/"],
+            max_media_size=3
+        )
+
+        def media(media_type: MediaType, data: bytes) -> MediaMessage:
+            return MediaMessage(Address("1"), Address("bot"), media_type, data)
+
+        self.assertTrue(message_filter.allows(
+            TextMessage(Address("1"), Address("bot"), "/start")
+        ))
+        self.assertFalse(message_filter.allows(
+            TextMessage(Address("1"), Address("bot"), "start")
+        ))
+        self.assertFalse(message_filter.allows(
+            TextMessage(Address("2"), Address("bot"), "/start")
+        ))
+        self.assertTrue(message_filter.allows(
+            media(MediaType.IMAGE, b"abc")
+        ))
+        self.assertFalse(message_filter.allows(
+            media(MediaType.IMAGE, b"abcd")
+        ))
+        self.assertFalse(message_filter.allows(
+            media(MediaType.AUDIO, b"a")
+        ))
+        self.assertTrue(MessageFilter().allows(
+            media(MediaType.AUDIO, b"abcd")
+        ))
+
+    def test_telegram_push_down(self):
+        """
+        Tests that the Telegram connection discards rejected messages
+        before parsing them or downloading their media
+        :return: None
+        """
+        with patch("telegram.Bot", FakeBot):
+            connection = TelegramBotConnection(TelegramBotSettings("key"))
+        connection.message_filter = MessageFilter(
+            allowed_chats=["1"],
+            kinds=["text", "image"],
+            command_prefixes=["/"],
+            max_media_size=3
+        )
+        connection.bot.updates = [
+            FakeUpdate(1, text_data(1, "/start")),
+            FakeUpdate(2, text_data(2, "hello")),
+            FakeUpdate(3, text_data(3, "/start", 2)),
+            FakeUpdate(4, {"message_id": 4, "chat": {"id": 1},
+                           "photo": [{"file_id": "big", "file_size": 4}]}),
+            FakeUpdate(5, {"message_id": 5, "chat": {"id": 1},
+                           "audio": {"file_id": "audio", "file_size": 1}})
+        ]
+
+        with patch("requests.get") as get:
+            messages = connection.receive()
+
+        self.assertEqual([x.body for x in messages], ["/start"])
+        self.assertEqual(connection.bot.downloads, [])
+        self.assertEqual(get.call_count, 0)
+        self.assertEqual(connection.update_id, 6)
+
+    def test_loop_filtering(self):
+        """
+        Tests that the connection loop filters messages of connections
+        that do not apply the filter themselves
+        :return: None
+        """
+        sender, receiver = LoopbackConnection.pair(
+            LoopbackSettings("sender"), LoopbackSettings("receiver")
+        )
+        receiver.message_filter = MessageFilter(command_prefixes=["/"])
+        handled = []
+
+        def callback(connection, message):
+            handled.append(message.body)
+            if message.body == "/stop":
+                connection.stop(drain=True)
+
+        for body in ["/start", "hello", "/stop"]:
+            sender.send(TextMessage(sender.address, receiver.address, body))
+        receiver.loop(callback, sleep_time=30)
+        self.assertEqual(handled, ["/start", "/stop"])
@@ -0,0 +1,139 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import threading
+from unittest import TestCase
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.connection.impl.LoopbackConnection import LoopbackConnection
+from bokkichat.connection.wrappers.Priority import Priority
+from bokkichat.connection.wrappers.PriorityConnection import \
+    PriorityConnection
+from bokkichat.settings.impl.LoopbackSettings import LoopbackSettings
+
+
+class TestPriorityConnection(TestCase):
+    """
+    Tests the PriorityConnection class
+    """
+
+    def setUp(self):
+        """
+        Wraps a loopback connection whose sends block until released,
+        so that messages can be queued up behind a send in progress
+        :return: None
+        """
+        self.connection = LoopbackConnection(LoopbackSettings("bot"))
+        self.sent = []  # type: list
+        self.sending = threading.Event()
+        self.release = threading.Event()
+        self.connection.send = self.blocking_send  # type: ignore
+        self.priority = PriorityConnection(self.connection)
+
+    def blocking_send(self, message: TextMessage):
+        """
+        Records a message once the send is released
+        :param message: The message to send
+        :return: None
+        """
+        self.sending.set()
+        self.release.wait()
+        self.sent.append(message.title)
+
+    def send(self, priority: Priority, ttl=None):
+        """
+        Queues a text message titled with its priority class
+        :param priority: The priority class of the message
+        :param ttl: The time to live of the message
+        :return: None
+        """
+        self.priority.send(TextMessage(
+            Address("bot"), Address("user"), "Hello", priority.name
+        ), priority, ttl)
+
+    def block(self):
+        """
+        Sends a message and waits until the scheduler is stuck sending it
+        :return: None
+        """
+        self.send(Priority.NORMAL)
+        self.assertTrue(self.sending.wait(1))
+
+    def test_weighted_round_robin(self):
+        """
+        Tests that the priority classes are served according to their
+        weights without starving the bulk class
+        :return: None
+        """
+        self.block()
+        for _ in range(4):
+            self.send(Priority.BULK)
+        for _ in range(16):
+            self.send(Priority.INTERACTIVE)
+        self.assertEqual(self.priority.pending(), 20)
+        self.assertEqual(self.priority.pending(Priority.BULK), 4)
+
+        self.release.set()
+        self.priority.flush()
+
+        served = self.sent[1:]
+        self.assertEqual(len(served), 20)
+        self.assertEqual(served[:9].count("BULK"), 1)
+        self.assertEqual(served[:18].count("BULK"), 2)
+        self.assertEqual(self.priority.sent_counts[Priority.INTERACTIVE], 16)
+        self.assertEqual(self.priority.sent_counts[Priority.BULK], 4)
+
+    def test_custom_weights(self):
+        """
+        Tests that the weights can be overridden and that ties are
+        resolved in favour of the more urgent class
+        :return: None
+        """
+        self.priority.weights[Priority.BULK] = 8
+        self.block()
+        for _ in range(3):
+            self.send(Priority.BULK)
+            self.send(Priority.INTERACTIVE)
+
+        self.release.set()
+        self.priority.flush()
+        self.assertEqual(
+            self.sent[1:], ["INTERACTIVE", "BULK"] * 3
+        )
+
+    def test_expired_messages_are_shed(self):
+        """
+        Tests that messages whose time to live expired while queued
+        are discarded and counted
+        :return: None
+        """
+        self.block()
+        self.send(Priority.BULK, 0.01)
+        self.send(Priority.BULK, 10)
+        self.send(Priority.INTERACTIVE)
+        time.sleep(0.05)
+
+        self.release.set()
+        self.priority.close()
+
+        self.assertEqual(self.sent, ["NORMAL", "INTERACTIVE", "BULK"])
+        self.assertEqual(self.priority.shed_counts[Priority.BULK], 1)
+        self.assertEqual(self.priority.shed_counts[Priority.INTERACTIVE], 0)
+        self.assertEqual(self.priority.pending(), 0)
@@ -0,0 +1,162 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import threading
+from unittest import TestCase
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.entities.message.MediaMessage import MediaMessage
+from bokkichat.entities.message.MediaType import MediaType
+from bokkichat.connection.impl.LoopbackConnection import LoopbackConnection
+from bokkichat.settings.impl.LoopbackSettings import LoopbackSettings
+from bokkichat.relay.Relay import Relay
+
+
+class TestRelay(TestCase):
+    """
+    Tests the Relay class using loopback connections
+    """
+
+    def setUp(self):
+        """
+        Bridges the chats of two loopback bots in both directions
+        :return: None
+        """
+        self.alice, self.bot_a = LoopbackConnection.pair(
+            LoopbackSettings("alice"), LoopbackSettings("bot-a")
+        )
+        self.bob, self.bot_b = LoopbackConnection.pair(
+            LoopbackSettings("bob"), LoopbackSettings("bot-b")
+        )
+        self.relay = Relay()
+        self.a_to_b = self.relay.add_route(
+            self.bot_a, self.bot_b, self.bob.address, self.alice.address
+        )
+        self.b_to_a = self.relay.add_route(
+            self.bot_b, self.bot_a, self.alice.address, self.bob.address
+        )
+
+    def text(self, sender: LoopbackConnection, body: str) -> TextMessage:
+        """
+        Generates a text message sent by a user to their bot
+        :param sender: The user's connection
+        :param body: The body of the message
+        :return: The message
+        """
+        peer = sender.peer
+        assert peer is not None
+        return TextMessage(sender.address, peer.address, body)
+
+    def test_forwarding(self):
+        """
+        Tests that messages are forwarded with a marker
+        :return: None
+        """
+        self.relay.handle(self.bot_a, self.text(self.alice, "hi"))
+        self.relay.handle(self.bot_a, TextMessage(
+            Address("mallory"), self.bot_a.address, "ignored"
+        ))
+        self.relay.handle(self.bot_a, MediaMessage(
+            self.alice.address, self.bot_a.address,
+            MediaType.IMAGE, b"image", None
+        ))
+
+        received = self.bob.receive()
+        self.assertEqual(received[0].body, "hi" + self.relay.marker)
+        self.assertEqual(str(received[0].sender), "bot-b")
+        self.assertEqual(received[1].caption, self.relay.marker)
+        self.assertEqual(len(received), 2)
+
+        metrics = self.a_to_b.metrics()
+        self.assertEqual(metrics["forwarded"], 2)
+        self.assertEqual(metrics["bytes"], 7)
+        self.assertEqual(self.b_to_a.metrics()["forwarded"], 0)
+
+    def test_loops(self):
+        """
+        Tests that relayed messages are not relayed back
+        :return: None
+        """
+        self.relay.handle(self.bot_a, self.text(self.alice, "hi"))
+        relayed = self.bob.receive()[0]
+
+        # For example relayed again by another relay in the chat
+        self.relay.handle(self.bot_b, self.text(self.bob, relayed.body))
+        # The marker was removed
+        self.relay.handle(self.bot_b, self.text(self.bob, "hi"))
+        self.assertEqual(self.alice.receive(), [])
+        self.assertEqual(self.relay.looped_count, 2)
+
+        self.relay.handle(self.bot_b, self.text(self.bob, "hello"))
+        self.assertEqual(
+            [x.body for x in self.alice.receive()],
+            ["hello" + self.relay.marker]
+        )
+
+    def test_failures(self):
+        """
+        Tests that failed forwards are counted
+        :return: None
+        """
+        self.bot_b.send_prepared = lambda prepared, receiver: False
+        self.relay.handle(self.bot_a, self.text(self.alice, "hi"))
+        metrics = self.a_to_b.metrics()
+        self.assertEqual((metrics["forwarded"], metrics["failed"]), (0, 1))
+
+    def test_concurrent_metrics(self):
+        """
+        Tests that metrics are counted correctly by concurrent loops
+        :return: None
+        """
+        def forward(thread: int):
+            for index in range(250):
+                self.relay.handle(self.bot_a, self.text(
+                    self.alice, "{}-{}".format(thread, index)
+                ))
+
+        threads = [
+            threading.Thread(target=forward, args=(x,)) for x in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.a_to_b.metrics()["forwarded"], 1000)
+        self.assertEqual(len(self.bob.receive()), 1000)
+
+    def test_start_and_stop(self):
+        """
+        Tests that the relay runs the loops of the source connections
+        :return: None
+        """
+        self.relay.start(sleep_time=0)
+        self.alice.send(self.text(self.alice, "hi"))
+        self.bob.send(self.text(self.bob, "hello"))
+
+        received = []
+        deadline = time.monotonic() + 5
+        while len(received) < 2 and time.monotonic() < deadline:
+            received += self.alice.receive() + self.bob.receive()
+            time.sleep(0.001)
+        self.relay.stop()
+        self.assertEqual(
+            sorted([x.body for x in received]),
+            ["hello" + self.relay.marker, "hi" + self.relay.marker]
+        )
@@ -0,0 +1,151 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import threading
+from unittest import TestCase
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.connection.ReplyMemoizer import ReplyMemoizer
+from bokkichat.connection.impl.LoopbackConnection import LoopbackConnection
+from bokkichat.settings.impl.LoopbackSettings import LoopbackSettings
+
+
+class TestReplyMemoizer(TestCase):
+    """
+    Tests the ReplyMemoizer class
+    """
+
+    def setUp(self):
+        """
+        Pairs a bot and a user connection and creates a memoized callback
+        that counts its calls
+        :return: None
+        """
+        self.bot, self.user = LoopbackConnection.pair(
+            LoopbackSettings("bot"), LoopbackSettings("user")
+        )
+        self.memoizer = ReplyMemoizer(ttl=30)
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+        def status(connection, message):
+            self.release.wait(10)
+            self.calls += 1
+            connection.send(TextMessage(
+                connection.address, message.sender, "Status {}".format(
+                    self.calls
+                )
+            ))
+
+        self.callback = status
+        self.status = self.memoizer(status)
+
+    def command(self, body: str, sender: str = "user"):
+        """
+        Passes a received command to the memoized callback
+        :param body: The body of the command
+        :param sender: The sender of the command
+        :return: None
+        """
+        self.status(self.bot, TextMessage(
+            Address(sender), self.bot.address, body
+        ))
+
+    def replies(self):
+        """
+        :return: The receivers and bodies of the sent replies
+        """
+        return [(str(x.receiver), x.body) for x in self.user.receive()]
+
+    def test_replies_are_cached(self):
+        """
+        Tests that cached replies are sent to every sender of a command
+        :return: None
+        """
+        self.command("/status")
+        self.command("/Status@bot", "other")
+        self.command("/status  now")
+        self.assertEqual(self.replies(), [
+            ("user", "Status 1"), ("other", "Status 1"), ("user", "Status 2")
+        ])
+        self.assertEqual(self.memoizer.hits, 1)
+        self.assertEqual(self.memoizer.misses, 2)
+        # The capturing wrapper is reused
+        self.assertEqual(len(self.memoizer._capturing), 1)
+
+    def test_expiry(self):
+        """
+        Tests that replies are generated again once they expired
+        :return: None
+        """
+        self.status = self.memoizer.memoize(self.callback, ttl=0.01)
+        self.command("/status")
+        time.sleep(0.02)
+        self.command("/status")
+        self.assertEqual(self.calls, 2)
+
+        self.memoizer.clear()
+        self.command("/status")
+        self.assertEqual(self.calls, 3)
+
+    def test_single_flight(self):
+        """
+        Tests that concurrent senders of a command wait for the reply
+        instead of calling the callback as well
+        :return: None
+        """
+        self.release.clear()
+        threads = [
+            threading.Thread(target=self.command, args=("/status", str(x)))
+            for x in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        while self.memoizer.coalesced < 4:
+            time.sleep(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(
+            sorted(self.replies()),
+            [(str(x), "Status 1") for x in range(5)]
+        )
+
+    def test_failed_callbacks(self):
+        """
+        Tests that replies of failed callbacks are neither sent nor cached
+        :return: None
+        """
+        def failing(connection, message):
+            connection.send(TextMessage(
+                connection.address, message.sender, "Partial"
+            ))
+            raise ValueError()
+
+        memoized = self.memoizer(failing)
+        message = TextMessage(Address("user"), self.bot.address, "/fail")
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                memoized(self.bot, message)
+        self.command("/status")
+        self.assertEqual(self.replies(), [("user", "Status 1")])
@@ -0,0 +1,101 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+from unittest import TestCase
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.scheduling.Scheduler import Scheduler
+
+
+class TestScheduler(TestCase):
+    """
+    Tests the Scheduler class
+    """
+
+    def setUp(self):
+        """
+        Creates a temporary directory for the persistence file
+        :return: None
+        """
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, "timers.json")
+        self.sent = []  # type: list
+
+    def tearDown(self):
+        """
+        Removes the temporary directory
+        :return: None
+        """
+        shutil.rmtree(self.tempdir)
+
+    def saved_times(self) -> list:
+        """
+        :return: The times stored in the persistence file
+        """
+        with open(self.path, "r") as f:
+            return [json.loads(line)["at"] for line in f if line.strip()]
+
+    def test_save_stores_absolute_times(self):
+        """
+        Tests that persisted timers keep their wall-clock time regardless
+        of when they are saved
+        :return: None
+        """
+        scheduler = Scheduler(self.sent.append, path=self.path)
+        at = time.time() + 100
+        scheduler.schedule(
+            TextMessage(Address("bot"), Address("user"), "Hello"), at
+        )
+
+        scheduler.save()
+        first = self.saved_times()
+        time.sleep(0.3)
+        scheduler.save()
+        second = self.saved_times()
+
+        self.assertEqual(first, second)
+        self.assertAlmostEqual(first[0], at, delta=0.2)
+
+    def test_load_restores_timers(self):
+        """
+        Tests that timers are restored from the persistence file and
+        expired ones fire once the scheduler is started
+        :return: None
+        """
+        scheduler = Scheduler(self.sent.append, path=self.path)
+        message = TextMessage(Address("bot"), Address("user"), "Hello")
+        scheduler.schedule(message, time.time() + 100)
+        scheduler.schedule_in(message, 0.2)
+        scheduler.save()
+
+        time.sleep(0.3)
+        restored = Scheduler(self.sent.append, path=self.path)
+        self.assertEqual(len(restored), 2)
+        restored.start()
+        time.sleep(0.3)
+        restored.stop()
+
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(self.sent[0].body, "Hello")
+        self.assertEqual(len(self.saved_times()), 1)
@@ -0,0 +1,109 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import os
+import time
+import shutil
+import tempfile
+from unittest import TestCase
+from bokkichat.entities.Address import Address
+from bokkichat.sessions.SessionStore import SessionStore
+
+
+class TestSessionStore(TestCase):
+    """
+    Tests the SessionStore class
+    """
+
+    def setUp(self):
+        """
+        Creates a temporary directory
+        :return: None
+        """
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, "sessions.db")
+
+    def tearDown(self):
+        """
+        Deletes the temporary directory
+        :return: None
+        """
+        shutil.rmtree(self.tempdir)
+
+    def test_get_and_set(self):
+        """
+        Tests storing, retrieving and deleting sessions
+        :return: None
+        """
+        store = SessionStore()
+        address = Address("user")
+        self.assertEqual(store.get(address, {}), {})
+        store.set(address, {"step": 1})
+        self.assertEqual(store.get(address), {"step": 1})
+        store.delete(address)
+        self.assertIsNone(store.get(address))
+        store.close()
+
+    def test_persistence(self):
+        """
+        Tests that sessions survive closing the store, including ones
+        evicted from the cache
+        :return: None
+        """
+        store = SessionStore(self.path, cache_size=2)
+        for index in range(5):
+            store.set(Address(str(index)), {"index": index})
+        store.close()
+
+        reopened = SessionStore(self.path, cache_size=2)
+        for index in range(5):
+            self.assertEqual(
+                reopened.get(Address(str(index))), {"index": index}
+            )
+        self.assertEqual(reopened.misses, 5)
+        self.assertEqual(reopened.get(Address("4")), {"index": 4})
+        self.assertEqual(reopened.hits, 1)
+        reopened.close()
+
+    def test_deletion_is_persisted(self):
+        """
+        Tests that deleting a flushed session removes it from the database
+        :return: None
+        """
+        store = SessionStore(self.path)
+        store.set(Address("user"), {"a": 1})
+        store.flush()
+        store.delete(Address("user"))
+        store.close()
+
+        reopened = SessionStore(self.path)
+        self.assertIsNone(reopened.get(Address("user")))
+        reopened.close()
+
+    def test_expiry(self):
+        """
+        Tests that sessions expire after their time to live
+        :return: None
+        """
+        store = SessionStore(ttl=0.05)
+        store.set(Address("user"), {"a": 1})
+        self.assertEqual(store.get(Address("user")), {"a": 1})
+        time.sleep(0.1)
+        self.assertEqual(store.get(Address("user"), "expired"), "expired")
+        store.close()
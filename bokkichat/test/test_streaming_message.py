@@ -0,0 +1,160 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from typing import Dict
+from unittest import TestCase
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.connection.impl.LoopbackConnection import LoopbackConnection
+from bokkichat.settings.impl.LoopbackSettings import LoopbackSettings
+
+
+class EditableConnection(LoopbackConnection):
+    """
+    Loopback connection that keeps the bodies of editable messages
+    """
+
+    supports_editing = True
+
+    def __init__(self, settings: LoopbackSettings):
+        """
+        Initializes the connection
+        :param settings: The settings of the connection
+        """
+        super().__init__(settings)
+        self.messages = {}  # type: Dict[int, str]
+        self.deletable = True
+
+    def send_editable(self, message: TextMessage) -> int:
+        """
+        :param message: The message to send
+        :return: The ID of the message
+        """
+        reference = len(self.messages)
+        self.messages[reference] = message.body
+        return reference
+
+    def edit(self, reference: int, message: TextMessage) -> bool:
+        """
+        :param reference: The ID of the message
+        :param message: The message containing the new body
+        :return: True
+        """
+        self.messages[reference] = message.body
+        return True
+
+    def delete(self, reference: int, receiver: Address) -> bool:
+        """
+        :param reference: The ID of the message
+        :param receiver: The receiver of the message
+        :return: Whether or not messages can be deleted
+        """
+        if self.deletable:
+            del self.messages[reference]
+        return self.deletable
+
+
+class TestStreamingMessage(TestCase):
+    """
+    Tests the StreamingMessage class
+    """
+
+    def setUp(self):
+        """
+        Creates an editable connection
+        :return: None
+        """
+        self.connection = EditableConnection(LoopbackSettings("bot"))
+
+    def test_throttling(self):
+        """
+        Tests that edits are throttled and the last throttled update is
+        sent once the interval passed
+        :return: None
+        """
+        stream = self.connection.stream(Address("user"), interval=0.05)
+        for text in ["1", "2", "3"]:
+            stream.update(text)
+        self.assertEqual(self.connection.messages, {0: "\n1"})
+        self.assertEqual(stream.throttled_count, 2)
+
+        time.sleep(0.2)
+        self.assertEqual(self.connection.messages, {0: "\n3"})
+        self.assertEqual(stream.edit_count, 1)
+
+        stream.flush()
+        self.assertEqual(stream.edit_count, 1)
+
+    def test_finish(self):
+        """
+        Tests that finishing sends the final text and that later updates
+        are ignored
+        :return: None
+        """
+        stream = self.connection.stream(Address("user"), interval=30)
+        stream.update("1")
+        stream.update("2")
+        stream.finish("done")
+        stream.update("late")
+        stream.append("!")
+        stream.flush()
+        time.sleep(0.05)
+        self.assertEqual(self.connection.messages, {0: "\ndone"})
+        self.assertEqual(stream.text, "done")
+
+    def test_continuation(self):
+        """
+        Tests that long texts continue in additional messages, which are
+        deleted or cleared once the text shrinks
+        :return: None
+        """
+        stream = self.connection.stream(Address("user"), interval=0)
+        stream.max_chars = 8
+        stream.update("aaaaa\nbbbbb\nccccc")
+        self.assertEqual(
+            self.connection.messages, {0: "\naaaaa", 1: "bbbbb", 2: "ccccc"}
+        )
+
+        stream.update("aaaaa\nbbbbb")
+        self.assertEqual(self.connection.messages, {0: "\naaaaa", 1: "bbbbb"})
+
+        self.connection.deletable = False
+        stream.update("aaaaa")
+        self.assertEqual(
+            self.connection.messages, {0: "\naaaaa", 1: stream.placeholder}
+        )
+        stream.update("aaaaa\nddddd")
+        self.assertEqual(self.connection.messages, {0: "\naaaaa", 1: "ddddd"})
+
+    def test_without_editing(self):
+        """
+        Tests that the text is sent once finished if the connection can't
+        edit messages
+        :return: None
+        """
+        sender, receiver = LoopbackConnection.pair(
+            LoopbackSettings("bot"), LoopbackSettings("user")
+        )
+        stream = sender.stream(receiver.address)
+        stream.update("1")
+        stream.append("2")
+        self.assertEqual(receiver.receive(), [])
+        stream.finish()
+        self.assertEqual([x.body for x in receiver.receive()], ["12"])
@@ -0,0 +1,136 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import threading
+from unittest import TestCase
+from bokkichat.connection.CircuitState import CircuitState
+from bokkichat.connection.Supervisor import Supervisor
+
+
+class TestSupervisor(TestCase):
+    """
+    Tests the Supervisor class
+    """
+
+    def test_failures_open_the_circuit(self):
+        """
+        Tests that a function failing right after every successful probe
+        opens the circuit breaker and increases the delay
+        :return: None
+        """
+        supervisor = Supervisor(
+            (ConnectionError,), probe=lambda: None,
+            base_delay=0.001, max_delay=0.01, failure_threshold=3
+        )
+        delays = []
+
+        def target():
+            delays.append(supervisor.next_delay())
+            if len(delays) == 6:
+                supervisor.stop()
+            raise ConnectionError()
+
+        supervisor.run(target)
+        self.assertEqual(supervisor.failures, 6)
+        self.assertEqual(supervisor.state, CircuitState.OPEN)
+        self.assertFalse(supervisor.healthy)
+        self.assertLess(delays[0], delays[-1])
+
+    def test_success_closes_the_circuit(self):
+        """
+        Tests that failures are forgotten once the function succeeds
+        :return: None
+        """
+        supervisor = Supervisor(
+            (ConnectionError,), base_delay=0.001, failure_threshold=2
+        )
+        calls = []
+
+        def target():
+            calls.append(supervisor.healthy)
+            if len(calls) <= 3:
+                raise ConnectionError()
+            supervisor.succeeded()
+
+        supervisor.run(target)
+        self.assertEqual(calls, [True, False, False, False])
+        self.assertEqual(supervisor.failures, 0)
+        self.assertEqual(supervisor.total_failures, 3)
+        self.assertEqual(supervisor.state, CircuitState.CLOSED)
+        self.assertTrue(supervisor.healthy)
+
+    def test_failed_probes(self):
+        """
+        Tests that the function is only restarted once the probe succeeds
+        :return: None
+        """
+        probes = []
+
+        def probe():
+            probes.append(1)
+            if len(probes) < 3:
+                raise ConnectionError()
+
+        supervisor = Supervisor((ConnectionError,), probe, base_delay=0.001)
+        runs = []
+
+        def target():
+            runs.append(1)
+            if len(runs) == 1:
+                raise ConnectionError()
+
+        supervisor.run(target)
+        self.assertEqual(len(probes), 3)
+        self.assertEqual(len(runs), 2)
+        self.assertEqual(supervisor.failures, 3)
+
+    def test_unsupervised_errors(self):
+        """
+        Tests that other and excluded errors are raised
+        :return: None
+        """
+        supervisor = Supervisor(
+            (OSError,), base_delay=0.001, excluded=(FileNotFoundError,)
+        )
+
+        def raise_error(error):
+            raise error
+
+        with self.assertRaises(ValueError):
+            supervisor.run(lambda: raise_error(ValueError()))
+        with self.assertRaises(FileNotFoundError):
+            supervisor.run(lambda: raise_error(FileNotFoundError()))
+        self.assertEqual(supervisor.total_failures, 0)
+        self.assertFalse(supervisor.running)
+
+    def test_stop_cancels_reconnect(self):
+        """
+        Tests that stopping the supervisor cancels a pending reconnect
+        :return: None
+        """
+        supervisor = Supervisor((ConnectionError,), base_delay=60)
+
+        def target():
+            raise ConnectionError()
+
+        threading.Timer(0.05, supervisor.stop).start()
+        supervisor.run(target)
+        self.assertEqual(supervisor.total_failures, 1)
+        self.assertFalse(supervisor.reconnecting)
+        self.assertFalse(supervisor.ready)
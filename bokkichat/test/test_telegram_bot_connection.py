@@ -0,0 +1,412 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import json
+import shutil
+import tempfile
+from typing import List, Dict, Any, Optional
+from unittest import TestCase
+from unittest.mock import patch, Mock
+# noinspection PyPackageRequirements
+import telegram
+import requests
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.entities.message.MediaMessage import MediaMessage
+from bokkichat.connection.FloodPolicy import FloodPolicy
+from bokkichat.connection.FloodProtection import FloodProtection
+from bokkichat.connection.impl.TelegramBotConnection import \
+    TelegramBotConnection
+from bokkichat.settings.impl.TelegramBotSettings import TelegramBotSettings
+
+
+class FakeMessage:
+    """
+    Stands in for a python-telegram-bot message
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        """
+        Initializes the message
+        :param data: The message data
+        """
+        self.data = data
+        self.chat_id = data["chat"]["id"]
+        self.message_id = data["message_id"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        :return: The message data
+        """
+        return self.data
+
+
+class FakeUpdate:
+    """
+    Stands in for a python-telegram-bot update
+    """
+
+    def __init__(self, update_id: int, data: Dict[str, Any]):
+        """
+        Initializes the update
+        :param update_id: The ID of the update
+        :param data: The message data
+        """
+        self.update_id = update_id
+        self.message = FakeMessage(data)
+
+
+class FakeBot:
+    """
+    Stands in for telegram.Bot and records the API calls
+    """
+
+    def __init__(self, token: str, **kwargs):
+        """
+        Initializes the bot
+        :param token: The API key
+        :param kwargs: Ignored keyword arguments
+        """
+        self.name = "@" + token
+        self.base_url = "https://api.telegram.org/bot" + token
+        self.updates = []  # type: List[FakeUpdate]
+        self.timeouts = []  # type: List[int]
+        self.sent = []  # type: List[Any]
+        self.failures = []  # type: List[Optional[Exception]]
+        self.downloads = []  # type: List[str]
+        self.deleted = []  # type: List[Any]
+
+    def get_me(self):
+        """
+        :return: None
+        """
+        return None
+
+    def get_updates(self, offset: int = 0, timeout: int = 0, **kwargs) \
+            -> List[FakeUpdate]:
+        """
+        :param offset: The ID of the first update to return
+        :param timeout: The long polling timeout
+        :param kwargs: Ignored keyword arguments
+        :return: The pending updates
+        """
+        self.timeouts.append(timeout)
+        return [x for x in self.updates if x.update_id >= offset]
+
+    def send_message(self, chat_id: str, text: str, **kwargs):
+        """
+        Records a sent message, or raises the next queued failure.
+        Queued None values let a send succeed
+        :param chat_id: The receiver
+        :param text: The text
+        :param kwargs: Ignored keyword arguments
+        :return: None
+        """
+        if len(self.failures) > 0:
+            failure = self.failures.pop(0)
+            if failure is not None:
+                raise failure
+        self.sent.append((chat_id, text))
+
+    def delete_message(self, chat_id: str, message_id: int) -> bool:
+        """
+        Records a deleted message, or raises the next queued failure
+        :param chat_id: The chat of the message
+        :param message_id: The ID of the message
+        :return: True
+        """
+        if len(self.failures) > 0:
+            failure = self.failures.pop(0)
+            if failure is not None:
+                raise failure
+        self.deleted.append((chat_id, message_id))
+        return True
+
+    def get_file(self, file_id: str) -> Dict[str, str]:
+        """
+        :param file_id: The ID of the file
+        :return: The file information
+        """
+        self.downloads.append(file_id)
+        return {"file_path": "https://files/" + file_id}
+
+
+def text_data(message_id: int, text: str, chat_id: int = 1) \
+        -> Dict[str, Any]:
+    """
+    Generates the data of a text message
+    :param message_id: The ID of the message
+    :param text: The text
+    :param chat_id: The ID of the chat
+    :return: The message data
+    """
+    return {"message_id": message_id, "chat": {"id": chat_id}, "text": text}
+
+
+class TestTelegramBotConnection(TestCase):
+    """
+    Tests the TelegramBotConnection class using a fake bot
+    """
+
+    def setUp(self):
+        """
+        Replaces the telegram bot with a fake one
+        :return: None
+        """
+        patcher = patch("telegram.Bot", FakeBot)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """
+        Deletes the temporary directory
+        :return: None
+        """
+        shutil.rmtree(self.tempdir)
+
+    def test_receive(self):
+        """
+        Tests that received updates are parsed and duplicates are dropped
+        :return: None
+        """
+        connection = TelegramBotConnection(TelegramBotSettings("key"))
+        connection.bot.updates = [
+            FakeUpdate(1, text_data(10, "first")),
+            FakeUpdate(2, text_data(10, "first")),
+            FakeUpdate(3, text_data(11, "second", 2))
+        ]
+
+        messages = connection.receive()
+        self.assertEqual([x.body for x in messages], ["first", "second"])
+        self.assertEqual(str(messages[1].sender), "2")
+        self.assertEqual(connection.update_id, 4)
+
+        # Updates delivered again are dropped
+        connection.update_id = 0
+        self.assertEqual(connection.receive(), [])
+        self.assertEqual(connection.update_id, 4)
+
+    def test_flood_protection_timeout(self):
+        """
+        Tests that deferred messages shorten the long polling timeout to
+        the time until they may be handled
+        :return: None
+        """
+        connection = TelegramBotConnection(TelegramBotSettings("key"))
+        connection.flood_protection = FloodProtection(
+            rate=0.5, burst=1, policy=FloodPolicy.DEFER
+        )
+        connection.bot.updates = [
+            FakeUpdate(x, text_data(x, str(x))) for x in range(3)
+        ]
+
+        self.assertEqual(len(connection.receive()), 1)
+        self.assertEqual(connection.receive(), [])
+        self.assertEqual(connection.bot.timeouts[-2:], [10, 2])
+
+    def test_chunked_send(self):
+        """
+        Tests that long texts are escaped and sent in chunks
+        :return: None
+        """
+        connection = TelegramBotConnection(TelegramBotSettings("key"))
+        body = "a_b\n" + "x" * 3000 + "\n" + "y" * 3000
+        connection.send(TextMessage(connection.address, Address("5"), body))
+
+        self.assertEqual(connection.bot.sent, [
+            ("5", "\na\\_b\n" + "x" * 3000),
+            ("5", "y" * 3000)
+        ])
+
+    def test_send_errors(self):
+        """
+        Tests that network errors while sending text are raised, so that
+        the message can be sent again later
+        :return: None
+        """
+        connection = TelegramBotConnection(TelegramBotSettings("key"))
+        prepared = connection.prepare(
+            TextMessage(connection.address, Address("5"), "text")
+        )
+
+        connection.bot.failures = [telegram.error.BadRequest("bad")]
+        self.assertFalse(connection.send_prepared(prepared, Address("5")))
+        connection.bot.failures = [telegram.error.TimedOut()]
+        with self.assertRaises(telegram.error.NetworkError):
+            connection.send_prepared(prepared, Address("5"))
+        self.assertTrue(connection.send_prepared(prepared, Address("5")))
+
+    def test_resume_chunks(self):
+        """
+        Tests that sending a partially delivered text again only sends
+        the chunks that were not delivered yet
+        :return: None
+        """
+        connection = TelegramBotConnection(TelegramBotSettings("key"))
+        body = "\n".join([x * 3000 for x in "abc"])
+        prepared = connection.prepare(
+            TextMessage(connection.address, Address("5"), body)
+        )
+        bot = connection.bot
+
+        bot.failures = [None, telegram.error.TimedOut()]
+        with self.assertRaises(telegram.error.NetworkError):
+            connection.send_prepared(prepared, Address("5"))
+        self.assertTrue(connection.send_prepared(prepared, Address("6")))
+        self.assertTrue(connection.send_prepared(prepared, Address("5")))
+        self.assertEqual(prepared.delivered, {})
+
+        self.assertEqual([x[1][-1] for x in bot.sent if x[0] == "5"], [
+            "a", "b", "c"
+        ])
+        self.assertEqual(len([x for x in bot.sent if x[0] == "6"]), 3)
+
+    def test_delete(self):
+        """
+        Tests deleting messages
+        :return: None
+        """
+        connection = TelegramBotConnection(TelegramBotSettings("key"))
+        self.assertTrue(connection.delete(3, Address("5")))
+        connection.bot.failures = [telegram.error.BadRequest("too old")]
+        self.assertFalse(connection.delete(4, Address("5")))
+        self.assertEqual(connection.bot.deleted, [("5", 3)])
+
+    def test_raw_updates(self):
+        """
+        Tests that raw updates are decoded like regular ones
+        :return: None
+        """
+        connection = TelegramBotConnection(
+            TelegramBotSettings("key", raw_updates=True)
+        )
+        connection.session = Mock()
+        connection.session.post.return_value = Mock(
+            status_code=200,
+            content=json.dumps({"ok": True, "result": [
+                {"update_id": 7, "message": text_data(1, "raw")},
+                {"update_id": 8}
+            ]}).encode("utf-8")
+        )
+
+        messages = connection.receive()
+        self.assertEqual([x.body for x in messages], ["raw"])
+        self.assertEqual(connection.update_id, 9)
+
+    def test_raw_update_errors(self):
+        """
+        Tests that errors of raw getUpdates calls are mapped to the errors
+        raised by python-telegram-bot
+        :return: None
+        """
+        connection = TelegramBotConnection(
+            TelegramBotSettings("key", raw_updates=True)
+        )
+        session = Mock()
+
+        for status, error in [
+            (401, telegram.error.Unauthorized),
+            (403, telegram.error.Unauthorized),
+            (400, telegram.error.BadRequest),
+            (502, telegram.error.NetworkError)
+        ]:
+            session.post.return_value = Mock(
+                status_code=status,
+                content=b'{"ok": false, "description": "error"}'
+            )
+            with self.assertRaises(error):
+                connection._get_raw_updates(session)
+
+        session.post.return_value = Mock(status_code=502, content=b"<html>")
+        with self.assertRaises(telegram.error.NetworkError):
+            connection._get_raw_updates(session)
+
+        session.post.side_effect = requests.exceptions.Timeout()
+        with self.assertRaises(telegram.error.TimedOut):
+            connection._get_raw_updates(session)
+        session.post.side_effect = requests.exceptions.ConnectionError()
+        with self.assertRaises(telegram.error.NetworkError):
+            connection._get_raw_updates(session)
+
+        # Blocked bots and timeouts don't stop the connection loop
+        connection.session = session
+        session.post.side_effect = requests.exceptions.Timeout()
+        self.assertEqual(connection.receive(), [])
+        session.post.side_effect = None
+        session.post.return_value = Mock(
+            status_code=403, content=b'{"ok": false}'
+        )
+        self.assertEqual(connection.receive(), [])
+        self.assertEqual(connection.update_id, 1)
+
+    def test_media_cache(self):
+        """
+        Tests that cached media files are not downloaded again
+        :return: None
+        """
+        connection = TelegramBotConnection(TelegramBotSettings(
+            "key", media_cache_dir=self.tempdir
+        ))
+        photo = [{"file_id": "small"}, {"file_id": "large", "file_size": 4}]
+        connection.bot.updates = [
+            FakeUpdate(1, {"message_id": 1, "chat": {"id": 1},
+                           "photo": photo}),
+            FakeUpdate(2, {"message_id": 2, "chat": {"id": 1},
+                           "photo": photo, "caption": "again"})
+        ]
+
+        with patch("requests.get") as get:
+            get.return_value = Mock(ok=True, content=b"data")
+            messages = connection.receive()
+
+        self.assertEqual(len(messages), 2)
+        for message in messages:
+            self.assertIsInstance(message, MediaMessage)
+            self.assertEqual(message.data, b"data")
+        self.assertEqual(messages[1].caption, "again")
+        self.assertEqual(connection.bot.downloads, ["large"])
+        self.assertEqual(get.call_count, 1)
+
+    def test_media_cache_unique_ids(self):
+        """
+        Tests that raw updates cache media by their unique file ID
+        :return: None
+        """
+        connection = TelegramBotConnection(TelegramBotSettings(
+            "key", media_cache_dir=self.tempdir, raw_updates=True
+        ))
+        connection.session = Mock()
+        connection.session.post.return_value = Mock(
+            status_code=200,
+            content=json.dumps({"ok": True, "result": [
+                {"update_id": x, "message": {
+                    "message_id": x, "chat": {"id": 1},
+                    "audio": {"file_id": str(x), "file_unique_id": "u"}
+                }}
+                for x in range(2)
+            ]}).encode("utf-8")
+        )
+
+        with patch("requests.get") as get:
+            get.return_value = Mock(ok=True, content=b"data")
+            messages = connection.receive()
+
+        self.assertEqual([x.data for x in messages], [b"data", b"data"])
+        self.assertEqual(connection.bot.downloads, ["0"])
@@ -0,0 +1,173 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import os
+import time
+import zlib
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch, Mock
+# noinspection PyPackageRequirements
+import telegram
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.connection.FloodPolicy import FloodPolicy
+from bokkichat.connection.FloodProtection import FloodProtection
+from bokkichat.connection.MessageFilter import MessageFilter
+from bokkichat.connection.impl.TelegramBotPoolConnection import \
+    TelegramBotPoolConnection
+from bokkichat.settings.impl.TelegramBotPoolSettings import \
+    TelegramBotPoolSettings
+from bokkichat.test.test_telegram_bot_connection import FakeBot, \
+    FakeUpdate, text_data
+
+
+class TestTelegramBotPoolConnection(TestCase):
+    """
+    Tests the TelegramBotPoolConnection class using fake bots
+    """
+
+    def setUp(self):
+        """
+        Replaces the telegram bots with fake ones and creates a pool of
+        two bots
+        :return: None
+        """
+        patcher = patch("telegram.Bot", FakeBot)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tempdir = tempfile.mkdtemp()
+        self.pool = TelegramBotPoolConnection(
+            TelegramBotPoolSettings(["key0", "key1"])
+        )
+        self.bots = [member.bot for member in self.pool.members]
+
+    def tearDown(self):
+        """
+        Deletes the temporary directory
+        :return: None
+        """
+        shutil.rmtree(self.tempdir)
+
+    def test_member_settings(self):
+        """
+        Tests that the bots are configured using the pool's settings
+        :return: None
+        """
+        pool = TelegramBotPoolConnection(TelegramBotPoolSettings(
+            ["key0", "key1"],
+            dedup_size=5,
+            dedup_path=os.path.join(self.tempdir, "dedup"),
+            media_cache_dir=self.tempdir,
+            media_cache_size=100,
+            raw_updates=True
+        ))
+        for index, member in enumerate(pool.members):
+            settings = member.settings
+            self.assertEqual(settings.api_key, "key{}".format(index))
+            self.assertEqual(settings.dedup_size, 5)
+            self.assertEqual(
+                settings.dedup_path,
+                os.path.join(self.tempdir, "dedup.{}".format(index))
+            )
+            self.assertEqual(
+                settings.media_cache_dir,
+                os.path.join(self.tempdir, str(index))
+            )
+            self.assertEqual(settings.media_cache_size, 50)
+            self.assertIsNotNone(member.session)
+
+    def test_shared_filter_and_flood_protection(self):
+        """
+        Tests that the bots apply the pool's message filter and flood
+        protection, and that deferred messages keep their bot
+        :return: None
+        """
+        self.pool.message_filter = MessageFilter(allowed_chats=["1"])
+        self.pool.flood_protection = FloodProtection(
+            rate=1000, burst=1, policy=FloodPolicy.DEFER
+        )
+        self.bots[0].updates = [
+            FakeUpdate(x, text_data(x, str(x))) for x in range(2)
+        ]
+        self.bots[1].updates = [FakeUpdate(0, text_data(0, "other", 2))]
+
+        received = self.pool.receive()
+        self.assertEqual([x.body for x in received], ["0"])
+        self.assertEqual(self.pool.flood_protection.pending, 1)
+
+        time.sleep(0.01)
+        received = self.pool.receive()
+        self.assertEqual([x.body for x in received], ["1"])
+        self.assertEqual(str(received[0].receiver), "@key0")
+
+    def test_failover(self):
+        """
+        Tests that receivers move to another bot if their bot can't reach
+        them, without sending delivered chunks again
+        :return: None
+        """
+        first = zlib.crc32(b"5") % 2
+        other = 1 - first
+        self.bots[first].failures = [
+            None, telegram.error.Unauthorized("Forbidden: bot was blocked")
+        ]
+        body = "a" * 3000 + "\n" + "b" * 3000
+        self.assertTrue(self.pool.send_prepared(
+            self.pool.prepare(TextMessage(Address("me"), Address("5"), body)),
+            Address("5")
+        ))
+        self.assertEqual(self.bots[first].sent, [("5", "\n" + "a" * 3000)])
+        self.assertEqual(self.bots[other].sent, [("5", "b" * 3000)])
+
+        self.pool.send(TextMessage(Address("me"), Address("5"), "Sticky"))
+        self.assertEqual(self.bots[other].sent[-1], ("5", "\nSticky"))
+        self.assertEqual(self.pool.capacity()[other]["sent"], 2)
+
+    def test_rate_limits(self):
+        """
+        Tests that rate-limited bots are skipped
+        :return: None
+        """
+        first = zlib.crc32(b"5") % 2
+        self.bots[first].failures = [telegram.error.RetryAfter(30)]
+        self.pool.send(TextMessage(Address("me"), Address("5"), "Hi"))
+        self.assertEqual(self.bots[1 - first].sent, [("5", "\nHi")])
+        self.assertGreater(self.pool.capacity()[first]["blocked_for"], 0)
+
+    def test_supervision(self):
+        """
+        Tests that receiving only fails if no bot could be polled and that
+        the probe succeeds if any bot reaches the API
+        :return: None
+        """
+        error = telegram.error.NetworkError("down")
+        self.bots[0].get_updates = Mock(side_effect=error)
+        self.bots[0].get_me = Mock(side_effect=error)
+        self.bots[1].updates = [FakeUpdate(0, text_data(0, "up"))]
+        self.assertEqual([x.body for x in self.pool.receive()], ["up"])
+        self.pool.supervisor.probe()
+
+        self.bots[1].get_updates = Mock(side_effect=error)
+        self.bots[1].get_me = Mock(side_effect=error)
+        with self.assertRaises(telegram.error.NetworkError):
+            self.pool.receive()
+        with self.assertRaises(telegram.error.NetworkError):
+            self.pool.supervisor.probe()
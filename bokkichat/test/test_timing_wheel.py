@@ -0,0 +1,125 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from unittest import TestCase
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.scheduling.Timer import Timer
+from bokkichat.scheduling.TimingWheel import TimingWheel
+
+
+class TestTimingWheel(TestCase):
+    """
+    Tests the TimingWheel class
+    """
+
+    @staticmethod
+    def timer(expires: int, interval=None) -> Timer:
+        """
+        Generates a timer
+        :param expires: The tick at which the timer fires
+        :param interval: The interval of a recurring timer
+        :return: The timer
+        """
+        message = TextMessage(Address("bot"), Address("user"), str(expires))
+        return Timer(expires, message, interval)
+
+    @staticmethod
+    def fire_ticks(wheel: TimingWheel, ticks: int) -> dict:
+        """
+        Advances a wheel and records when timers fired
+        :param wheel: The wheel to advance
+        :param ticks: The amount of ticks to advance the wheel by
+        :return: A dictionary mapping timers to the ticks they fired at
+        """
+        fired = {}  # type: dict
+        for _ in range(ticks):
+            for timer in wheel.advance():
+                fired.setdefault(timer, []).append(wheel.tick)
+        return fired
+
+    def test_timers_fire_at_their_tick(self):
+        """
+        Tests that timers on every level, including ones that cascade
+        down from higher levels and the overflow list, fire exactly at
+        their expiry
+        :return: None
+        """
+        wheel = TimingWheel(levels=2)
+        expiries = [1, 63, 64, 65, 127, 128, 4095, 4096, 4097, 5000]
+        timers = [self.timer(x) for x in expiries]
+        for timer in timers:
+            wheel.add(timer)
+        self.assertEqual(len(wheel), len(timers))
+
+        fired = self.fire_ticks(wheel, 5001)
+        for timer, expires in zip(timers, expiries):
+            self.assertEqual(fired[timer], [expires])
+        self.assertEqual(len(wheel), 0)
+
+    def test_cascading_after_adding_late(self):
+        """
+        Tests timers added while the wheel is not at tick 0, whose slots
+        on higher levels are reached before the current slot is
+        :return: None
+        """
+        wheel = TimingWheel(levels=3)
+        self.fire_ticks(wheel, 100)
+        timers = [self.timer(100 + x) for x in [1, 28, 29, 92, 4000]]
+        for timer in timers:
+            wheel.add(timer)
+
+        fired = self.fire_ticks(wheel, 4000)
+        for timer in timers:
+            self.assertEqual(fired[timer], [int(timer.message.body)])
+
+    def test_cancel(self):
+        """
+        Tests that cancelled timers don't fire
+        :return: None
+        """
+        wheel = TimingWheel()
+        timer = self.timer(70)
+        wheel.add(timer)
+        wheel.cancel(timer)
+        self.assertEqual(len(wheel), 0)
+        self.assertEqual(self.fire_ticks(wheel, 100), {})
+
+    def test_recurring(self):
+        """
+        Tests that recurring timers fire repeatedly and stay pending
+        :return: None
+        """
+        wheel = TimingWheel()
+        timer = self.timer(10, interval=50)
+        wheel.add(timer)
+        fired = self.fire_ticks(wheel, 200)
+        self.assertEqual(fired[timer], [10, 60, 110, 160])
+        self.assertEqual(len(wheel), 1)
+
+    def test_past_timers_fire_next_tick(self):
+        """
+        Tests that timers expiring in the past fire on the next tick
+        :return: None
+        """
+        wheel = TimingWheel()
+        self.fire_ticks(wheel, 10)
+        timer = self.timer(3)
+        wheel.add(timer)
+        self.assertEqual(wheel.advance(), [timer])
@@ -0,0 +1,157 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+from typing import List
+from unittest import TestCase
+from unittest.mock import patch
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.connection.impl.LoopbackConnection import LoopbackConnection
+from bokkichat.connection.impl.TelegramBotConnection import \
+    TelegramBotConnection
+from bokkichat.settings.impl.LoopbackSettings import LoopbackSettings
+from bokkichat.settings.impl.TelegramBotSettings import TelegramBotSettings
+from bokkichat.tracing.Tracer import Tracer
+from bokkichat.tracing.MultiTracer import MultiTracer
+from bokkichat.tracing.ProfilingTracer import ProfilingTracer
+from bokkichat.tracing.SlowCallbackDetector import SlowCallbackDetector
+from bokkichat.test.test_telegram_bot_connection import FakeBot, \
+    FakeUpdate, text_data
+
+
+class RecordingTracer(Tracer):
+    """
+    Tracer that records the stages that finished
+    """
+
+    def __init__(self):
+        """
+        Initializes the tracer
+        """
+        self.finished = []  # type: List[str]
+
+    def finish(self, stage: str, duration: float):
+        """
+        Records a finished stage
+        :param stage: The name of the stage
+        :param duration: The duration of the stage in seconds
+        :return: None
+        """
+        self.finished.append(stage)
+
+
+class TestTracing(TestCase):
+    """
+    Tests the tracing hooks and the tracers
+    """
+
+    def test_loop_spans(self):
+        """
+        Tests that the connection loop traces receiving and callbacks
+        :return: None
+        """
+        sender, receiver = LoopbackConnection.pair(
+            LoopbackSettings("sender"), LoopbackSettings("receiver")
+        )
+        receiver.tracer = RecordingTracer()
+        sender.send(TextMessage(sender.address, receiver.address, "hi"))
+        receiver.loop(
+            lambda connection, _: connection.stop(drain=True),
+            sleep_time=30
+        )
+
+        self.assertIn("loop.receive", receiver.tracer.finished)
+        self.assertEqual(receiver.tracer.finished.count("loop.callback"), 1)
+
+    def test_telegram_spans(self):
+        """
+        Tests that the Telegram connection traces the stages of receive
+        :return: None
+        """
+        with patch("telegram.Bot", FakeBot):
+            connection = TelegramBotConnection(TelegramBotSettings("key"))
+        tracer = RecordingTracer()
+        connection.tracer = tracer
+        connection.bot.updates = [FakeUpdate(1, text_data(1, "hi"))]
+
+        connection.receive()
+        self.assertEqual(
+            tracer.finished, ["receive.get_updates", "receive.parse"]
+        )
+
+    def test_profiling(self):
+        """
+        Tests that stage timings are aggregated and forwarded by the
+        multi tracer
+        :return: None
+        """
+        profiler = ProfilingTracer()
+        recorder = RecordingTracer()
+        tracer = MultiTracer([profiler, recorder])
+
+        for _ in range(3):
+            with tracer.span("fast"):
+                pass
+        with tracer.span("slow"):
+            time.sleep(0.01)
+
+        lines = profiler.report().split("\n")
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith("slow"))
+        self.assertEqual(lines[2].split()[:2], ["fast", "3"])
+        self.assertEqual(recorder.finished, ["fast"] * 3 + ["slow"])
+        self.assertEqual(profiler.active_spans(), {})
+
+        profiler.reset()
+        self.assertEqual(len(profiler.report().split("\n")), 1)
+
+    def test_profiling_samples(self):
+        """
+        Tests that code locations are sampled within active stages
+        :return: None
+        """
+        profiler = ProfilingTracer(sample_interval=0.005)
+        with profiler.span("sleep"):
+            time.sleep(0.1)
+        profiler.stop_sampling()
+
+        self.assertIn("samples", profiler.report())
+
+    def test_slow_callbacks(self):
+        """
+        Tests that slow stages are reported once while they are running
+        and counted once they finished, while other stages are ignored
+        :return: None
+        """
+        detector = SlowCallbackDetector(threshold=0.02, interval=60)
+
+        with detector.span("receive.parse"):
+            time.sleep(0.03)
+        self.assertEqual(detector.slow_count, 0)
+
+        with self.assertLogs("SlowCallbackDetector", "WARNING") as logs:
+            with detector.span("loop.callback"):
+                time.sleep(0.03)
+                detector.check()
+                detector.check()
+
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn("test_slow_callbacks", logs.output[0])
+        self.assertIn("Slow loop.callback", logs.output[1])
+        self.assertEqual(detector.slow_count, 1)
@@ -0,0 +1,119 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+from unittest import TestCase
+from bokkichat.entities.Address import Address
+from bokkichat.entities.message.TextMessage import TextMessage
+from bokkichat.connection.impl.LoopbackConnection import LoopbackConnection
+from bokkichat.connection.impl.ReplayConnection import ReplayConnection
+from bokkichat.connection.wrappers.RecordingConnection import \
+    RecordingConnection
+from bokkichat.recording.Direction import Direction
+from bokkichat.recording.TrafficLog import TrafficLog
+from bokkichat.settings.impl.LoopbackSettings import LoopbackSettings
+from bokkichat.settings.impl.ReplaySettings import ReplaySettings
+
+
+class TestTrafficReplay(TestCase):
+    """
+    Tests recording traffic and replaying it
+    """
+
+    def setUp(self):
+        """
+        Creates a temporary directory
+        :return: None
+        """
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, "traffic.log")
+
+    def tearDown(self):
+        """
+        Deletes the temporary directory
+        :return: None
+        """
+        shutil.rmtree(self.tempdir)
+
+    def test_record_and_replay(self):
+        """
+        Tests that recorded inbound messages are replayed in order by a
+        loop that ends with the log, even if the replay is wrapped
+        :return: None
+        """
+        user, bot = LoopbackConnection.pair(
+            LoopbackSettings("user"), LoopbackSettings("bot")
+        )
+        recording = RecordingConnection(bot, TrafficLog(self.path))
+        for body in ["one", "two"]:
+            user.send(TextMessage(user.address, bot.address, body))
+        for message in recording.receive():
+            recording.send(TextMessage(
+                bot.address, message.sender, message.body.upper()
+            ))
+        recording.close()
+
+        self.assertEqual(
+            [(x[1], x[2].body) for x in TrafficLog.read(self.path)],
+            [
+                (Direction.INBOUND, "one"), (Direction.INBOUND, "two"),
+                (Direction.OUTBOUND, "ONE"), (Direction.OUTBOUND, "TWO")
+            ]
+        )
+
+        replay = ReplayConnection(ReplaySettings(self.path, speed=0))
+        wrapper = RecordingConnection(
+            replay, TrafficLog(os.path.join(self.tempdir, "replay.log"))
+        )
+        replayed = []
+        wrapper.loop(
+            lambda con, msg: replayed.append(msg.body), sleep_time=0
+        )
+        wrapper.close()
+        self.assertEqual(replayed, ["one", "two"])
+        self.assertTrue(replay.exhausted)
+
+    def test_replay_speed(self):
+        """
+        Tests that the replay keeps the accelerated timing of the log
+        :return: None
+        """
+        with open(self.path, "w") as f:
+            for timestamp, body in [(100.0, "one"), (101.0, "two")]:
+                message = TextMessage(Address("user"), Address("bot"), body)
+                f.write(json.dumps({
+                    "t": timestamp,
+                    "d": Direction.INBOUND.value,
+                    "m": message.to_dict()
+                }) + "\n")
+
+        replay = ReplayConnection(ReplaySettings(self.path, speed=10))
+        handled = []
+        start = time.monotonic()
+        replay.loop(
+            lambda con, msg: handled.append(time.monotonic() - start),
+            sleep_time=0
+        )
+        self.assertEqual(len(handled), 2)
+        self.assertGreaterEqual(handled[1] - handled[0], 0.09)
+        self.assertLess(handled[1], 5)
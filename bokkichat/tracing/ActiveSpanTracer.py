@@ -0,0 +1,74 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import threading
+from typing import Dict, List, Tuple
+from bokkichat.tracing.Tracer import Tracer
+
+
+class ActiveSpanTracer(Tracer):
+    """
+    Tracer that keeps track of the currently active stages of every thread,
+    so that they can be inspected by a background thread
+    """
+
+    def __init__(self):
+        """
+        Initializes the tracer
+        """
+        self._active = {}  # type: Dict[int, List[Tuple[str, float]]]
+        self._active_lock = threading.Lock()
+
+    def start(self, stage: str):
+        """
+        Marks a stage as active in the current thread
+        :param stage: The name of the stage
+        :return: None
+        """
+        ident = threading.get_ident()
+        with self._active_lock:
+            self._active.setdefault(ident, []).append(
+                (stage, time.monotonic())
+            )
+
+    def finish(self, stage: str, duration: float):
+        """
+        Marks the innermost stage of the current thread as finished
+        :param stage: The name of the stage
+        :param duration: The duration of the stage in seconds
+        :return: None
+        """
+        ident = threading.get_ident()
+        with self._active_lock:
+            stack = self._active.get(ident)
+            if stack:
+                stack.pop()
+                if not stack:
+                    del self._active[ident]
+
+    def active_spans(self) -> Dict[int, List[Tuple[str, float]]]:
+        """
+        :return: A snapshot of the active stages, mapping thread IDs to
+                 stacks of stage names and their start times
+        """
+        with self._active_lock:
+            return {
+                ident: list(stack) for ident, stack in self._active.items()
+            }
@@ -0,0 +1,53 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from typing import List
+from bokkichat.tracing.Tracer import Tracer
+
+
+class MultiTracer(Tracer):
+    """
+    Tracer that forwards all spans to multiple tracers
+    """
+
+    def __init__(self, tracers: List[Tracer]):
+        """
+        Initializes the tracer
+        :param tracers: The tracers to forward to
+        """
+        self.tracers = tracers
+
+    def start(self, stage: str):
+        """
+        Forwards the start of a stage
+        :param stage: The name of the stage
+        :return: None
+        """
+        for tracer in self.tracers:
+            tracer.start(stage)
+
+    def finish(self, stage: str, duration: float):
+        """
+        Forwards the end of a stage
+        :param stage: The name of the stage
+        :param duration: The duration of the stage in seconds
+        :return: None
+        """
+        for tracer in self.tracers:
+            tracer.finish(stage, duration)
@@ -0,0 +1,157 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import sys
+import time
+import signal
+import logging
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+from bokkichat.tracing.ActiveSpanTracer import ActiveSpanTracer
+
+
+class ProfilingTracer(ActiveSpanTracer):
+    """
+    Tracer that aggregates the timings of every stage.
+    Optionally, a sampling thread periodically records which code location
+    every thread is executing and attributes it to the thread's innermost
+    active stage.
+    The aggregated data can be dumped on demand, for example using a
+    signal handler.
+    """
+
+    def __init__(self, sample_interval: Optional[float] = None):
+        """
+        Initializes the tracer
+        :param sample_interval: If provided, code locations are sampled
+                                in this interval in seconds
+        """
+        super().__init__()
+        self.sample_interval = sample_interval
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self._stats = {}  # type: Dict[str, List[float]]
+        self._samples = {}  # type: Dict[str, Counter]
+        self._sampling = threading.Event()
+
+        if sample_interval is not None:
+            self._sampling.set()
+            sampler = threading.Thread(target=self._sample)
+            sampler.daemon = True
+            sampler.start()
+
+    def finish(self, stage: str, duration: float):
+        """
+        Adds the duration of a stage to the statistics
+        :param stage: The name of the stage
+        :param duration: The duration of the stage in seconds
+        :return: None
+        """
+        super().finish(stage, duration)
+        with self._lock:
+            stats = self._stats.get(stage)
+            if stats is None:
+                self._stats[stage] = [1, duration, duration]
+            else:
+                stats[0] += 1
+                stats[1] += duration
+                if duration > stats[2]:
+                    stats[2] = duration
+
+    def stop_sampling(self):
+        """
+        Stops the sampling thread
+        :return: None
+        """
+        self._sampling.clear()
+
+    def reset(self):
+        """
+        Discards the collected statistics and samples
+        :return: None
+        """
+        with self._lock:
+            self._stats = {}
+            self._samples = {}
+
+    def report(self, top: int = 5) -> str:
+        """
+        Generates a report of the aggregated timings of every stage,
+        sorted by the total time spent in the stage
+        :param top: The amount of sampled code locations listed per stage
+        :return: The report
+        """
+        with self._lock:
+            stats = sorted(
+                self._stats.items(), key=lambda x: x[1][1], reverse=True
+            )
+            samples = {
+                stage: counter.most_common(top)
+                for stage, counter in self._samples.items()
+            }
+
+        lines = ["{:<24}{:>10}{:>12}{:>12}{:>12}".format(
+            "Stage", "Count", "Total (s)", "Avg (ms)", "Max (ms)"
+        )]
+        for stage, (count, total, maximum) in stats:
+            lines.append("{:<24}{:>10}{:>12.3f}{:>12.3f}{:>12.3f}".format(
+                stage, int(count), total, total / count * 1000, maximum * 1000
+            ))
+            for location, hits in samples.get(stage, []):
+                lines.append("    {:>6} samples  {}".format(hits, location))
+        return "\n".join(lines)
+
+    def dump(self):
+        """
+        Logs the report
+        :return: None
+        """
+        self.logger.info("Stage timings:\n" + self.report())
+
+    def install_signal_handler(self, signum: int = signal.SIGUSR1):
+        """
+        Dumps the report whenever the process receives a signal.
+        Must be called from the main thread.
+        :param signum: The signal to react to
+        :return: None
+        """
+        signal.signal(signum, lambda *_: self.dump())
+
+    def _sample(self):
+        """
+        Periodically samples the code locations of all threads that are
+        within a stage
+        :return: None
+        """
+        while self._sampling.is_set():
+            frames = sys._current_frames()
+            for ident, stack in self.active_spans().items():
+                frame = frames.get(ident)
+                if frame is None or not stack:
+                    continue
+                code = frame.f_code
+                location = "{}:{} {}".format(
+                    code.co_filename, frame.f_lineno, code.co_name
+                )
+                with self._lock:
+                    self._samples.setdefault(stack[-1][0], Counter())[
+                        location
+                    ] += 1
+            time.sleep(self.sample_interval)
@@ -0,0 +1,130 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import sys
+import time
+import logging
+import threading
+import traceback
+from typing import Iterable, Optional, Set, Tuple
+from bokkichat.tracing.ActiveSpanTracer import ActiveSpanTracer
+
+
+class SlowCallbackDetector(ActiveSpanTracer):
+    """
+    Tracer that detects stages, by default the loop callbacks, which take
+    longer than a threshold.
+    A watchdog thread logs a stack sample of every handler that is still
+    running after the threshold has passed, so that the cause of the
+    slowdown can be identified while it happens.
+    """
+
+    def __init__(
+            self,
+            threshold: float = 1.0,
+            stages: Iterable[str] = ("loop.callback",),
+            interval: Optional[float] = None
+    ):
+        """
+        Initializes the detector
+        :param threshold: The duration in seconds after which a stage is
+                          considered slow
+        :param stages: The stages to watch
+        :param interval: The interval in which the watchdog checks the
+                         active stages. Defaults to a quarter of the
+                         threshold
+        """
+        super().__init__()
+        self.threshold = threshold
+        self.stages = set(stages)
+        self.interval = threshold / 4 if interval is None else interval
+        self.slow_count = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._reported = set()  # type: Set[Tuple[int, float]]
+        self._watchdog = None  # type: Optional[threading.Thread]
+
+    def start(self, stage: str):
+        """
+        Starts watching a stage
+        :param stage: The name of the stage
+        :return: None
+        """
+        if stage not in self.stages:
+            return
+
+        super().start(stage)
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._watch)
+            self._watchdog.daemon = True
+            self._watchdog.start()
+
+    def finish(self, stage: str, duration: float):
+        """
+        Stops watching a stage and logs it if it was slow
+        :param stage: The name of the stage
+        :param duration: The duration of the stage in seconds
+        :return: None
+        """
+        if stage not in self.stages:
+            return
+
+        super().finish(stage, duration)
+        if duration >= self.threshold:
+            self.slow_count += 1
+            self.logger.warning(
+                "Slow {}: took {:.3f}s".format(stage, duration)
+            )
+
+    def check(self):
+        """
+        Logs a stack sample for every watched stage that is running for
+        longer than the threshold. Every stage is reported only once.
+        :return: None
+        """
+        now = time.monotonic()
+        frames = sys._current_frames()
+        active = set()
+
+        for ident, stack in self.active_spans().items():
+            for stage, started in stack:
+                key = (ident, started)
+                active.add(key)
+                if now - started < self.threshold or key in self._reported:
+                    continue
+
+                self._reported.add(key)
+                frame = frames.get(ident)
+                sample = "" if frame is None \
+                    else "".join(traceback.format_stack(frame))
+                self.logger.warning(
+                    "{} running for {:.3f}s in thread {}:\n{}".format(
+                        stage, now - started, ident, sample
+                    )
+                )
+
+        self._reported &= active
+
+    def _watch(self):
+        """
+        Periodically checks the active stages
+        :return: None
+        """
+        while True:
+            time.sleep(self.interval)
+            self.check()
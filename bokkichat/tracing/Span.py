@@ -0,0 +1,56 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+
+
+class Span:
+    """
+    Context manager that measures the duration of a stage and reports it
+    to a tracer
+    """
+
+    __slots__ = ("tracer", "stage", "start")
+
+    def __init__(self, tracer, stage: str):
+        """
+        Initializes the span
+        :param tracer: The tracer to report to
+        :param stage: The name of the traced stage
+        """
+        self.tracer = tracer
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self) -> "Span":
+        """
+        Starts the span
+        :return: The span
+        """
+        self.start = time.perf_counter()
+        self.tracer.start(self.stage)
+        return self
+
+    def __exit__(self, *_):
+        """
+        Ends the span and reports its duration.
+        Exceptions are not suppressed.
+        :return: None
+        """
+        self.tracer.finish(self.stage, time.perf_counter() - self.start)
@@ -0,0 +1,57 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+from bokkichat.tracing.Span import Span
+
+
+class Tracer:
+    """
+    Class that defines the tracing hooks of a connection.
+    Connections wrap every stage of receive, send and the loop dispatch
+    in a span, which calls start and finish on the tracer.
+    This base class does nothing, subclasses may override start and finish.
+    Stage names are prefixed with their origin, for example
+    receive.get_updates, receive.parse, receive.download, send.split,
+    send.escape, send.api, loop.receive and loop.callback.
+    """
+
+    def span(self, stage: str) -> Span:
+        """
+        Generates a span for a stage
+        :param stage: The name of the stage
+        :return: The span, to be used as a context manager
+        """
+        return Span(self, stage)
+
+    def start(self, stage: str):
+        """
+        Called whenever a stage starts
+        :param stage: The name of the stage
+        :return: None
+        """
+        pass
+
+    def finish(self, stage: str, duration: float):
+        """
+        Called whenever a stage ends
+        :param stage: The name of the stage
+        :param duration: The duration of the stage in seconds
+        :return: None
+        """
+        pass
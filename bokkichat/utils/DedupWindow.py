@@ -0,0 +1,118 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import os
+import json
+import time
+import tempfile
+from collections import deque
+from typing import Optional, Hashable
+
+
+class DedupWindow:
+    """
+    Bounded set of recently seen keys, used to detect duplicate deliveries.
+    Once the window is full, the oldest keys are evicted first.
+    Keys may be integers, strings or tuples of those.
+    The window can optionally be persisted to a JSON file.
+    """
+
+    def __init__(
+            self,
+            size: int = 10000,
+            path: Optional[str] = None,
+            save_interval: float = 30.0
+    ):
+        """
+        Initializes the window. If a path is provided and the file exists,
+        the previously persisted keys are loaded.
+        :param size: The maximum amount of keys to remember
+        :param path: The path to the file in which the keys are persisted
+        :param save_interval: The minimum time in seconds between saves
+                              triggered by checkpoint
+        """
+        self.size = size
+        self.path = path
+        self.save_interval = save_interval
+        self.dirty = False
+        self._last_save = time.monotonic()
+        self._order = deque()  # type: deque
+        self._seen = set()  # type: set
+
+        if path is not None and os.path.isfile(path):
+            with open(path, "r") as f:
+                for key in json.load(f):
+                    self.add(tuple(key) if isinstance(key, list) else key)
+            self.dirty = False
+
+    def __contains__(self, key: Hashable) -> bool:
+        """
+        :param key: The key to check
+        :return: Whether or not the key is in the window
+        """
+        return key in self._seen
+
+    def __len__(self) -> int:
+        """
+        :return: The amount of keys in the window
+        """
+        return len(self._seen)
+
+    def add(self, key: Hashable) -> bool:
+        """
+        Adds a key to the window
+        :param key: The key to add
+        :return: True if the key was not yet in the window, False otherwise
+        """
+        if key in self._seen:
+            return False
+
+        self._seen.add(key)
+        self._order.append(key)
+        if len(self._order) > self.size:
+            self._seen.discard(self._order.popleft())
+        self.dirty = True
+        return True
+
+    def save(self):
+        """
+        Atomically writes the keys to the persistence file, if one was
+        configured and the window changed since it was last saved.
+        :return: None
+        """
+        if self.path is None or not self.dirty:
+            return
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "w") as f:
+            json.dump(list(self._order), f)
+        os.replace(temp_path, self.path)
+        self.dirty = False
+        self._last_save = time.monotonic()
+
+    def checkpoint(self):
+        """
+        Saves the window if the save interval passed since it was last
+        saved. Allows calling this frequently without rewriting the whole
+        file every time.
+        :return: None
+        """
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
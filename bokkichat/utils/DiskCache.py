@@ -0,0 +1,146 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class DiskCache:
+    """
+    Size-bounded on-disk cache for binary data.
+    Entries are evicted in least-recently-used order once the total size
+    exceeds the limit. Writes are atomic, so a crash never leaves
+    partially written entries behind.
+    The recency of entries is stored in the modification time of their
+    files, which allows the cache to be reused after a restart.
+    """
+
+    def __init__(self, directory: str, max_size: int = 268435456):
+        """
+        Initializes the cache, indexing any existing entries
+        :param directory: The directory in which the entries are stored
+        :param max_size: The maximum total size of the entries in bytes
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # type: OrderedDict
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.startswith(".") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            files.append((stat.st_mtime, name, stat.st_size))
+
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.size += size
+        self._evict()
+
+    def __len__(self) -> int:
+        """
+        :return: The amount of cached entries
+        """
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Retrieves an entry from the cache
+        :param key: The key of the entry
+        :return: The cached data, or None if the entry does not exist
+        """
+        name = self._name(key)
+        path = os.path.join(self.directory, name)
+
+        with self._lock:
+            if name not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                size = self._entries.pop(name, None)
+                if size is not None:
+                    self.size -= size
+                self.misses += 1
+            return None
+
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        """
+        Stores an entry in the cache, evicting old entries if necessary.
+        Entries larger than the cache itself are not stored.
+        :param key: The key of the entry
+        :param data: The data to store
+        :return: None
+        """
+        if len(data) > self.max_size:
+            return
+
+        name = self._name(key)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, os.path.join(self.directory, name))
+
+        with self._lock:
+            self.size -= self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self.size += len(data)
+            self._evict()
+
+    def _evict(self):
+        """
+        Removes the least recently used entries until the cache is within
+        its size limit. Must be called while holding the lock.
+        :return: None
+        """
+        while self.size > self.max_size and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _name(key: str) -> str:
+        """
+        Generates a file name for a key
+        :param key: The key
+        :return: The file name
+        """
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
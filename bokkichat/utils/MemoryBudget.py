@@ -0,0 +1,149 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import weakref
+import threading
+from typing import Optional, Any, Dict
+
+
+class MemoryBudget:
+    """
+    Thread-safe budget of bytes that may be held in memory at once.
+    Usage is tracked even if the budget has no capacity.
+    A request exceeding the capacity is granted once nothing else is held,
+    so that large files can't block forever.
+    Held data objects are tracked, so that code passing them on can avoid
+    reserving their bytes a second time.
+    """
+
+    def __init__(
+            self,
+            capacity: Optional[int] = None,
+            timeout: Optional[float] = 10.0
+    ):
+        """
+        Initializes the budget
+        :param capacity: The maximum amount of bytes. Unlimited if not
+                         provided
+        :param timeout: The default time in seconds to wait for capacity.
+                        Waits indefinitely if None
+        """
+        self.capacity = capacity
+        self.timeout = timeout
+        self.used = 0
+        self.high_water = 0
+        self.exhausted_count = 0
+        self._held = {}  # type: Dict[int, int]
+        self._condition = threading.Condition()
+
+    def acquire(self, size: int, block: bool = True) -> bool:
+        """
+        Reserves bytes, waiting up to the budget's timeout until enough
+        capacity is available
+        :param size: The amount of bytes
+        :param block: Whether or not to wait for capacity
+        :return: True if the bytes were reserved, False otherwise
+        """
+        timeout = self.timeout if block else 0
+        with self._condition:
+            if not self._condition.wait_for(
+                    lambda: self._fits(size), timeout
+            ):
+                self.exhausted_count += 1
+                return False
+            self._add(size)
+            return True
+
+    def charge(self, size: int):
+        """
+        Reserves bytes without waiting, even if this exceeds the capacity
+        :param size: The amount of bytes
+        :return: None
+        """
+        with self._condition:
+            self._add(size)
+
+    def release(self, size: int):
+        """
+        Releases reserved bytes
+        :param size: The amount of bytes
+        :return: None
+        """
+        with self._condition:
+            self.used -= size
+            self._condition.notify_all()
+
+    def hold(self, owner: Any, size: int, data: Optional[Any] = None):
+        """
+        Releases reserved bytes once an object is garbage collected
+        :param owner: The object holding the bytes, for example a
+                      MediaMessage
+        :param size: The amount of bytes
+        :param data: The data object the bytes were reserved for. If
+                     provided, is_held reports it as held while the owner
+                     is alive. The owner must reference it.
+        :return: None
+        """
+        key = None if data is None else id(data)
+        if key is not None:
+            with self._condition:
+                self._held[key] = self._held.get(key, 0) + 1
+        weakref.finalize(owner, self._unhold, key, size)
+
+    def is_held(self, data: Any) -> bool:
+        """
+        Checks whether the bytes of a data object are already reserved
+        :param data: The data object, for example the bytes of a media file
+        :return: True if a living owner holds the data, False otherwise
+        """
+        with self._condition:
+            return id(data) in self._held
+
+    def _unhold(self, key: Optional[int], size: int):
+        """
+        Releases the bytes of a garbage collected owner
+        :param key: The ID of the held data object, if known
+        :param size: The amount of bytes
+        :return: None
+        """
+        with self._condition:
+            if key is not None:
+                self._held[key] -= 1
+                if self._held[key] == 0:
+                    del self._held[key]
+        self.release(size)
+
+    def _fits(self, size: int) -> bool:
+        """
+        Must be called while holding the lock.
+        :param size: The amount of bytes
+        :return: Whether or not the bytes may be reserved
+        """
+        return self.capacity is None or self.used == 0 \
+            or self.used + size <= self.capacity
+
+    def _add(self, size: int):
+        """
+        Adds reserved bytes and updates the high-water mark.
+        Must be called while holding the lock.
+        :param size: The amount of bytes
+        :return: None
+        """
+        self.used += size
+        self.high_water = max(self.high_water, self.used)
@@ -0,0 +1,93 @@
+"""LICENSE
+Copyright 2018 Hermann Krumrey <hermann@krumreyh.com>
+
+This file is part of bokkichat.
+
+bokkichat is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+bokkichat is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with bokkichat.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE"""
+
+import time
+import threading
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+    Tokens are refilled continuously at a fixed rate up to the capacity of
+    the bucket.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initializes the bucket. The bucket starts out full.
+        :param rate: The amount of tokens added per second
+        :param capacity: The maximum amount of tokens.
+                         Defaults to one second's worth of tokens
+        """
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        """
+        Adds the tokens accumulated since the last update.
+        Must be called while holding the lock.
+        :param now: The current time.monotonic() value
+        :return: None
+        """
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        Takes tokens from the bucket if enough are available
+        :param tokens: The amount of tokens to take
+        :return: True if the tokens were taken, False otherwise
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """
+        Calculates how long it takes until enough tokens are available
+        :param tokens: The amount of tokens
+        :return: The time in seconds, 0 if the tokens are available
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(tokens - self.tokens, 0.0) / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        """
+        Takes tokens from the bucket, waiting until enough are available
+        :param tokens: The amount of tokens to take
+        :return: None
+        """
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)